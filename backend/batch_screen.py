@@ -0,0 +1,96 @@
+"""
+Screen offline camp data (CSV or JSONL) in bulk.
+
+Each row is validated as a ScreeningRequest, analyzed, stored in
+screening_sessions and written to a results file (.jsonl, or .csv for a flat
+summary). Progress is checkpointed after every chunk; re-running the same
+command after an interruption resumes from the last complete chunk. With
+--workers N, each chunk is analyzed across N worker processes.
+
+CSV columns use dotted names for nested fields, e.g. user.age,
+symptoms.cough_gt_2_weeks, deep_questions.previous_conditions (separated by
+";") and user_location.lat / user_location.lng. JSONL lines are
+ScreeningRequest documents with an optional "user_location" object. An
+optional screened_at column or field (ISO 8601 date or date-time) records
+when the screening took place; it defaults to the time of the import.
+Inline upload content is moved to the blob store, so --no-db rejects rows
+that carry it.
+
+    cd backend && python batch_screen.py camp.csv results.jsonl [--chunk-size N] [--workers N] [--no-db]
+"""
+from pathlib import Path
+from typing import Dict, Optional
+from dotenv import load_dotenv
+
+# Services configure themselves from the environment on import
+load_dotenv(Path(__file__).resolve().parent / '.env')
+
+from repositories.referral_centers import ReferralCenterRepository
+from services.analysis import AnalysisService
+from services.analysis_cache import AnalysisResultCache
+from services.batch_screening import DEFAULT_CHUNK_SIZE, BatchScreeningRunner, CheckpointMismatchError
+from services.blob_store import blob_store_from_env
+from services.parallel_analysis import ParallelAnalyzer
+from services.referrals import ReferralService
+import argparse
+import asyncio
+import logging
+import sys
+import database
+
+logger = logging.getLogger(__name__)
+
+
+async def run(input_path: str, output_path: str, chunk_size: Optional[int] = None,
+              checkpoint_path: Optional[str] = None, use_db: bool = True, workers: int = 0) -> Dict[str, int]:
+    referral_service = ReferralService()
+    db = database.get_database() if use_db else None
+    parallel_analyzer = None
+    try:
+        if db is not None:
+            await db.screening_sessions.create_index("id", unique=True)
+            centers = await ReferralCenterRepository(db, referral_service).load_all()
+            if centers:
+                referral_service.reload(centers)
+
+        analysis_service = AnalysisService(referral_service=referral_service,
+                                           result_cache=AnalysisResultCache.from_env())
+        if workers:
+            parallel_analyzer = ParallelAnalyzer.from_env(workers, referral_service.referral_centers)
+            # Enough rows per chunk for two full shards per worker
+            chunk_size = chunk_size or workers * parallel_analyzer.shard_size * 2
+        runner = BatchScreeningRunner(analysis_service, db, chunk_size or DEFAULT_CHUNK_SIZE,
+                                      parallel_analyzer=parallel_analyzer,
+                                      blob_store=blob_store_from_env(db) if db is not None else None)
+        return await runner.run(input_path, output_path, checkpoint_path)
+    finally:
+        if parallel_analyzer is not None:
+            parallel_analyzer.shutdown()
+        if db is not None:
+            database.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("input", help="CSV or JSONL screenings")
+    parser.add_argument("output", help="results file (.jsonl or .csv)")
+    parser.add_argument("--chunk-size", type=int, help=f"rows per chunk (default: {DEFAULT_CHUNK_SIZE}, "
+                                                      "or two shards per worker with --workers)")
+    parser.add_argument("--workers", type=int, default=0, help="analysis worker processes (0: in process)")
+    parser.add_argument("--checkpoint", help="checkpoint file (default: <output>.checkpoint)")
+    parser.add_argument("--no-db", action="store_true", help="only write the results file")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    try:
+        counts = asyncio.run(run(args.input, args.output, args.chunk_size, args.checkpoint,
+                                 not args.no_db, args.workers))
+    except CheckpointMismatchError as e:
+        logger.error(str(e))
+        sys.exit(1)
+    logger.info(f"Batch screening: {counts}")
+
+
+if __name__ == "__main__":
+    main()
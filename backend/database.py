@@ -0,0 +1,181 @@
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
+from pymongo import monitoring
+from typing import Dict, Optional
+from services.metrics import metrics, MONGO_COMMAND_SECONDS
+import os
+import time
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Pool defaults, overridable through the environment
+DEFAULT_MAX_POOL_SIZE = 100
+DEFAULT_MIN_POOL_SIZE = 0
+DEFAULT_WAIT_QUEUE_TIMEOUT_MS = 5000
+DEFAULT_MAX_IDLE_TIME_MS = 60000
+
+
+class PoolStatsListener(monitoring.ConnectionPoolListener):
+    """
+    Tracks live connection pool statistics for the shared Mongo client
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._checkout_started: Dict[int, list] = {}
+        self.open_connections = 0
+        self.checked_out = 0
+        self.checkouts = 0
+        self.checkout_failures = 0
+        self.total_wait_ms = 0.0
+        self.max_wait_ms = 0.0
+        self.pools_cleared = 0
+
+    def _record_wait(self) -> None:
+        started = self._checkout_started.get(threading.get_ident())
+        if started:
+            wait_ms = (time.perf_counter() - started.pop()) * 1000
+            self.total_wait_ms += wait_ms
+            self.max_wait_ms = max(self.max_wait_ms, wait_ms)
+
+    def connection_check_out_started(self, event):
+        with self._lock:
+            self._checkout_started.setdefault(threading.get_ident(), []).append(time.perf_counter())
+
+    def connection_check_out_failed(self, event):
+        with self._lock:
+            self._record_wait()
+            self.checkout_failures += 1
+
+    def connection_checked_out(self, event):
+        with self._lock:
+            self._record_wait()
+            self.checked_out += 1
+            self.checkouts += 1
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self.checked_out = max(self.checked_out - 1, 0)
+
+    def connection_created(self, event):
+        with self._lock:
+            self.open_connections += 1
+
+    def connection_closed(self, event):
+        with self._lock:
+            self.open_connections = max(self.open_connections - 1, 0)
+
+    def connection_ready(self, event):
+        pass
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        with self._lock:
+            self.pools_cleared += 1
+
+    def pool_closed(self, event):
+        pass
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {
+                "open_connections": self.open_connections,
+                "checked_out": self.checked_out,
+                "available": max(self.open_connections - self.checked_out, 0),
+                "checkouts": self.checkouts,
+                "checkout_failures": self.checkout_failures,
+                "avg_wait_ms": round(self.total_wait_ms / self.checkouts, 3) if self.checkouts else 0.0,
+                "max_wait_ms": round(self.max_wait_ms, 3),
+                "pools_cleared": self.pools_cleared
+            }
+
+
+class CommandLatencyListener(monitoring.CommandListener):
+    """
+    Feeds driver-measured command latency into MONGO_COMMAND_SECONDS by
+    command name and outcome
+    """
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        if metrics.enabled:
+            MONGO_COMMAND_SECONDS.observe(event.duration_micros / 1e6, event.command_name, "success")
+
+    def failed(self, event):
+        if metrics.enabled:
+            MONGO_COMMAND_SECONDS.observe(event.duration_micros / 1e6, event.command_name, "failure")
+
+
+_client: Optional[AsyncIOMotorClient] = None
+_pool_listener = PoolStatsListener()
+_command_listener = CommandLatencyListener()
+
+
+def get_pool_settings() -> Dict[str, int]:
+    """
+    Read connection pool settings from the environment
+    """
+    return {
+        "maxPoolSize": int(os.environ.get('MONGO_MAX_POOL_SIZE', DEFAULT_MAX_POOL_SIZE)),
+        "minPoolSize": int(os.environ.get('MONGO_MIN_POOL_SIZE', DEFAULT_MIN_POOL_SIZE)),
+        "waitQueueTimeoutMS": int(os.environ.get('MONGO_WAIT_QUEUE_TIMEOUT_MS', DEFAULT_WAIT_QUEUE_TIMEOUT_MS)),
+        "maxIdleTimeMS": int(os.environ.get('MONGO_MAX_IDLE_TIME_MS', DEFAULT_MAX_IDLE_TIME_MS))
+    }
+
+
+def connect() -> AsyncIOMotorClient:
+    """
+    Create the process-wide Mongo client (idempotent)
+    """
+    global _client
+    if _client is None:
+        settings = get_pool_settings()
+        _client = AsyncIOMotorClient(
+            os.environ['MONGO_URL'],
+            event_listeners=[_pool_listener, _command_listener],
+            **settings
+        )
+        logger.info(f"Created MongoDB client with pool settings: {settings}")
+    return _client
+
+
+def close() -> None:
+    """
+    Close the process-wide Mongo client and release its sockets
+    """
+    global _client
+    if _client is not None:
+        _client.close()
+        _client = None
+
+
+def get_client() -> AsyncIOMotorClient:
+    """
+    Get the shared Mongo client, creating it on first use
+    """
+    return _client if _client is not None else connect()
+
+
+def get_database() -> AsyncIOMotorDatabase:
+    """
+    Database dependency shared by all routers
+    """
+    return get_client()[os.environ['DB_NAME']]
+
+
+def get_pool_stats() -> Dict:
+    """
+    Live connection pool statistics for sizing the pool
+    """
+    stats = _pool_listener.snapshot()
+    stats["settings"] = get_pool_settings()
+    stats["connected"] = _client is not None
+    return stats
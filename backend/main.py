@@ -1,13 +1,29 @@
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
-from motor.motor_asyncio import AsyncIOMotorClient
-import os
+import asyncio
 import logging
+import os
 from pathlib import Path
+from dotenv import load_dotenv
+
+# Load environment variables before importing routes and services: their
+# pools, caches and buffers are configured from the environment on import
+ROOT_DIR = Path(__file__).parent
+load_dotenv(ROOT_DIR / '.env')
 
 # Import route modules
-from routes.screening import router as screening_router
-from routes.pdf import router as pdf_router
+from routes.screening import router as screening_router, referral_service, analysis_cache
+from routes.pdf import router as pdf_router, render_pool
+from routes.files import router as files_router
+from routes.analytics import router as analytics_router
+from routes.export import router as export_router
+from repositories.referral_centers import ReferralCenterRepository
+from repositories.screening_rollups import ScreeningRollupRepository
+from repositories.saved_reports import SavedReportRepository
+from services.session_writer import session_write_buffer
+from services.metrics import MetricsMiddleware, PROMETHEUS_CONTENT_TYPE, metrics
+import database
 
 # Configure logging
 logging.basicConfig(
@@ -16,15 +32,24 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# Load environment variables
-ROOT_DIR = Path(__file__).parent
-from dotenv import load_dotenv
-load_dotenv(ROOT_DIR / '.env')
+# How often each worker refreshes its in-memory referral centers (0: startup only)
+REFERRAL_RELOAD_SECONDS = float(os.environ.get("REFERRAL_RELOAD_SECONDS", 300))
+referral_reload_task = None
 
-# MongoDB connection
-mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ['DB_NAME']]
+async def reload_referral_centers(repository: ReferralCenterRepository) -> None:
+    """
+    Pick up edits to referral_centers made after startup (or by another
+    worker's seed) in the in-memory centers used by batch lookups and as the
+    $geoNear fallback
+    """
+    while True:
+        await asyncio.sleep(REFERRAL_RELOAD_SECONDS)
+        try:
+            if await repository.refresh_fallback():
+                analysis_cache.clear()  # memoized results embed referrals
+                logger.info(f"Reloaded {len(referral_service.referral_centers)} referral centers")
+        except Exception as e:
+            logger.warning(f"Referral center reload failed, keeping current centers: {e}")
 
 # Create the main FastAPI app
 app = FastAPI(
@@ -42,9 +67,15 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Per-route latency histograms (outermost, so it times the whole stack)
+app.add_middleware(MetricsMiddleware)
+
 # Include routers
 app.include_router(screening_router)
 app.include_router(pdf_router)
+app.include_router(files_router)
+app.include_router(analytics_router)
+app.include_router(export_router)
 
 # Health check endpoint
 @app.get("/api/health")
@@ -52,7 +83,7 @@ async def health_check():
     """Health check endpoint"""
     try:
         # Test database connection
-        await db.admin.command('ping')
+        await database.get_client().admin.command('ping')
         return {
             "status": "healthy",
             "database": "connected",
@@ -66,6 +97,22 @@ async def health_check():
             "error": str(e)
         }
 
+# Connection pool statistics
+@app.get("/api/health/db-pool")
+async def db_pool_stats():
+    """Live MongoDB connection pool statistics"""
+    return {
+        "success": True,
+        "pool": database.get_pool_stats(),
+        "session_write_buffer": session_write_buffer.stats()
+    }
+
+# Prometheus metrics
+@app.get("/api/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    """Request, analyze stage, PDF, upload and MongoDB metrics in the Prometheus text format"""
+    return PlainTextResponse(metrics.render(), media_type=PROMETHEUS_CONTENT_TYPE)
+
 # Root endpoint
 @app.get("/api/")
 async def root():
@@ -80,7 +127,11 @@ async def root():
             "referrals": "/api/referrals",
             "reports": "/api/reports",
             "pdf": "/api/pdf/report/{session_id}",
-            "health": "/api/health"
+            "analytics": "/api/analytics/summary",
+            "export": "/api/export/sessions",
+            "health": "/api/health",
+            "db_pool": "/api/health/db-pool",
+            "metrics": "/api/metrics"
         }
     }
 
@@ -90,9 +141,13 @@ async def startup_event():
     """Initialize application on startup"""
     logger.info("Starting TB Pre-Screening Platform API...")
     
+    # Create the shared connection pool used by all routers
+    client = database.connect()
+    db = database.get_database()
+    
     # Test database connection
     try:
-        await db.admin.command('ping')
+        await client.admin.command('ping')
         logger.info("Database connection established")
     except Exception as e:
         logger.error(f"Database connection failed: {e}")
@@ -101,12 +156,41 @@ async def startup_event():
     try:
         await db.screening_sessions.create_index("id", unique=True)
         await db.screening_sessions.create_index("created_at")
-        await db.saved_reports.create_index("session_id")
+        await SavedReportRepository(db).ensure_indexes()
         await db.uploaded_files.create_index("uploaded_at")
+        await db.uploaded_files.create_index("blob_key")
+        await ScreeningRollupRepository(db).ensure_indexes()
         logger.info("Database indexes created")
     except Exception as e:
         logger.warning(f"Index creation failed: {e}")
     
+    if not os.environ.get("REPORT_HISTORY_SECRET"):
+        logger.warning("REPORT_HISTORY_SECRET is not set: reports saved without a user_key "
+                       "are not listed in any history")
+    
+    # Write-behind session persistence (SESSION_WRITE_BEHIND); replays any
+    # sessions spilled to disk by workers that are no longer running and
+    # counts written sessions in screening_rollups
+    if session_write_buffer.enabled:
+        await session_write_buffer.start(db.screening_sessions, ScreeningRollupRepository(db).record)
+        logger.info("Session write-behind buffer started")
+    
+    # Referral centers: 2dsphere index, seed built-in centers on first start,
+    # and refresh the in-memory fallback from the shared collection, now and
+    # every REFERRAL_RELOAD_SECONDS
+    global referral_reload_task
+    repository = ReferralCenterRepository(db, referral_service)
+    try:
+        await repository.ensure_indexes()
+        await repository.seed_if_empty(referral_service.referral_centers)
+        if await repository.refresh_fallback():
+            analysis_cache.clear()  # memoized results embed referrals
+        logger.info(f"Loaded {len(referral_service.referral_centers)} referral centers")
+    except Exception as e:
+        logger.warning(f"Referral center setup failed, using built-in centers: {e}")
+    if REFERRAL_RELOAD_SECONDS > 0:
+        referral_reload_task = asyncio.create_task(reload_referral_centers(repository))
+    
     logger.info("TB Pre-Screening Platform API started successfully")
 
 # Shutdown event
@@ -114,7 +198,11 @@ async def startup_event():
 async def shutdown_event():
     """Cleanup on application shutdown"""
     logger.info("Shutting down TB Pre-Screening Platform API...")
-    client.close()
+    if referral_reload_task is not None:
+        referral_reload_task.cancel()
+    render_pool.shutdown()
+    await session_write_buffer.drain()
+    database.close()
     logger.info("Database connection closed")
 
 if __name__ == "__main__":
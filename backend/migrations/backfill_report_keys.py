@@ -0,0 +1,92 @@
+"""
+Give saved reports without a user_key the history key of their user.
+
+Reports saved before histories were keyed, or while no REPORT_HISTORY_SECRET
+was configured, have no user_key and are not listed in any history. This sets
+user_key to the key the server derives from the report's contact number
+(see repositories.saved_reports.user_key_for); reports without a contact
+number are left as they are. Needs REPORT_HISTORY_SECRET. Safe to re-run:
+keyed reports no longer match.
+
+    cd backend && python -m migrations.backfill_report_keys [--batch-size N] [--dry-run]
+"""
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import UpdateOne
+from pathlib import Path
+from typing import Dict, List, Optional
+from dotenv import load_dotenv
+from models.screening import UserInfo
+from repositories.saved_reports import SavedReportRepository, user_key_for
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import database
+
+logger = logging.getLogger(__name__)
+
+UNKEYED_QUERY = {"user_key": None}
+
+
+async def _flush(collection, operations: List[UpdateOne]) -> int:
+    if not operations:
+        return 0
+    result = await collection.bulk_write(operations, ordered=False)
+    operations.clear()
+    return result.modified_count
+
+
+async def backfill_report_keys(db: AsyncIOMotorDatabase, secret: Optional[str] = None,
+                               batch_size: int = 100) -> Dict[str, int]:
+    """
+    Set user_key on unkeyed saved reports that have a contact number
+    """
+    collection = db[SavedReportRepository.COLLECTION]
+    counts = {"reports": 0, "skipped": 0}
+    operations: List[UpdateOne] = []
+
+    cursor = collection.find(UNKEYED_QUERY, {"_id": 1, "user_info": 1})
+    async for document in cursor.batch_size(batch_size):
+        try:
+            user_key = user_key_for(UserInfo(**(document.get("user_info") or {})), secret)
+        except ValueError as e:
+            logger.warning(f"Skipping saved report {document['_id']}: {e}")
+            user_key = None
+        if not user_key:
+            counts["skipped"] += 1
+            continue
+
+        operations.append(UpdateOne({"_id": document["_id"]}, {"$set": {"user_key": user_key}}))
+        if len(operations) >= batch_size:
+            counts["reports"] += await _flush(collection, operations)
+    counts["reports"] += await _flush(collection, operations)
+    return counts
+
+
+async def run(batch_size: int = 100, dry_run: bool = False) -> Dict[str, int]:
+    db = database.get_database()
+    try:
+        if dry_run:
+            return {"pending": await db[SavedReportRepository.COLLECTION].count_documents(UNKEYED_QUERY)}
+        return await backfill_report_keys(db, batch_size=batch_size)
+    finally:
+        database.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--dry-run", action="store_true", help="only count reports without a user_key")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    load_dotenv(Path(__file__).resolve().parent.parent / '.env')
+    if not args.dry_run and not os.environ.get("REPORT_HISTORY_SECRET"):
+        sys.exit("REPORT_HISTORY_SECRET is not set; history keys cannot be derived")
+
+    logger.info(f"saved_reports: {asyncio.run(run(args.batch_size, args.dry_run))}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+Move inline base64 uploads out of MongoDB documents into the blob store.
+
+screening_sessions.uploads[].content_base64 is stored as a blob and replaced by
+a file_id/blob_key reference (with a new uploaded_files record); legacy
+uploaded_files documents with content_base64 get a blob_key and lose the
+inline copy. Safe to re-run: migrated documents no longer match.
+
+    cd backend && python -m migrations.externalize_uploads [--batch-size N] [--dry-run]
+"""
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import UpdateOne
+from pathlib import Path
+from typing import Dict, List
+from dotenv import load_dotenv
+from models.screening import FileUpload
+from repositories.uploaded_files import UploadedFileRepository, UploadReferenceError
+from services.blob_store import BlobStore, blob_store_from_env
+import argparse
+import asyncio
+import base64
+import binascii
+import logging
+import database
+
+logger = logging.getLogger(__name__)
+
+INLINE_SESSION_QUERY = {"uploads.content_base64": {"$type": "string"}}
+INLINE_FILE_QUERY = {"content_base64": {"$type": "string"}}
+
+
+async def _flush(collection, operations: List[UpdateOne]) -> int:
+    if not operations:
+        return 0
+    result = await collection.bulk_write(operations, ordered=False)
+    operations.clear()
+    return result.modified_count
+
+
+async def migrate_sessions(db: AsyncIOMotorDatabase, blob_store: BlobStore,
+                           batch_size: int = 100) -> Dict[str, int]:
+    """
+    Replace inline uploads in screening_sessions with references
+    """
+    repository = UploadedFileRepository(db, blob_store)
+    counts = {"sessions": 0, "uploads": 0, "failed": 0}
+    operations: List[UpdateOne] = []
+
+    cursor = db.screening_sessions.find(INLINE_SESSION_QUERY, {"_id": 1, "id": 1, "uploads": 1})
+    async for document in cursor.batch_size(batch_size):
+        try:
+            uploads = []
+            for raw in document["uploads"]:
+                upload = FileUpload(**raw)
+                if upload.content_base64:
+                    upload = await repository.store_inline(upload)
+                    counts["uploads"] += 1
+                uploads.append(upload.dict(exclude={"content_base64"}))
+        except UploadReferenceError as e:
+            logger.warning(f"Skipping session {document.get('id')}: {e}")
+            counts["failed"] += 1
+            continue
+
+        operations.append(UpdateOne({"_id": document["_id"]}, {"$set": {"uploads": uploads}}))
+        if len(operations) >= batch_size:
+            counts["sessions"] += await _flush(db.screening_sessions, operations)
+    counts["sessions"] += await _flush(db.screening_sessions, operations)
+    return counts
+
+
+async def migrate_uploaded_files(db: AsyncIOMotorDatabase, blob_store: BlobStore,
+                                 batch_size: int = 100) -> Dict[str, int]:
+    """
+    Move content_base64 of legacy uploaded_files documents into the blob store
+    """
+    counts = {"files": 0, "failed": 0}
+    operations: List[UpdateOne] = []
+
+    cursor = db.uploaded_files.find(INLINE_FILE_QUERY, {"_id": 1, "content_base64": 1, "content_type": 1})
+    async for document in cursor.batch_size(batch_size):
+        try:
+            content = base64.b64decode(document["content_base64"], validate=True)
+        except (binascii.Error, ValueError):
+            logger.warning(f"Skipping uploaded file {document['_id']}: invalid base64")
+            counts["failed"] += 1
+            continue
+
+        blob_key = await blob_store.put(content, document.get("content_type"))
+        operations.append(UpdateOne({"_id": document["_id"]}, {
+            "$set": {"blob_key": blob_key, "blob_store": blob_store.kind, "size": len(content)},
+            "$unset": {"content_base64": ""}
+        }))
+        if len(operations) >= batch_size:
+            counts["files"] += await _flush(db.uploaded_files, operations)
+    counts["files"] += await _flush(db.uploaded_files, operations)
+    return counts
+
+
+async def run(batch_size: int = 100, dry_run: bool = False) -> Dict[str, Dict[str, int]]:
+    db = database.get_database()
+    try:
+        if dry_run:
+            return {
+                "sessions": {"pending": await db.screening_sessions.count_documents(INLINE_SESSION_QUERY)},
+                "uploaded_files": {"pending": await db.uploaded_files.count_documents(INLINE_FILE_QUERY)}
+            }
+        blob_store = blob_store_from_env(db)
+        return {
+            "sessions": await migrate_sessions(db, blob_store, batch_size),
+            "uploaded_files": await migrate_uploaded_files(db, blob_store, batch_size)
+        }
+    finally:
+        database.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--dry-run", action="store_true", help="only count documents to migrate")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    load_dotenv(Path(__file__).resolve().parent.parent / '.env')
+
+    results = asyncio.run(run(args.batch_size, args.dry_run))
+    for collection, counts in results.items():
+        logger.info(f"{collection}: {counts}")
+
+
+if __name__ == "__main__":
+    main()
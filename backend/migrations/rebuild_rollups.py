@@ -0,0 +1,46 @@
+"""
+Rebuild screening_rollups from the full screening_sessions history.
+
+Counts every analyzed session by day, location bucket, risk level and
+urgency in a server-side aggregation into a staging collection, then swaps
+it in for the rollup collection with one rename. Run it once after
+deploying rollups, and again whenever rollups may have drifted; pause
+session ingestion while it runs.
+
+    cd backend && python -m migrations.rebuild_rollups
+"""
+from pathlib import Path
+from typing import Dict
+from dotenv import load_dotenv
+from repositories.screening_rollups import ScreeningRollupRepository
+import argparse
+import asyncio
+import logging
+import database
+
+logger = logging.getLogger(__name__)
+
+
+async def run() -> Dict[str, int]:
+    db = database.get_database()
+    try:
+        repository = ScreeningRollupRepository(db)
+        await repository.ensure_indexes()
+        return await repository.rebuild()
+    finally:
+        database.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    load_dotenv(Path(__file__).resolve().parent.parent / '.env')
+
+    counts = asyncio.run(run())
+    logger.info(f"screening_rollups: {counts}")
+
+
+if __name__ == "__main__":
+    main()
@@ -32,9 +32,12 @@ class DeepQuestions(BaseModel):
 
 class FileUpload(BaseModel):
     type: str
-    filename: str
-    content_base64: str
+    filename: Optional[str] = None
+    content_base64: Optional[str] = None  # inline upload; stored and dropped on save
     size: Optional[int] = None
+    file_id: Optional[str] = None  # reference to a file from /api/upload
+    blob_key: Optional[str] = None
+    content_type: Optional[str] = None
 
 class ScreeningRequest(BaseModel):
     user: UserInfo
@@ -44,6 +47,13 @@ class ScreeningRequest(BaseModel):
     local_score: int
     session_id: Optional[str] = None
 
+class ScoreBatchItem(BaseModel):
+    symptoms: Symptoms
+    deep_questions: DeepQuestions = Field(default_factory=DeepQuestions)
+
+class ScoreBatchRequest(BaseModel):
+    items: List[ScoreBatchItem]
+
 class Referral(BaseModel):
     id: str
     name: str
@@ -54,6 +64,16 @@ class Referral(BaseModel):
     lng: float
     distance: Optional[str] = None
 
+class ReferralQuery(BaseModel):
+    lat: Optional[float] = None
+    lng: Optional[float] = None
+    urgency: Optional[str] = None
+
+class ReferralBatchRequest(BaseModel):
+    queries: List[ReferralQuery]
+    radius: float = 50.0
+    max_results: int = 5
+
 class AnalysisResult(BaseModel):
     likelihood: str  # High, Moderate, Low, Confirmed
     confidence_percent: int
@@ -77,9 +97,24 @@ class ScreeningSession(BaseModel):
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
     
+class SessionSummary(BaseModel):
+    # The parts of a session the result page and PDF report read
+    id: str
+    user_info: UserInfo
+    analysis_result: Optional[AnalysisResult] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+class BulkPDFRequest(BaseModel):
+    session_ids: Optional[List[str]] = None
+    start_date: Optional[datetime] = None
+    end_date: Optional[datetime] = None
+    location: Optional[str] = None
+
 class SavedReport(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     session_id: str
+    user_key: Optional[str] = None  # whose history lists the report
     user_info: UserInfo
     analysis_result: AnalysisResult
     saved_at: datetime = Field(default_factory=datetime.utcnow)
\ No newline at end of file
@@ -0,0 +1,167 @@
+from typing import Dict, List, Optional
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ASCENDING, GEOSPHERE, ReplaceOne
+from models.screening import Referral
+from services.referrals import ReferralService
+from services.spatial_index import haversine_km
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class ReferralCenterRepository:
+    """
+    Referral centers stored in MongoDB as GeoJSON points and answered with
+    $geoNear aggregations, falling back to the in-memory ReferralService when
+    no location is given or the database is unavailable
+    """
+
+    COLLECTION = "referral_centers"
+
+    # After a failed query, serve from memory for this long before retrying Mongo
+    FALLBACK_BACKOFF_SECONDS = 30.0
+    _retry_after = 0.0
+
+    # Give up on Mongo quickly (server selection included) so an outage
+    # costs one short wait before the fallback, not the driver's 30s
+    QUERY_TIMEOUT_SECONDS = 1.0
+
+    def __init__(self, db: AsyncIOMotorDatabase, fallback: ReferralService):
+        self.collection = db[self.COLLECTION]
+        self.fallback = fallback
+
+    async def ensure_indexes(self) -> None:
+        """
+        Create the 2dsphere index used by $geoNear and a unique center id index
+        """
+        await self.collection.create_index([("location", GEOSPHERE)])
+        await self.collection.create_index([("id", ASCENDING)], unique=True)
+
+    async def seed(self, centers: List[Referral]) -> int:
+        """
+        Upsert centers by id in one bulk write
+        """
+        if not centers:
+            return 0
+        result = await self.collection.bulk_write(
+            [ReplaceOne({"id": c.id}, self._to_document(c), upsert=True) for c in centers],
+            ordered=False
+        )
+        return result.upserted_count + result.modified_count
+
+    async def seed_if_empty(self, centers: List[Referral]) -> int:
+        """
+        Seed the collection from built-in data on first start
+        """
+        if await self.collection.estimated_document_count() > 0:
+            return 0
+        count = await self.seed(centers)
+        logger.info(f"Seeded {count} referral centers")
+        return count
+
+    async def load_all(self) -> List[Referral]:
+        """
+        Load every center, e.g. to refresh the in-memory fallback
+        """
+        documents = await self.collection.find({}, {"_id": 0}).sort("id", ASCENDING).to_list(length=None)
+        return [self._from_document(doc) for doc in documents]
+
+    async def refresh_fallback(self) -> bool:
+        """
+        Reload the in-memory fallback from the collection if the centers
+        changed; True when it was reloaded
+        """
+        centers = await self.load_all()
+        if not centers or centers == self.fallback.referral_centers:
+            return False
+        self.fallback.reload(centers)
+        return True
+
+    async def get_nearby_centers(self, user_lat: Optional[float] = None,
+                                 user_lng: Optional[float] = None,
+                                 radius_km: float = 50.0,
+                                 max_results: int = 5) -> List[Referral]:
+        """
+        Get nearby TB centers based on user location
+        """
+        if user_lat is None or user_lng is None or not self._mongo_available():
+            return self.fallback.get_nearby_centers(user_lat, user_lng, radius_km, max_results)
+
+        pipeline = [
+            self._geo_near_stage(user_lat, user_lng, radius_km),
+            {"$limit": max_results},
+            {"$project": {"_id": 0}}
+        ]
+        try:
+            documents = await self._aggregate(pipeline, max_results)
+        except Exception as e:
+            logger.warning(f"$geoNear referral lookup failed, using in-memory centers: {e}")
+            self._mark_unavailable()
+            return self.fallback.get_nearby_centers(user_lat, user_lng, radius_km, max_results)
+
+        return [self._from_document(doc, user_lat, user_lng) for doc in documents]
+
+    async def get_priority_centers_by_urgency(self, urgency: str, user_lat: Optional[float] = None,
+                                              user_lng: Optional[float] = None) -> List[Referral]:
+        """
+        Get prioritized centers based on urgency level, ranked server-side
+        """
+        if user_lat is None or user_lng is None or not self._mongo_available():
+            return self.fallback.get_priority_centers_by_urgency(urgency, user_lat, user_lng)
+
+        priority_types = ReferralService.URGENCY_PRIORITY_TYPES.get(urgency, [])
+        pipeline = [
+            self._geo_near_stage(user_lat, user_lng, 50.0),
+            {"$limit": 10},
+            # Preferred center types first, nearest first within each group
+            {"$addFields": {"_priority": {"$cond": [{"$in": ["$type", priority_types]}, 0, 1]}}},
+            {"$sort": {"_priority": 1, "_distance_m": 1, "id": 1}},
+            {"$limit": 5},
+            {"$project": {"_id": 0, "_priority": 0}}
+        ]
+        try:
+            documents = await self._aggregate(pipeline, 5)
+        except Exception as e:
+            logger.warning(f"$geoNear referral lookup failed, using in-memory centers: {e}")
+            self._mark_unavailable()
+            return self.fallback.get_priority_centers_by_urgency(urgency, user_lat, user_lng)
+
+        return [self._from_document(doc, user_lat, user_lng) for doc in documents]
+
+    async def _aggregate(self, pipeline: List[Dict], length: int) -> List[Dict]:
+        timeout = self.QUERY_TIMEOUT_SECONDS
+        cursor = self.collection.aggregate(pipeline, maxTimeMS=int(timeout * 1000))
+        return await asyncio.wait_for(cursor.to_list(length=length), timeout)
+
+    def _mongo_available(self) -> bool:
+        return time.monotonic() >= ReferralCenterRepository._retry_after
+
+    def _mark_unavailable(self) -> None:
+        ReferralCenterRepository._retry_after = time.monotonic() + self.FALLBACK_BACKOFF_SECONDS
+
+    def _geo_near_stage(self, user_lat: float, user_lng: float, radius_km: float) -> Dict:
+        return {
+            "$geoNear": {
+                "near": {"type": "Point", "coordinates": [user_lng, user_lat]},
+                "distanceField": "_distance_m",
+                "maxDistance": radius_km * 1000,
+                "spherical": True
+            }
+        }
+
+    def _to_document(self, center: Referral) -> Dict:
+        document = center.dict(exclude={"distance", "lat", "lng"})
+        document["location"] = {"type": "Point", "coordinates": [center.lng, center.lat]}
+        return document
+
+    def _from_document(self, document: Dict, user_lat: Optional[float] = None,
+                       user_lng: Optional[float] = None) -> Referral:
+        document = dict(document)
+        lng, lat = document.pop("location")["coordinates"]
+        document.pop("_distance_m", None)
+        if user_lat is not None and user_lng is not None:
+            # Same haversine as the in-memory path so distances read identically
+            document["distance"] = f"{haversine_km(user_lat, user_lng, lat, lng):.1f} km"
+        return Referral(lat=lat, lng=lng, **document)
@@ -0,0 +1,118 @@
+from typing import Any, Dict, List, Optional, Tuple
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ASCENDING, DESCENDING
+from bson import ObjectId
+from bson.errors import InvalidId
+from models.screening import SavedReport, UserInfo
+from datetime import datetime
+import base64
+import binascii
+import hashlib
+import hmac
+import json
+import os
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+class InvalidCursorError(ValueError):
+    """
+    Raised for a history cursor that was not issued by list_for_user
+    """
+
+
+def user_key_for(user_info: UserInfo, secret: Optional[str] = None) -> Optional[str]:
+    """
+    Default history key of a user: an HMAC-SHA256 of their contact number
+    (digits only) keyed by secret (default: REPORT_HISTORY_SECRET), so a
+    history cannot be found from a phone number without the server's secret.
+    None without a contact number or a secret.
+    """
+    secret = secret if secret is not None else os.environ.get("REPORT_HISTORY_SECRET", "")
+    digits = "".join(ch for ch in (user_info.contact or "") if ch.isdigit())
+    if not digits or not secret:
+        return None
+    return hmac.new(secret.encode(), digits.encode(), hashlib.sha256).hexdigest()
+
+
+class SavedReportRepository:
+    """
+    Saved reports in saved_reports, listed per user newest first with keyset
+    pagination on (user_key, saved_at, _id): a page continues strictly after
+    the last (saved_at, _id) seen, so every page is one index range scan no
+    matter how far into the history it is.
+    """
+
+    COLLECTION = "saved_reports"
+
+    # Fields of a history entry; full reports stay in the collection
+    SUMMARY_PROJECTION = {
+        "_id": 1,
+        "id": 1,
+        "session_id": 1,
+        "saved_at": 1,
+        "analysis_result.likelihood": 1,
+        "analysis_result.urgency": 1,
+        "analysis_result.risk_score": 1,
+        "analysis_result.confidence_percent": 1
+    }
+
+    def __init__(self, db: AsyncIOMotorDatabase):
+        self.collection = db[self.COLLECTION]
+
+    async def ensure_indexes(self) -> None:
+        """
+        Compound index matching the history sort, plus session lookups
+        """
+        await self.collection.create_index(
+            [("user_key", ASCENDING), ("saved_at", DESCENDING), ("_id", DESCENDING)]
+        )
+        await self.collection.create_index("session_id")
+
+    async def insert(self, report: SavedReport) -> None:
+        await self.collection.insert_one(report.dict())
+
+    @staticmethod
+    def encode_cursor(saved_at: datetime, object_id: ObjectId) -> str:
+        position = json.dumps([saved_at.isoformat(), str(object_id)], separators=(",", ":"))
+        return base64.urlsafe_b64encode(position.encode()).decode().rstrip("=")
+
+    @staticmethod
+    def decode_cursor(cursor: str) -> Tuple[datetime, ObjectId]:
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            saved_at, object_id = json.loads(base64.urlsafe_b64decode(padded))
+            return datetime.fromisoformat(saved_at), ObjectId(object_id)
+        except (binascii.Error, ValueError, TypeError, InvalidId):
+            raise InvalidCursorError("Invalid cursor")
+
+    async def list_for_user(self, user_key: str, limit: int = DEFAULT_PAGE_SIZE,
+                            cursor: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        One page of a user's report summaries, newest first, and the cursor
+        of the next page (None on the last page)
+        """
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        query: Dict[str, Any] = {"user_key": user_key}
+        if cursor:
+            saved_at, object_id = self.decode_cursor(cursor)
+            query["$or"] = [
+                {"saved_at": {"$lt": saved_at}},
+                {"saved_at": saved_at, "_id": {"$lt": object_id}}
+            ]
+
+        # One extra document tells whether another page follows
+        documents = await (
+            self.collection.find(query, self.SUMMARY_PROJECTION)
+            .sort([("saved_at", DESCENDING), ("_id", DESCENDING)])
+            .limit(limit + 1)
+            .to_list(length=limit + 1)
+        )
+        next_cursor = None
+        if len(documents) > limit:
+            documents = documents[:limit]
+            next_cursor = self.encode_cursor(documents[-1]["saved_at"], documents[-1]["_id"])
+        for document in documents:
+            del document["_id"]
+        return documents, next_cursor
@@ -0,0 +1,241 @@
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ASCENDING, UpdateOne
+from collections import Counter
+from datetime import datetime
+import logging
+
+logger = logging.getLogger(__name__)
+
+LIKELIHOODS = ["Low", "Moderate", "High", "Confirmed"]
+URGENCIES = ["Immediate", "TestSoon", "Monitor"]
+UNKNOWN_LOCATION = "unknown"
+
+RollupKey = Tuple[str, str, str]  # (day, location bucket, likelihood)
+
+
+def location_bucket(location: Optional[str]) -> str:
+    """
+    Rollup bucket for a free-text user location (case and spacing folded)
+    """
+    bucket = " ".join((location or "").split()).lower()
+    return bucket or UNKNOWN_LOCATION
+
+
+def rollup_key(session: Dict[str, Any]) -> Optional[Tuple[RollupKey, str]]:
+    """
+    (day, location bucket, likelihood) and urgency of a session document, or
+    None when it has no analysis result
+    """
+    result = session.get("analysis_result") or {}
+    if not result.get("likelihood"):
+        return None
+    created_at = session.get("created_at") or datetime.utcnow()
+    day = created_at.date().isoformat() if isinstance(created_at, datetime) else str(created_at)[:10]
+    location = location_bucket((session.get("user_info") or {}).get("location"))
+    return (day, location, result["likelihood"]), result.get("urgency") or "Unknown"
+
+
+class ScreeningRollupRepository:
+    """
+    Per day, location bucket and risk level screening counts in
+    screening_rollups, kept current with $inc upserts as sessions are saved,
+    so analytics never scan screening_sessions.
+
+    A rollup document counts every session of its key in "count" and by
+    urgency level in "urgency.<level>".
+    """
+
+    COLLECTION = "screening_rollups"
+    STAGING_COLLECTION = "screening_rollups_rebuild"
+
+    def __init__(self, db: AsyncIOMotorDatabase, collection: str = COLLECTION):
+        self.db = db
+        self.collection = db[collection]
+
+    async def ensure_indexes(self) -> None:
+        """
+        Index the day range scans of summary and timeseries (optionally per location)
+        """
+        await self.collection.create_index([("day", ASCENDING), ("location", ASCENDING)])
+        await self.collection.create_index([("location", ASCENDING), ("day", ASCENDING)])
+
+    @staticmethod
+    def _count(sessions: Iterable[Dict[str, Any]]) -> Dict[RollupKey, Counter]:
+        counts: Dict[RollupKey, Counter] = {}
+        for session in sessions:
+            keyed = rollup_key(session)
+            if keyed is None:
+                continue
+            key, urgency = keyed
+            counts.setdefault(key, Counter())[urgency] += 1
+        return counts
+
+    @staticmethod
+    def _document_id(key: RollupKey) -> str:
+        return "|".join(key)
+
+    async def record(self, sessions: Iterable[Dict[str, Any]]) -> int:
+        """
+        Add newly stored sessions to their rollups; sessions sharing a key are
+        folded into one $inc, and all keys go in one bulk write
+        """
+        counts = self._count(sessions)
+        if not counts:
+            return 0
+        now = datetime.utcnow()
+        operations = [
+            UpdateOne(
+                {"_id": self._document_id(key)},
+                {
+                    "$inc": {"count": sum(urgencies.values()),
+                             **{f"urgency.{urgency}": n for urgency, n in urgencies.items()}},
+                    "$setOnInsert": {"day": key[0], "location": key[1], "likelihood": key[2]},
+                    "$set": {"updated_at": now}
+                },
+                upsert=True
+            )
+            for key, urgencies in counts.items()
+        ]
+        await self.collection.bulk_write(operations, ordered=False)
+        return len(operations)
+
+    async def rebuild(self) -> Dict[str, int]:
+        """
+        Recompute every rollup from screening_sessions (backfill). Mongo
+        groups the sessions and writes the rollups with $out to a staging
+        collection, which is then renamed over screening_rollups in one step,
+        so readers see either the old rollups or the new ones. Sessions saved
+        while it runs may be missed; run it while no sessions are being saved.
+        """
+        sessions = self.db.screening_sessions
+        match = {"analysis_result.likelihood": {"$nin": [None, ""]}}
+
+        # Whitespace folding has no aggregation operator; the distinct raw
+        # locations are few, so they are bucketed here and looked up in Mongo
+        buckets = [{"raw": location, "bucket": location_bucket(location)}
+                   for location in await sessions.distinct("user_info.location", match)
+                   if isinstance(location, str)]
+
+        staging = self.db[self.STAGING_COLLECTION]
+        await staging.drop()
+        # $out keeps the indexes of the collection it replaces
+        await ScreeningRollupRepository(self.db, self.STAGING_COLLECTION).ensure_indexes()
+        now = datetime.utcnow()
+        await sessions.aggregate([
+            {"$match": match},
+            {"$group": {
+                "_id": {
+                    "day": {"$dateToString": {"format": "%Y-%m-%d", "date": {"$ifNull": ["$created_at", now]}}},
+                    "location": {"$ifNull": ["$user_info.location", ""]},
+                    "likelihood": "$analysis_result.likelihood",
+                    "urgency": {"$cond": [{"$eq": [{"$ifNull": ["$analysis_result.urgency", ""]}, ""]},
+                                          "Unknown", "$analysis_result.urgency"]}
+                },
+                "count": {"$sum": 1}
+            }},
+            {"$group": {
+                "_id": {
+                    "day": "$_id.day",
+                    "location": {"$let": {
+                        # The first matching entry, else the trailing unknown one
+                        "vars": {"found": {"$arrayElemAt": [{"$concatArrays": [
+                            {"$filter": {"input": {"$literal": buckets}, "as": "entry",
+                                         "cond": {"$eq": ["$$entry.raw", "$_id.location"]}}},
+                            {"$literal": [{"bucket": UNKNOWN_LOCATION}]}
+                        ]}, 0]}},
+                        "in": "$$found.bucket"
+                    }},
+                    "likelihood": "$_id.likelihood",
+                    "urgency": "$_id.urgency"
+                },
+                "count": {"$sum": "$count"}
+            }},
+            {"$group": {
+                "_id": {"day": "$_id.day", "location": "$_id.location", "likelihood": "$_id.likelihood"},
+                "count": {"$sum": "$count"},
+                "urgency": {"$push": {"k": "$_id.urgency", "v": "$count"}}
+            }},
+            {"$project": {
+                "_id": {"$concat": ["$_id.day", "|", "$_id.location", "|", "$_id.likelihood"]},
+                "day": "$_id.day", "location": "$_id.location", "likelihood": "$_id.likelihood",
+                "count": 1, "urgency": {"$arrayToObject": "$urgency"}, "updated_at": {"$literal": now}
+            }},
+            {"$out": self.STAGING_COLLECTION}
+        ], allowDiskUse=True).to_list(None)
+
+        totals = await staging.aggregate([
+            {"$group": {"_id": None, "sessions": {"$sum": "$count"}, "rollups": {"$sum": 1}}}
+        ]).to_list(None)
+        await staging.rename(self.COLLECTION, dropTarget=True)
+        await self.ensure_indexes()
+        if not totals:
+            return {"sessions": 0, "rollups": 0}
+        return {"sessions": totals[0]["sessions"], "rollups": totals[0]["rollups"]}
+
+    def _find(self, start_day: Optional[str], end_day: Optional[str], location: Optional[str]):
+        query: Dict[str, Any] = {}
+        if start_day or end_day:
+            query["day"] = {}
+            if start_day:
+                query["day"]["$gte"] = start_day
+            if end_day:
+                query["day"]["$lte"] = end_day
+        if location:
+            query["location"] = location_bucket(location)
+        return self.collection.find(query, {"_id": 0, "updated_at": 0})
+
+    async def summary(self, start_day: Optional[str] = None, end_day: Optional[str] = None,
+                      location: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Totals by risk level and urgency, overall and per location bucket,
+        for days in [start_day, end_day] (ISO dates)
+        """
+        likelihoods, urgencies = Counter(), Counter()
+        locations: Dict[str, Dict[str, Counter]] = {}
+        async for rollup in self._find(start_day, end_day, location):
+            likelihoods[rollup["likelihood"]] += rollup["count"]
+            urgencies.update(rollup.get("urgency") or {})
+            per_location = locations.setdefault(rollup["location"], {"likelihood": Counter(), "urgency": Counter()})
+            per_location["likelihood"][rollup["likelihood"]] += rollup["count"]
+            per_location["urgency"].update(rollup.get("urgency") or {})
+
+        return {
+            "total": sum(likelihoods.values()),
+            "likelihood": self._levels(likelihoods, LIKELIHOODS),
+            "urgency": self._levels(urgencies, URGENCIES),
+            "locations": {
+                name: {
+                    "total": sum(counts["likelihood"].values()),
+                    "likelihood": self._levels(counts["likelihood"], LIKELIHOODS),
+                    "urgency": self._levels(counts["urgency"], URGENCIES)
+                }
+                for name, counts in sorted(locations.items())
+            }
+        }
+
+    async def timeseries(self, start_day: Optional[str] = None, end_day: Optional[str] = None,
+                         location: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Per day counts by risk level and urgency, oldest day first
+        """
+        days: Dict[str, Dict[str, Counter]] = {}
+        async for rollup in self._find(start_day, end_day, location):
+            day = days.setdefault(rollup["day"], {"likelihood": Counter(), "urgency": Counter()})
+            day["likelihood"][rollup["likelihood"]] += rollup["count"]
+            day["urgency"].update(rollup.get("urgency") or {})
+
+        return [
+            {
+                "day": day,
+                "total": sum(counts["likelihood"].values()),
+                "likelihood": self._levels(counts["likelihood"], LIKELIHOODS),
+                "urgency": self._levels(counts["urgency"], URGENCIES)
+            }
+            for day, counts in sorted(days.items())
+        ]
+
+    @staticmethod
+    def _levels(counts: Counter, levels: List[str]) -> Dict[str, int]:
+        # Every known level is listed, zero or not; unexpected ones are kept too
+        return {**{level: counts.get(level, 0) for level in levels}, **counts}
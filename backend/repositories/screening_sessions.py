@@ -0,0 +1,123 @@
+from typing import Any, Dict, Iterable, List, Optional
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from models.screening import ScreeningSession, SessionSummary
+from services.session_writer import SessionWriteBuffer, session_write_buffer
+
+_MISSING = object()
+
+
+class ScreeningSessionRepository:
+    """
+    Projection-aware reads of screening_sessions, so callers only pull the
+    fields they use (uploads and answers stay on the server otherwise)
+    """
+
+    COLLECTION = "screening_sessions"
+
+    # Top-level fields a caller may request
+    FIELDS = frozenset(ScreeningSession.model_fields)
+    SUMMARY_FIELDS = tuple(SessionSummary.model_fields)
+
+    def __init__(self, db: AsyncIOMotorDatabase, write_buffer: Optional[SessionWriteBuffer] = None):
+        self.collection = db[self.COLLECTION]
+        self.write_buffer = write_buffer if write_buffer is not None else session_write_buffer
+
+    @classmethod
+    def projection(cls, fields: Optional[Iterable[str]] = None) -> Dict[str, int]:
+        """
+        Mongo projection for the given fields (dotted paths allowed), or the
+        whole document without _id. Raises ValueError on unknown fields.
+        """
+        if fields is None:
+            return {"_id": 0}
+        projection = {"_id": 0, "id": 1}
+        for field in fields:
+            field = field.strip()
+            if not field:
+                continue
+            if field.split(".", 1)[0] not in cls.FIELDS:
+                raise ValueError(f"Unknown session field: {field}")
+            for other in projection:
+                # Mongo refuses a path and one of its subpaths in one projection
+                if other != field and (field.startswith(other + ".") or other.startswith(field + ".")):
+                    raise ValueError(f"Overlapping session fields: {other} and {field}")
+            projection[field] = 1
+        return projection
+
+    @staticmethod
+    def parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+        """
+        Split a comma-separated fields= query parameter
+        """
+        if fields is None:
+            return None
+        return [field for field in (f.strip() for f in fields.split(",")) if field]
+
+    async def get(self, session_id: str, fields: Optional[Iterable[str]] = None) -> Optional[Dict[str, Any]]:
+        projection = self.projection(fields)
+        # A session accepted by the write-behind buffer may not be in Mongo yet
+        pending = self.write_buffer.get(session_id)
+        if pending is not None:
+            return self._apply_projection(pending, projection)
+        return await self.collection.find_one({"id": session_id}, projection)
+
+    @classmethod
+    def _apply_projection(cls, document: Dict[str, Any], projection: Dict[str, int]) -> Dict[str, Any]:
+        fields = [field for field in projection if field != "_id"]
+        if not fields:
+            return {key: value for key, value in document.items() if key != "_id"}
+        tree: Dict[str, Any] = {}
+        for field in fields:
+            *parents, leaf = field.split(".")
+            node = tree
+            for part in parents:
+                node = node.setdefault(part, {})
+            node[leaf] = True
+        return cls._project_document(document, tree)
+
+    @classmethod
+    def _project_document(cls, document: Dict[str, Any], tree: Dict[str, Any]) -> Dict[str, Any]:
+        # Same result as a Mongo inclusion projection: dotted paths reach into
+        # every document of an array, and missing paths are left out
+        projected: Dict[str, Any] = {}
+        for key, subtree in tree.items():
+            if key not in document:
+                continue
+            if subtree is True:
+                projected[key] = document[key]
+                continue
+            value = cls._project_value(document[key], subtree)
+            if value is not _MISSING:
+                projected[key] = value
+        return projected
+
+    @classmethod
+    def _project_value(cls, value: Any, tree: Dict[str, Any]) -> Any:
+        if isinstance(value, dict):
+            return cls._project_document(value, tree)
+        if isinstance(value, list):
+            # Scalars in the array have no subfields and are dropped
+            return [item for item in (cls._project_value(element, tree) for element in value)
+                    if item is not _MISSING]
+        return _MISSING
+
+    async def get_summary(self, session_id: str) -> Optional[SessionSummary]:
+        """
+        Session id, user info, analysis result and timestamps only
+        """
+        document = await self.get(session_id, self.SUMMARY_FIELDS)
+        return SessionSummary(**document) if document else None
+
+    def find_summaries(self, query: Dict[str, Any]):
+        """
+        Cursor of summary documents matching a query
+        """
+        return self.collection.find(query, self.projection(self.SUMMARY_FIELDS))
+
+    def find_for_export(self, query: Dict[str, Any], batch_size: int):
+        """
+        Cursor of whole sessions without uploads, oldest first, fetched
+        batch_size documents per round trip
+        """
+        cursor = self.collection.find(query, {"_id": 0, "uploads": 0})
+        return cursor.sort("created_at", 1).batch_size(batch_size)
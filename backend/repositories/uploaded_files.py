@@ -0,0 +1,176 @@
+from typing import AsyncIterator, Dict, List, Optional
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from bson import ObjectId
+from bson.errors import InvalidId
+from models.screening import FileUpload
+from services.blob_store import DEFAULT_STREAM_CHUNK_SIZE, BlobStore
+from services.upload_ingest import sniff_content_type
+from datetime import datetime
+import asyncio
+import base64
+import binascii
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class UploadReferenceError(Exception):
+    """
+    Raised when an upload references an unknown file_id or carries unusable
+    inline content
+    """
+
+
+def _strip_data_url(encoded: str) -> str:
+    if encoded.startswith("data:") and "," in encoded:
+        return encoded.split(",", 1)[1]  # data URL from the browser
+    return encoded
+
+
+def base64_decoded_size(encoded: str) -> int:
+    """
+    Number of bytes an (unwrapped) base64 string decodes to
+    """
+    return len(encoded) // 4 * 3 - len(encoded[-2:]) + len(encoded[-2:].rstrip("="))
+
+
+async def iter_base64_range(encoded: str, start: int = 0, end: Optional[int] = None,
+                            chunk_size: int = DEFAULT_STREAM_CHUNK_SIZE) -> AsyncIterator[bytes]:
+    """
+    Decode bytes [start, end) of a base64 string a chunk at a time; every 4
+    characters hold 3 bytes, so only the quads covering the range are decoded
+    """
+    total = base64_decoded_size(encoded)
+    end = total if end is None else min(end, total)
+    chunk_size = max(3, chunk_size - chunk_size % 3)
+
+    position = start - start % 3
+    skip = start % 3
+    while position < end:
+        quad = position // 3 * 4
+        chunk = base64.b64decode(encoded[quad:quad + chunk_size // 3 * 4])
+        chunk = chunk[skip:end - position]
+        position += skip + len(chunk)
+        skip = 0
+        yield chunk
+        await asyncio.sleep(0)  # let other requests run between chunks
+
+
+class UploadedFileRepository:
+    """
+    Metadata for uploaded files in uploaded_files; the bytes live in a blob
+    store under their SHA-256 key
+    """
+
+    COLLECTION = "uploaded_files"
+
+    def __init__(self, db: AsyncIOMotorDatabase, blob_store: BlobStore):
+        self.collection = db[self.COLLECTION]
+        self.blob_store = blob_store
+
+    async def create(self, filename: str, file_type: str, content_type: Optional[str],
+                     size: int, blob_key: str) -> str:
+        """
+        Record an uploaded file whose bytes are already stored; returns its file_id
+        """
+        result = await self.collection.insert_one({
+            "filename": filename,
+            "file_type": file_type,
+            "content_type": content_type,
+            "size": size,
+            "blob_key": blob_key,
+            "blob_store": self.blob_store.kind,
+            "uploaded_at": datetime.utcnow()
+        })
+        return str(result.inserted_id)
+
+    async def get(self, file_id: str) -> Optional[Dict]:
+        """
+        Metadata document for a file_id (never includes file contents)
+        """
+        try:
+            object_id = ObjectId(file_id)
+        except (InvalidId, TypeError):
+            return None
+        return await self.collection.find_one({"_id": object_id}, {"content_base64": 0})
+
+    async def get_many(self, file_ids: List[str]) -> Dict[str, Dict]:
+        """
+        Metadata documents for several file_ids in one query, keyed by file_id
+        """
+        object_ids = [ObjectId(file_id) for file_id in file_ids if ObjectId.is_valid(file_id)]
+        if not object_ids:
+            return {}
+        cursor = self.collection.find({"_id": {"$in": object_ids}}, {"content_base64": 0})
+        return {str(doc["_id"]): doc async for doc in cursor}
+
+    async def content_size(self, document: Dict) -> int:
+        """
+        Size in bytes of a file's contents (from its metadata when recorded)
+        """
+        if document.get("size") is not None:
+            return document["size"]
+        return base64_decoded_size(await self._inline_content(document))
+
+    async def open_content(self, document: Dict, start: int = 0, end: Optional[int] = None) -> AsyncIterator[bytes]:
+        """
+        Chunks of bytes [start, end) of a file: streamed from the blob store,
+        or decoded incrementally from a legacy document's inline base64
+        """
+        if document.get("blob_key"):
+            return await self.blob_store.open_reader(document["blob_key"], start, end)
+        return iter_base64_range(await self._inline_content(document), start, end)
+
+    async def _inline_content(self, document: Dict) -> str:
+        # Not migrated by migrations.externalize_uploads yet
+        if "content_base64" not in document:
+            stored = await self.collection.find_one({"_id": document["_id"]}, {"content_base64": 1})
+            document["content_base64"] = (stored or {}).get("content_base64") or ""
+        return _strip_data_url(document["content_base64"])
+
+    async def store_inline(self, upload: FileUpload) -> FileUpload:
+        """
+        Move an inline base64 upload into the blob store and return a reference
+        """
+        encoded = _strip_data_url(upload.content_base64)
+        try:
+            content = base64.b64decode(encoded, validate=True)
+        except (binascii.Error, ValueError):
+            raise UploadReferenceError(f"Invalid base64 content for {upload.filename}")
+
+        content_type = sniff_content_type(content[:16])
+        blob_key = await self.blob_store.put(content, content_type)
+        file_id = await self.create(upload.filename, upload.type, content_type, len(content), blob_key)
+        return self._reference(upload, file_id, {
+            "content_type": content_type, "size": len(content), "blob_key": blob_key
+        })
+
+    async def resolve(self, uploads: List[FileUpload]) -> List[FileUpload]:
+        """
+        Turn a request's uploads into references plus metadata: file_ids are
+        looked up, inline content is stored first
+        """
+        known = await self.get_many([u.file_id for u in uploads if u.file_id])
+
+        resolved = []
+        for upload in uploads:
+            if upload.file_id:
+                document = known.get(upload.file_id)
+                if document is None:
+                    raise UploadReferenceError(f"Unknown file_id: {upload.file_id}")
+                resolved.append(self._reference(upload, upload.file_id, document))
+            elif upload.content_base64:
+                resolved.append(await self.store_inline(upload))
+            else:
+                raise UploadReferenceError(f"Upload {upload.filename} has neither file_id nor content")
+        return resolved
+
+    def _reference(self, upload: FileUpload, file_id: str, metadata: Dict) -> FileUpload:
+        return FileUpload(
+            type=upload.type,
+            filename=upload.filename or metadata.get("filename"),
+            size=metadata.get("size"),
+            file_id=file_id,
+            blob_key=metadata.get("blob_key"),
+            content_type=metadata.get("content_type")
+        )
@@ -0,0 +1,69 @@
+from fastapi import APIRouter, HTTPException, Depends
+from typing import Optional
+from datetime import date
+from repositories.screening_rollups import ScreeningRollupRepository
+from database import get_database
+import logging
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/api", tags=["analytics"])
+
+def _day_range(start: Optional[date], end: Optional[date]):
+    if start and end and start > end:
+        raise HTTPException(status_code=400, detail="start must not be after end")
+    return (start.isoformat() if start else None), (end.isoformat() if end else None)
+
+@router.get("/analytics/summary")
+async def get_analytics_summary(start: Optional[date] = None,
+                                end: Optional[date] = None,
+                                location: Optional[str] = None,
+                                db = Depends(get_database)):
+    """
+    Screening counts by risk level and urgency, overall and per location
+    (read from screening_rollups only)
+    """
+    try:
+        start_day, end_day = _day_range(start, end)
+        summary = await ScreeningRollupRepository(db).summary(start_day, end_day, location)
+        
+        return {
+            "success": True,
+            "start": start_day,
+            "end": end_day,
+            "location": location,
+            **summary
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Failed to get analytics summary: {e}")
+        raise HTTPException(status_code=500, detail=f"Failed to get analytics: {str(e)}")
+
+@router.get("/analytics/timeseries")
+async def get_analytics_timeseries(start: Optional[date] = None,
+                                   end: Optional[date] = None,
+                                   location: Optional[str] = None,
+                                   db = Depends(get_database)):
+    """
+    Daily screening counts by risk level and urgency (read from screening_rollups only)
+    """
+    try:
+        start_day, end_day = _day_range(start, end)
+        days = await ScreeningRollupRepository(db).timeseries(start_day, end_day, location)
+        
+        return {
+            "success": True,
+            "start": start_day,
+            "end": end_day,
+            "location": location,
+            "count": len(days),
+            "days": days
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Failed to get analytics timeseries: {e}")
+        raise HTTPException(status_code=500, detail=f"Failed to get analytics: {str(e)}")
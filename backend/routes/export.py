@@ -0,0 +1,72 @@
+from fastapi import APIRouter, HTTPException, Depends
+from fastapi.responses import StreamingResponse
+from typing import Dict, Optional
+from datetime import datetime
+from repositories.screening_sessions import ScreeningSessionRepository
+from services.session_export import (
+    DEFAULT_EXPORT_BATCH_SIZE, EXPORT_FORMATS, MAX_EXPORT_BATCH_SIZE,
+    ExportFormatUnavailableError, arrow_schema, stream_columnar, stream_ndjson
+)
+from database import get_database
+import logging
+import re
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/api", tags=["export"])
+
+def _export_query(start: Optional[datetime], end: Optional[datetime], location: Optional[str],
+                  likelihood: Optional[str], urgency: Optional[str]) -> Dict:
+    query: Dict = {}
+    if start or end:
+        query["created_at"] = {}
+        if start:
+            query["created_at"]["$gte"] = start
+        if end:
+            query["created_at"]["$lt"] = end
+    if location:
+        query["user_info.location"] = {"$regex": f"^{re.escape(location)}$", "$options": "i"}
+    if likelihood:
+        query["analysis_result.likelihood"] = likelihood
+    if urgency:
+        query["analysis_result.urgency"] = urgency
+    return query
+
+@router.get("/export/sessions")
+async def export_sessions(format: str = "ndjson",
+                          start: Optional[datetime] = None,
+                          end: Optional[datetime] = None,
+                          location: Optional[str] = None,
+                          likelihood: Optional[str] = None,
+                          urgency: Optional[str] = None,
+                          batch_size: int = DEFAULT_EXPORT_BATCH_SIZE,
+                          db = Depends(get_database)):
+    """
+    Stream screening sessions as flat rows (NDJSON, Parquet or Arrow IPC
+    stream), without uploads, oldest first
+    """
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of {', '.join(EXPORT_FORMATS)}")
+    if format != "ndjson":
+        try:
+            arrow_schema()
+        except ExportFormatUnavailableError as e:
+            raise HTTPException(status_code=501, detail=str(e))
+    
+    batch_size = max(1, min(batch_size, MAX_EXPORT_BATCH_SIZE))
+    query = _export_query(start, end, location, likelihood, urgency)
+    cursor = ScreeningSessionRepository(db).find_for_export(query, batch_size)
+    
+    # Rows leave as each cursor batch arrives; only one batch is held
+    if format == "ndjson":
+        chunks = stream_ndjson(cursor, batch_size)
+    else:
+        chunks = stream_columnar(cursor, format, batch_size)
+    
+    media_type, extension = EXPORT_FORMATS[format]
+    filename = f"screening_sessions_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{extension}"
+    return StreamingResponse(
+        chunks,
+        media_type=media_type,
+        headers={"Content-Disposition": f"attachment; filename={filename}"}
+    )
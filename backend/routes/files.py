@@ -0,0 +1,87 @@
+from fastapi import APIRouter, HTTPException, Depends, Header, Response
+from fastapi.responses import StreamingResponse
+from typing import Optional
+from urllib.parse import quote
+from repositories.uploaded_files import UploadedFileRepository
+from routes.screening import get_blob_store
+from services.blob_store import BlobNotFoundError, BlobStore
+from services.http_conditional import etag_matches, parse_range
+from database import get_database
+import logging
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/api", tags=["files"])
+
+# Contents under a file_id never change, so clients may keep them
+FILE_CACHE_CONTROL = "private, max-age=31536000, immutable"
+
+@router.get("/files/{file_id}")
+async def get_uploaded_file(file_id: str,
+                            range_header: Optional[str] = Header(None, alias="Range"),
+                            if_range: Optional[str] = Header(None),
+                            if_none_match: Optional[str] = Header(None),
+                            db = Depends(get_database),
+                            blob_store: BlobStore = Depends(get_blob_store)):
+    """
+    Stream an uploaded file (supports Range requests and ETag revalidation)
+    """
+    try:
+        repository = UploadedFileRepository(db, blob_store)
+        document = await repository.get(file_id)
+        
+        if not document:
+            raise HTTPException(status_code=404, detail="File not found")
+        
+        # Blobs are keyed by content hash; legacy inline files by their id
+        etag = document.get("blob_key") or file_id
+        headers = {
+            "ETag": f'"{etag}"',
+            "Cache-Control": FILE_CACHE_CONTROL,
+            "Accept-Ranges": "bytes"
+        }
+        if etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers=headers)
+        
+        # A Range is only honoured if the client's copy is still current
+        size = await repository.content_size(document)
+        byte_range = None
+        if not if_range or etag_matches(if_range, etag):
+            try:
+                byte_range = parse_range(range_header, size)
+            except ValueError:
+                raise HTTPException(
+                    status_code=416,
+                    detail="Requested range not satisfiable",
+                    headers={"Content-Range": f"bytes */{size}"}
+                )
+        start, end = byte_range or (0, size)
+        
+        # Chunks are read from the blob store as the client consumes them
+        try:
+            chunks = await repository.open_content(document, start, end)
+        except BlobNotFoundError:
+            logger.error(f"Blob {document.get('blob_key')} of file {file_id} is missing")
+            raise HTTPException(status_code=404, detail="File contents not found")
+        
+        filename = document.get("filename") or file_id
+        headers.update({
+            "Content-Length": str(end - start),
+            "Content-Disposition": f"inline; filename*=UTF-8''{quote(filename)}",
+            "X-Content-Type-Options": "nosniff"
+        })
+        if byte_range:
+            headers["Content-Range"] = f"bytes {start}-{end - 1}/{size}"
+        
+        return StreamingResponse(
+            chunks,
+            status_code=206 if byte_range else 200,
+            media_type=document.get("content_type") or "application/octet-stream",
+            headers=headers
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Failed to serve file {file_id}: {e}")
+        raise HTTPException(status_code=500, detail=f"Failed to get file: {str(e)}")
@@ -1,59 +1,102 @@
-from fastapi import APIRouter, HTTPException, Depends, Response
-from fastapi.responses import FileResponse
-from typing import Optional
-from models.screening import ScreeningSession, AnalysisResult
-from motor.motor_asyncio import AsyncIOMotorClient
-from reportlab.lib import colors
-from reportlab.lib.pagesizes import letter, A4
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, Image
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
-from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_JUSTIFY
+from fastapi import APIRouter, HTTPException, Depends, Response, Header
+from fastapi.responses import FileResponse, StreamingResponse
+from typing import AsyncIterator, Dict, Optional, Tuple
+from models.screening import SessionSummary, AnalysisResult, BulkPDFRequest
+from repositories.screening_sessions import ScreeningSessionRepository
+from database import get_database
+from services.pdf_report import render_pdf_bytes
+from services.process_pool import PoolSaturatedError, pool_from_env
+from services.pdf_cache import pdf_report_cache
+from services.http_conditional import etag_matches
+from services.metrics import metrics, PDF_RENDER_SECONDS
+from services.stream_sink import StreamSink
 import os
-import io
 from datetime import datetime
 import tempfile
+import asyncio
+import re
+import zipfile
 import logging
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api", tags=["pdf"])
 
-# Database dependency
-def get_database():
-    mongo_url = os.environ['MONGO_URL']
-    client = AsyncIOMotorClient(mongo_url)
-    db = client[os.environ['DB_NAME']]
-    return db
+# ReportLab layout is CPU-bound; render in worker processes off the event loop
+# (PDF_RENDER_WORKERS, PDF_RENDER_QUEUE_SIZE, PDF_RENDER_TIMEOUT_SECONDS)
+render_pool = pool_from_env("PDF_RENDER")
+RETRY_AFTER_SECONDS = int(os.environ.get("PDF_RENDER_RETRY_AFTER", 5))
+BULK_MAX_SESSIONS = int(os.environ.get("PDF_BULK_MAX_SESSIONS", 5000))
+# Bulk exports only submit while fewer than this many renders are pending, so
+# interactive downloads always have the rest of the queue
+BULK_RENDER_SLOTS = max(1, render_pool.max_pending // 2)
+
+async def _render_cached(session: SessionSummary, cache_key: str, wait_below: Optional[int] = None) -> bytes:
+    """
+    Rendered report bytes from the cache, or from the render pool on a miss
+    """
+    clock = metrics.clock(PDF_RENDER_SECONDS)
+    pdf_bytes = pdf_report_cache.get(cache_key)
+    if pdf_bytes is not None:
+        clock.lap("cache")
+        return pdf_bytes
+    pdf_bytes = await render_pool.run(render_pdf_bytes, session.dict(), wait_below=wait_below)
+    pdf_report_cache.put(cache_key, pdf_bytes)
+    clock.lap("render")
+    return pdf_bytes
+
+def _not_modified(key: str) -> Response:
+    return Response(status_code=304, headers={"ETag": f'"{key}"', "Cache-Control": "private, no-cache"})
 
 @router.get("/pdf/report/{session_id}")
-async def generate_pdf_report(session_id: str, db = Depends(get_database)):
+async def generate_pdf_report(session_id: str,
+                              if_none_match: Optional[str] = Header(None),
+                              db = Depends(get_database)):
     """
     Generate and download PDF report for a screening session
     """
     try:
-        # Get session data from database
-        session_doc = await db.screening_sessions.find_one({"id": session_id})
+        # Repeat download of a report we already served: skip the session read
+        current_key = pdf_report_cache.current_key(session_id)
+        if etag_matches(if_none_match, current_key):
+            return _not_modified(current_key)
         
-        if not session_doc:
-            raise HTTPException(status_code=404, detail="Screening session not found")
+        # Get the fields the report needs from the database
+        session = await ScreeningSessionRepository(db).get_summary(session_id)
         
-        session = ScreeningSession(**session_doc)
+        if not session:
+            raise HTTPException(status_code=404, detail="Screening session not found")
         
         if not session.analysis_result:
             raise HTTPException(status_code=400, detail="No analysis result available for PDF generation")
         
-        # Generate PDF
-        pdf_buffer = generate_professional_pdf(session)
+        # Cached reports are keyed by session id and analysis result hash
+        cache_key = pdf_report_cache.make_key(session_id, session.analysis_result.dict())
+        if etag_matches(if_none_match, cache_key):
+            return _not_modified(cache_key)
+        
+        # Generate PDF in the render pool (unless cached)
+        try:
+            pdf_bytes = await _render_cached(session, cache_key)
+        except PoolSaturatedError:
+            raise HTTPException(
+                status_code=503,
+                detail="PDF renderer is busy, please retry shortly",
+                headers={"Retry-After": str(RETRY_AFTER_SECONDS)}
+            )
+        except asyncio.TimeoutError:
+            raise HTTPException(status_code=504, detail="PDF generation timed out")
         
         # Return PDF as response
         filename = f"TB_Screening_Report_{session_id[:8]}_{datetime.now().strftime('%Y%m%d')}.pdf"
         
         return Response(
-            content=pdf_buffer.getvalue(),
+            content=pdf_bytes,
             media_type="application/pdf",
             headers={
-                "Content-Disposition": f"attachment; filename={filename}"
+                "Content-Disposition": f"attachment; filename={filename}",
+                "ETag": f'"{cache_key}"',
+                "Cache-Control": "private, no-cache"
             }
         )
         
@@ -63,236 +106,117 @@ async def generate_pdf_report(session_id: str, db = Depends(get_database)):
         logger.error(f"PDF generation failed: {e}")
         raise HTTPException(status_code=500, detail=f"PDF generation failed: {str(e)}")
 
-def generate_professional_pdf(session: ScreeningSession) -> io.BytesIO:
+@router.get("/pdf/cache/stats")
+async def pdf_cache_stats():
     """
-    Generate a professional, medical-grade PDF report
+    PDF report cache and render pool statistics
     """
-    buffer = io.BytesIO()
-    
-    # Create PDF document with A4 page size
-    doc = SimpleDocTemplate(buffer, pagesize=A4, rightMargin=72, leftMargin=72,
-                          topMargin=72, bottomMargin=18)
-    
-    # Get styles
-    styles = getSampleStyleSheet()
-    
-    # Custom styles for medical report
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=18,
-        spaceAfter=30,
-        alignment=TA_CENTER,
-        textColor=colors.HexColor('#1F4E79')  # Deep blue
-    )
-    
-    heading_style = ParagraphStyle(
-        'CustomHeading',
-        parent=styles['Heading2'],
-        fontSize=14,
-        spaceAfter=12,
-        spaceBefore=20,
-        textColor=colors.HexColor('#1F4E79'),
-        borderPadding=4
-    )
-    
-    normal_style = ParagraphStyle(
-        'CustomNormal',
-        parent=styles['Normal'],
-        fontSize=11,
-        spaceAfter=6,
-        alignment=TA_JUSTIFY
-    )
-    
-    # Build PDF content
-    content = []
-    
-    # Header
-    content.append(Paragraph("TUBERCULOSIS PRE-SCREENING REPORT", title_style))
-    content.append(Spacer(1, 20))
-    
-    # Report metadata
-    report_date = datetime.now().strftime("%B %d, %Y at %I:%M %p")
-    content.append(Paragraph(f"<b>Report Generated:</b> {report_date}", normal_style))
-    content.append(Paragraph(f"<b>Session ID:</b> {session.id}", normal_style))
-    content.append(Spacer(1, 20))
-    
-    # Patient Information
-    content.append(Paragraph("PATIENT INFORMATION", heading_style))
-    
-    patient_data = [
-        ['Field', 'Value'],
-        ['Name', session.user_info.name or 'Not provided'],
-        ['Age', f"{session.user_info.age} years"],
-        ['Gender', session.user_info.gender or 'Not specified'],
-        ['Location', session.user_info.location or 'Not provided'],
-        ['Contact', session.user_info.contact or 'Not provided']
-    ]
-    
-    patient_table = Table(patient_data, colWidths=[2*inch, 3*inch])
-    patient_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#E6EEF6')),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.HexColor('#1F4E79')),
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, 0), 12),
-        ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-        ('FONTSIZE', (0, 1), (-1, -1), 10),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-        ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#CCCCCC'))
-    ]))
-    
-    content.append(patient_table)
-    content.append(Spacer(1, 20))
-    
-    # Screening Results
-    content.append(Paragraph("SCREENING RESULTS", heading_style))
-    
-    result = session.analysis_result
-    
-    # Result summary table
-    result_color = get_risk_color(result.likelihood)
-    
-    result_data = [
-        ['Assessment', 'Value'],
-        ['TB Likelihood', result.likelihood],
-        ['Risk Score', f"{result.risk_score}/20"],
-        ['AI Confidence', f"{result.confidence_percent}%"],
-        ['Urgency Level', result.urgency]
-    ]
-    
-    result_table = Table(result_data, colWidths=[2*inch, 3*inch])
-    result_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#E6EEF6')),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.HexColor('#1F4E79')),
-        ('BACKGROUND', (1, 1), (1, 1), result_color),  # Likelihood cell
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, 0), 12),
-        ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-        ('FONTSIZE', (0, 1), (-1, -1), 10),
-        ('FONTNAME', (1, 1), (1, 1), 'Helvetica-Bold'),  # Bold likelihood
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-        ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#CCCCCC'))
-    ]))
-    
-    content.append(result_table)
-    content.append(Spacer(1, 20))
-    
-    # Explanation
-    content.append(Paragraph("CLINICAL ASSESSMENT", heading_style))
-    content.append(Paragraph(result.explanation_plain, normal_style))
-    
-    if result.ai_analysis:
-        content.append(Spacer(1, 10))
-        content.append(Paragraph(f"<b>AI Analysis:</b> {result.ai_analysis}", normal_style))
-    
-    content.append(Spacer(1, 20))
-    
-    # Risk factors
-    if result.reasons:
-        content.append(Paragraph("IDENTIFIED RISK FACTORS", heading_style))
-        for i, reason in enumerate(result.reasons[:8], 1):  # Limit to 8 reasons
-            content.append(Paragraph(f"• {reason}", normal_style))
-        
-        if len(result.reasons) > 8:
-            content.append(Paragraph(f"... and {len(result.reasons) - 8} additional factors", normal_style))
-        
-        content.append(Spacer(1, 20))
-    
-    # Recommended tests
-    if result.recommended_tests:
-        content.append(Paragraph("RECOMMENDED MEDICAL TESTS", heading_style))
-        for test in result.recommended_tests:
-            content.append(Paragraph(f"• {test}", normal_style))
-        content.append(Spacer(1, 20))
-    
-    # Referral centers
-    if result.referrals:
-        content.append(Paragraph("NEARBY TB TESTING CENTERS", heading_style))
-        
-        referral_data = [['Center Name', 'Type', 'Phone', 'Distance']]
-        
-        for referral in result.referrals[:5]:  # Limit to 5 centers
-            referral_data.append([
-                referral.name,
-                referral.type,
-                referral.phone,
-                referral.distance or 'N/A'
-            ])
-        
-        referral_table = Table(referral_data, colWidths=[2.2*inch, 1.2*inch, 1.1*inch, 0.8*inch])
-        referral_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#E6EEF6')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.HexColor('#1F4E79')),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 10),
-            ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 1), (-1, -1), 9),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#CCCCCC')),
-            ('VALIGN', (0, 0), (-1, -1), 'TOP')
-        ]))
-        
-        content.append(referral_table)
-        content.append(Spacer(1, 20))
-    
-    # Medical disclaimer
-    content.append(Paragraph("IMPORTANT MEDICAL DISCLAIMER", heading_style))
-    
-    disclaimer_text = (
-        "This screening tool is for informational and educational purposes only and does not constitute medical advice, "
-        "diagnosis, or treatment. The results are based on self-reported symptoms and risk factors and should not replace "
-        "professional medical evaluation. Please consult with a qualified healthcare provider for proper diagnosis, "
-        "treatment, and medical guidance. TB is a serious medical condition that requires professional medical care."
-    )
-    
-    disclaimer_style = ParagraphStyle(
-        'Disclaimer',
-        parent=normal_style,
-        fontSize=9,
-        textColor=colors.HexColor('#666666'),
-        borderWidth=1,
-        borderColor=colors.HexColor('#CCCCCC'),
-        borderPadding=8,
-        backColor=colors.HexColor('#F8F9FA')
-    )
-    
-    content.append(Paragraph(disclaimer_text, disclaimer_style))
+    return {
+        "success": True,
+        "cache": pdf_report_cache.stats(),
+        "render_pool": render_pool.stats()
+    }
+
+@router.post("/pdf/bulk")
+async def generate_bulk_pdf_reports(bulk_request: BulkPDFRequest, db = Depends(get_database)):
+    """
+    Stream PDF reports for many sessions as a ZIP archive
+    """
+    query = _bulk_session_query(bulk_request)
+    if query is None:
+        raise HTTPException(status_code=400, detail="Provide session_ids or a start_date/end_date range")
+    
+    # Refuse oversized exports up front rather than truncating the archive
+    matching = await db.screening_sessions.count_documents(query, limit=BULK_MAX_SESSIONS + 1)
+    if matching > BULK_MAX_SESSIONS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"More than {BULK_MAX_SESSIONS} sessions match; narrow the date range or location"
+        )
     
-    # Add footer with report generation info
-    content.append(Spacer(1, 30))
-    footer_style = ParagraphStyle(
-        'Footer',
-        parent=normal_style,
-        fontSize=8,
-        textColor=colors.HexColor('#888888'),
-        alignment=TA_CENTER
+    filename = f"TB_Screening_Reports_{datetime.now().strftime('%Y%m%d_%H%M%S')}.zip"
+    return StreamingResponse(
+        _stream_reports_zip(db, query),
+        media_type="application/zip",
+        headers={"Content-Disposition": f"attachment; filename={filename}"}
     )
-    
-    content.append(Paragraph(
-        f"Generated by TB Pre-Screening Platform • {datetime.now().strftime('%Y-%m-%d %H:%M:%S')} • Session: {session.id[:8]}",
-        footer_style
-    ))
-    
-    # Build PDF
-    doc.build(content)
-    
-    # Reset buffer position
-    buffer.seek(0)
-    
-    return buffer
 
-def get_risk_color(likelihood: str) -> colors.Color:
+def _bulk_session_query(bulk_request: BulkPDFRequest) -> Optional[Dict]:
+    query: Dict = {"analysis_result": {"$ne": None}}
+    
+    if bulk_request.session_ids:
+        query["id"] = {"$in": bulk_request.session_ids}
+    elif bulk_request.start_date or bulk_request.end_date:
+        created_at = {}
+        if bulk_request.start_date:
+            created_at["$gte"] = bulk_request.start_date
+        if bulk_request.end_date:
+            created_at["$lt"] = bulk_request.end_date
+        query["created_at"] = created_at
+    else:
+        return None
+    
+    if bulk_request.location:
+        query["user_info.location"] = {"$regex": f"^{re.escape(bulk_request.location)}$", "$options": "i"}
+    return query
+
+async def _render_bulk_session(session: SessionSummary) -> Tuple[str, Optional[bytes], Optional[str]]:
     """
-    Get appropriate color for risk level
+    Render one session for a bulk export, waiting for a render slot below
+    BULK_RENDER_SLOTS instead of failing
     """
-    color_map = {
-        'Low': colors.HexColor('#D4F6D4'),      # Light green
-        'Moderate': colors.HexColor('#FFF4D4'), # Light yellow  
-        'High': colors.HexColor('#FFE4D4'),     # Light orange
-        'Confirmed': colors.HexColor('#FFD4D4') # Light red
-    }
-    
-    return color_map.get(likelihood, colors.HexColor('#F0F0F0'))
\ No newline at end of file
+    cache_key = pdf_report_cache.make_key(session.id, session.analysis_result.dict())
+    try:
+        return session.id, await _render_cached(session, cache_key, wait_below=BULK_RENDER_SLOTS), None
+    except asyncio.TimeoutError:
+        return session.id, None, "timed out"
+    except Exception as e:
+        return session.id, None, str(e)
+
+async def _stream_reports_zip(db, query: Dict) -> AsyncIterator[bytes]:
+    """
+    Render sessions through the render pool a few at a time and write each
+    PDF into the archive as soon as it finishes, so memory stays bounded
+    """
+    sink = StreamSink()
+    window = BULK_RENDER_SLOTS
+    in_flight = set()
+    failures = []
+    
+    cursor = ScreeningSessionRepository(db).find_summaries(query).sort("created_at", 1)
+    cursor = cursor.batch_size(window * 2)
+    
+    with zipfile.ZipFile(sink, mode="w", compression=zipfile.ZIP_STORED) as archive:
+        async def drain(return_when):
+            nonlocal in_flight
+            done, in_flight = await asyncio.wait(in_flight, return_when=return_when)
+            for task in done:
+                session_id, pdf_bytes, error = task.result()
+                if pdf_bytes is None:
+                    failures.append(f"{session_id}: {error}")
+                    continue
+                archive.writestr(f"TB_Screening_Report_{session_id}.pdf", pdf_bytes)
+        
+        try:
+            async for session_doc in cursor:
+                try:
+                    session = SessionSummary(**session_doc)
+                except Exception as e:
+                    failures.append(f"{session_doc.get('id')}: {e}")
+                    continue
+                in_flight.add(asyncio.ensure_future(_render_bulk_session(session)))
+                if len(in_flight) >= window:
+                    await drain(asyncio.FIRST_COMPLETED)
+                    yield sink.take()
+            
+            if in_flight:
+                await drain(asyncio.ALL_COMPLETED)
+        finally:
+            # Client went away mid-stream: stop waiting on renders
+            for task in in_flight:
+                task.cancel()
+        if failures:
+            logger.warning(f"Bulk PDF export skipped {len(failures)} sessions")
+            archive.writestr("errors.txt", "\n".join(failures) + "\n")
+    
+    yield sink.take()
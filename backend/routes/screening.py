@@ -1,48 +1,78 @@
-from fastapi import APIRouter, HTTPException, UploadFile, File, Form, Depends
+from fastapi import APIRouter, HTTPException, Depends, Request
 from typing import List, Optional, Dict
-from models.screening import ScreeningRequest, AnalysisResult, ScreeningSession, SavedReport
+from models.screening import ScreeningRequest, AnalysisResult, ScreeningSession, SavedReport, ScoreBatchRequest, ReferralBatchRequest
 from services.analysis import AnalysisService
+from services.analysis_cache import AnalysisResultCache
 from services.scoring import TBScoringService
+from services.batch_scoring import BatchScoringService
 from services.referrals import ReferralService
-from motor.motor_asyncio import AsyncIOMotorClient
+from repositories.referral_centers import ReferralCenterRepository
+from repositories.uploaded_files import UploadedFileRepository, UploadReferenceError
+from repositories.screening_sessions import ScreeningSessionRepository
+from repositories.screening_rollups import ScreeningRollupRepository
+from repositories.saved_reports import DEFAULT_PAGE_SIZE, InvalidCursorError, SavedReportRepository, user_key_for
+from services.pdf_cache import pdf_report_cache
+from services.session_writer import WriteBufferFullError, session_write_buffer
+from services.blob_store import BlobStore, blob_store_from_env
+from services.upload_ingest import UploadRejectedError, ingest_multipart_upload
+from services.metrics import metrics, ANALYZE_STAGE_SECONDS, UPLOAD_SIZE_BYTES, UPLOAD_BYTES_TOTAL
+from database import get_database
 import logging
 import json
-import base64
 from datetime import datetime
-import os
 
 logger = logging.getLogger(__name__)
 
-# Initialize services
-analysis_service = AnalysisService()
+# Initialize services (shared with the analysis pipeline)
 scoring_service = TBScoringService()
+batch_scoring_service = BatchScoringService(scoring_service)
 referral_service = ReferralService()
+analysis_cache = AnalysisResultCache.from_env()
+analysis_service = AnalysisService(scoring_service, referral_service, analysis_cache)
 
 # Router setup
 router = APIRouter(prefix="/api", tags=["screening"])
 
-# Database dependency
-def get_database():
-    mongo_url = os.environ['MONGO_URL']
-    client = AsyncIOMotorClient(mongo_url)
-    db = client[os.environ['DB_NAME']]
-    return db
+async def get_blob_store(db = Depends(get_database)) -> BlobStore:
+    """
+    Blob store for uploaded file contents (configured by BLOB_STORE)
+    """
+    return blob_store_from_env(db)
 
 @router.post("/analyze", response_model=AnalysisResult)
 async def analyze_screening(screening_request: ScreeningRequest, 
+                          request: Request,
                           user_location: Optional[Dict] = None,
-                          db = Depends(get_database)):
+                          db = Depends(get_database),
+                          blob_store: BlobStore = Depends(get_blob_store)):
     """
     Analyze TB screening data and provide comprehensive results
     """
     try:
+        # Stages since the request arrived: body parsing and Pydantic validation
+        clock = metrics.clock(ANALYZE_STAGE_SECONDS, getattr(request.state, "request_started", None))
+        clock.lap("parse_validate")
         logger.info(f"Received screening analysis request: {screening_request.session_id}")
         
-        # Perform analysis
+        # Sessions keep upload references only; inline base64 is moved to the blob store
+        try:
+            uploads = await UploadedFileRepository(db, blob_store).resolve(screening_request.uploads)
+        except UploadReferenceError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except Exception as storage_error:
+            logger.warning(f"Failed to store uploads, saving metadata only: {storage_error}")
+            # Continue without the file contents, as for a failed session save
+            uploads = [upload.copy(update={"content_base64": None}) for upload in screening_request.uploads]
+        clock.lap("resolve_uploads")
+        
+        # Perform analysis (timed stage by stage by the analysis service);
+        # referrals from referral_centers, as for GET /referrals
         analysis_result = await analysis_service.analyze_screening(
             screening_request, 
-            user_location
+            user_location,
+            referral_source=ReferralCenterRepository(db, referral_service)
         )
+        clock.restart()
         
         # Create screening session document
         session = ScreeningSession(
@@ -50,31 +80,76 @@ async def analyze_screening(screening_request: ScreeningRequest,
             user_info=screening_request.user,
             symptoms=screening_request.symptoms,
             deep_questions=screening_request.deep_questions,
-            uploads=screening_request.uploads,
+            uploads=uploads,
             local_score=screening_request.local_score,
             analysis_result=analysis_result,
             created_at=datetime.utcnow(),
             updated_at=datetime.utcnow()
         )
+        clock.lap("build_session")
         
-        # Save to database
+        # Save to database (write-behind when enabled, inline when full or off)
         try:
-            await db.screening_sessions.insert_one(session.dict())
+            session_doc = session.dict(exclude={'uploads': {'__all__': {'content_base64'}}})
+            queued = False
+            if session_write_buffer.running:
+                try:
+                    await session_write_buffer.submit(session_doc)
+                    queued = True
+                except WriteBufferFullError as full:
+                    logger.warning(f"Session write buffer full, writing inline: {full}")
+            if not queued:
+                await db.screening_sessions.insert_one(session_doc)
+                # Queued sessions are counted by the buffer once written
+                await ScreeningRollupRepository(db).record([session_doc])
+            pdf_report_cache.invalidate(session.id)
             logger.info(f"Saved screening session: {session.id}")
         except Exception as db_error:
             logger.warning(f"Failed to save to database: {db_error}")
             # Continue without failing the request
+        clock.lap("persist")
         
         return analysis_result
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Analysis failed: {e}")
         raise HTTPException(status_code=500, detail=f"Analysis failed: {str(e)}")
 
-@router.post("/upload")
-async def upload_file(file: UploadFile = File(...),
-                     file_type: str = Form(...),
-                     db = Depends(get_database)):
+@router.get("/analysis/cache/stats")
+async def analysis_cache_stats():
+    """
+    Memoized analysis result statistics
+    """
+    return {
+        "success": True,
+        "cache": analysis_cache.stats()
+    }
+
+# Multipart body of /upload, documented by hand since it is parsed as a stream
+UPLOAD_OPENAPI = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "required": ["file", "file_type"],
+                    "properties": {
+                        "file": {"type": "string", "format": "binary"},
+                        "file_type": {"type": "string"}
+                    }
+                }
+            }
+        }
+    }
+}
+
+@router.post("/upload", openapi_extra=UPLOAD_OPENAPI)
+async def upload_file(request: Request,
+                     db = Depends(get_database),
+                     blob_store: BlobStore = Depends(get_blob_store)):
     """
     Handle medical report file uploads
     """
@@ -82,37 +157,25 @@ async def upload_file(file: UploadFile = File(...),
         # Validate file size (10MB limit)
         max_size = 10 * 1024 * 1024  # 10MB
         
-        # Read file content
-        content = await file.read()
-        
-        if len(content) > max_size:
-            raise HTTPException(status_code=413, detail="File size exceeds 10MB limit")
-        
-        # Validate file type
-        allowed_extensions = ['.jpg', '.jpeg', '.png', '.pdf']
-        file_ext = os.path.splitext(file.filename)[1].lower()
-        
-        if file_ext not in allowed_extensions:
-            raise HTTPException(status_code=400, detail="Invalid file type. Allowed: JPG, PNG, PDF")
-        
-        # Convert to base64 for storage
-        content_base64 = base64.b64encode(content).decode('utf-8')
-        
-        # Create file document
-        file_doc = {
-            "filename": file.filename,
-            "file_type": file_type,
-            "content_type": file.content_type,
-            "size": len(content),
-            "content_base64": content_base64,
-            "uploaded_at": datetime.utcnow()
-        }
+        # Stream the file into the blob store chunk by chunk; oversized or
+        # non JPG/PNG/PDF content is rejected as soon as it is detected
+        try:
+            upload = await ingest_multipart_upload(
+                request, blob_store, max_size, required_fields=["file_type"]
+            )
+        except UploadRejectedError as e:
+            raise HTTPException(status_code=e.status_code, detail=e.detail)
         
-        # Save to database
+        # Save file metadata to database
         try:
-            result = await db.uploaded_files.insert_one(file_doc)
-            file_id = str(result.inserted_id)
-            logger.info(f"Uploaded file: {file.filename} ({file_id})")
+            file_id = await UploadedFileRepository(db, blob_store).create(
+                upload["filename"], upload["fields"]["file_type"], upload["content_type"],
+                upload["size"], upload["blob_key"]
+            )
+            logger.info(f"Uploaded file: {upload['filename']} ({file_id})")
+            if metrics.enabled:
+                UPLOAD_SIZE_BYTES.observe(upload["size"], upload["content_type"])
+                UPLOAD_BYTES_TOTAL.inc(upload["size"])
         except Exception as db_error:
             logger.warning(f"Failed to save file to database: {db_error}")
             file_id = "temp_" + str(datetime.utcnow().timestamp())
@@ -120,8 +183,9 @@ async def upload_file(file: UploadFile = File(...),
         return {
             "success": True,
             "file_id": file_id,
-            "filename": file.filename,
-            "size": len(content),
+            "filename": upload["filename"],
+            "size": upload["size"],
+            "sha256": upload["blob_key"],
             "url": f"/api/files/{file_id}"
         }
         
@@ -136,19 +200,23 @@ async def get_referrals(lat: Optional[float] = None,
                        lng: Optional[float] = None,
                        radius: float = 50.0,
                        urgency: Optional[str] = None,
-                       max_results: int = 5):
+                       max_results: int = 5,
+                       db = Depends(get_database)):
     """
     Get nearby TB testing centers and referrals
     """
     try:
+        # $geoNear on referral_centers, with the in-memory service as fallback
+        repository = ReferralCenterRepository(db, referral_service)
+        
         if urgency:
             # Get priority centers based on urgency
-            referrals = referral_service.get_priority_centers_by_urgency(
+            referrals = await repository.get_priority_centers_by_urgency(
                 urgency, lat, lng
             )
         else:
             # Get nearby centers
-            referrals = referral_service.get_nearby_centers(
+            referrals = await repository.get_nearby_centers(
                 lat, lng, radius, max_results
             )
         
@@ -162,38 +230,79 @@ async def get_referrals(lat: Optional[float] = None,
         logger.error(f"Failed to get referrals: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to get referrals: {str(e)}")
 
+@router.post("/referrals/batch")
+async def get_referrals_batch(batch_request: ReferralBatchRequest):
+    """
+    Get ranked TB testing centers for many locations in one call (served
+    from the in-memory centers, refreshed from referral_centers every
+    REFERRAL_RELOAD_SECONDS)
+    """
+    try:
+        queries = [(q.lat, q.lng, q.urgency) for q in batch_request.queries]
+        results = referral_service.get_referrals_bulk(
+            queries, batch_request.radius, batch_request.max_results
+        )
+        
+        return {
+            "success": True,
+            "count": len(results),
+            "results": [
+                {
+                    "lat": query.lat,
+                    "lng": query.lng,
+                    "urgency": query.urgency,
+                    "count": len(referrals),
+                    "referrals": [referral.dict() for referral in referrals]
+                }
+                for query, referrals in zip(batch_request.queries, results)
+            ]
+        }
+        
+    except Exception as e:
+        logger.error(f"Failed to get batch referrals: {e}")
+        raise HTTPException(status_code=500, detail=f"Failed to get referrals: {str(e)}")
+
 @router.post("/reports", response_model=SavedReport)
 async def save_report(session_id: str, 
                      user_consent: bool = True,
+                     user_key: Optional[str] = None,
                      db = Depends(get_database)):
     """
-    Save screening report for user history
+    Save screening report for user history (listed under user_key: an opaque
+    key from the client, or by default one derived from the user's contact
+    number with the server's REPORT_HISTORY_SECRET; without either the report
+    is saved unlisted)
     """
     try:
         if not user_consent:
             raise HTTPException(status_code=400, detail="User consent required to save report")
         
-        # Get screening session from database
-        session_doc = await db.screening_sessions.find_one({"id": session_id})
+        # Get screening session from database (user info and result only)
+        session = await ScreeningSessionRepository(db).get_summary(session_id)
         
-        if not session_doc:
+        if not session:
             raise HTTPException(status_code=404, detail="Screening session not found")
         
-        session = ScreeningSession(**session_doc)
-        
         if not session.analysis_result:
             raise HTTPException(status_code=400, detail="No analysis result available")
         
+        user_key = user_key or user_key_for(session.user_info)
+        if not user_key:
+            # Still saved, but listed in no history until a key is backfilled
+            logger.warning(f"Saving report for session {session_id} without a user_key "
+                           f"(no contact number or REPORT_HISTORY_SECRET)")
+        
         # Create saved report
         saved_report = SavedReport(
             session_id=session_id,
+            user_key=user_key,
             user_info=session.user_info,
             analysis_result=session.analysis_result,
             saved_at=datetime.utcnow()
         )
         
         # Save to database
-        await db.saved_reports.insert_one(saved_report.dict())
+        await SavedReportRepository(db).insert(saved_report)
         
         logger.info(f"Saved report: {saved_report.id}")
         return saved_report
@@ -205,36 +314,52 @@ async def save_report(session_id: str,
         raise HTTPException(status_code=500, detail=f"Failed to save report: {str(e)}")
 
 @router.get("/reports/{user_id}")
-async def get_user_reports(user_id: str, db = Depends(get_database)):
+async def get_user_reports(user_id: str,
+                           limit: int = DEFAULT_PAGE_SIZE,
+                           cursor: Optional[str] = None,
+                           db = Depends(get_database)):
     """
-    Get user's saved screening reports (placeholder for user authentication)
+    Get a page of a user's saved screening reports, newest first; pass
+    next_cursor back as cursor for the following page
     """
     try:
         # TODO: Implement proper user authentication
-        # For now, return empty list
+        try:
+            reports, next_cursor = await SavedReportRepository(db).list_for_user(user_id, limit, cursor)
+        except InvalidCursorError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        
         return {
             "success": True,
-            "reports": []
+            "count": len(reports),
+            "reports": reports,
+            "next_cursor": next_cursor
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Failed to get user reports: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to get reports: {str(e)}")
 
 @router.get("/session/{session_id}")
-async def get_screening_session(session_id: str, db = Depends(get_database)):
+async def get_screening_session(session_id: str,
+                                fields: Optional[str] = None,
+                                db = Depends(get_database)):
     """
-    Get screening session details by ID
+    Get screening session details by ID (optionally only the comma-separated fields)
     """
     try:
-        session_doc = await db.screening_sessions.find_one({"id": session_id})
+        try:
+            session_doc = await ScreeningSessionRepository(db).get(
+                session_id, ScreeningSessionRepository.parse_fields(fields)
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
         
         if not session_doc:
             raise HTTPException(status_code=404, detail="Session not found")
         
-        # Remove sensitive data before returning
-        session_doc.pop('_id', None)
-        
         return {
             "success": True,
             "session": session_doc
@@ -246,6 +371,28 @@ async def get_screening_session(session_id: str, db = Depends(get_database)):
         logger.error(f"Failed to get session: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to get session: {str(e)}")
 
+@router.get("/session/{session_id}/summary")
+async def get_screening_session_summary(session_id: str, db = Depends(get_database)):
+    """
+    Get the session fields used by the result page and PDF report
+    """
+    try:
+        summary = await ScreeningSessionRepository(db).get_summary(session_id)
+        
+        if not summary:
+            raise HTTPException(status_code=404, detail="Session not found")
+        
+        return {
+            "success": True,
+            "session": summary.dict()
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Failed to get session summary: {e}")
+        raise HTTPException(status_code=500, detail=f"Failed to get session: {str(e)}")
+
 @router.get("/score")
 async def calculate_score(symptoms: str, deep_questions: str = "{}"):
     """
@@ -276,4 +423,28 @@ async def calculate_score(symptoms: str, deep_questions: str = "{}"):
         
     except Exception as e:
         logger.error(f"Score calculation failed: {e}")
-        raise HTTPException(status_code=400, detail=f"Score calculation failed: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=400, detail=f"Score calculation failed: {str(e)}")
+
+@router.post("/score/batch")
+async def calculate_batch_scores(batch_request: ScoreBatchRequest):
+    """
+    Calculate TB risk scores for a batch of screenings (vectorized)
+    """
+    try:
+        frame = batch_scoring_service.build_frame(
+            [item.symptoms for item in batch_request.items],
+            [item.deep_questions for item in batch_request.items]
+        )
+        results = batch_scoring_service.score_batch(frame)
+        
+        return {
+            "success": True,
+            "count": len(batch_request.items),
+            "scores": results["scores"].tolist(),
+            "risk_levels": results["risk_levels"].tolist(),
+            "urgencies": results["urgencies"].tolist()
+        }
+        
+    except Exception as e:
+        logger.error(f"Batch score calculation failed: {e}")
+        raise HTTPException(status_code=400, detail=f"Batch score calculation failed: {str(e)}")
\ No newline at end of file
@@ -2,6 +2,8 @@ from typing import Dict, List, Optional
 from models.screening import ScreeningRequest, AnalysisResult, Referral
 from services.scoring import TBScoringService
 from services.referrals import ReferralService
+from services.analysis_cache import AnalysisResultCache
+from services.metrics import metrics, ANALYZE_STAGE_SECONDS
 import logging
 import uuid
 
@@ -12,22 +14,41 @@ class AnalysisService:
     Main service for analyzing TB screening data and generating comprehensive results
     """
     
-    def __init__(self):
-        self.scoring_service = TBScoringService()
-        self.referral_service = ReferralService()
+    def __init__(self, scoring_service: Optional[TBScoringService] = None,
+                 referral_service: Optional[ReferralService] = None,
+                 result_cache: Optional[AnalysisResultCache] = None):
+        self.scoring_service = scoring_service or TBScoringService()
+        self.referral_service = referral_service or ReferralService()
+        self.result_cache = result_cache
     
     async def analyze_screening(self, screening_request: ScreeningRequest, 
-                              user_location: Optional[Dict] = None) -> AnalysisResult:
+                              user_location: Optional[Dict] = None,
+                              referral_source=None) -> AnalysisResult:
         """
-        Perform comprehensive analysis of TB screening data
+        Perform comprehensive analysis of TB screening data. Referrals come from
+        referral_source (e.g. a ReferralCenterRepository) when given, otherwise
+        from the in-memory referral service
         """
         logger.info(f"Starting analysis for screening session: {screening_request.session_id}")
+        clock = metrics.clock(ANALYZE_STAGE_SECONDS)
+        
+        # Identical inputs (retries, screening camps) reuse an earlier result
+        cache_key = None
+        if self.result_cache is not None:
+            cache_key = self.result_cache.make_key(screening_request, user_location)
+            cached = self.result_cache.get(cache_key)
+            if cached is not None:
+                result = self._reuse_result(cached, screening_request, user_location)
+                clock.lap("cache_hit")
+                return result
+            clock.lap("cache_lookup")
         
         # Calculate comprehensive risk score and reasoning
         risk_score, reasons = self.scoring_service.calculate_comprehensive_score(
             screening_request.symptoms, 
             screening_request.deep_questions
         )
+        clock.lap("score")
         
         # Determine risk classification
         likelihood = self.scoring_service.get_risk_classification(risk_score)
@@ -44,18 +65,26 @@ class AnalysisService:
             likelihood, 
             screening_request.symptoms
         )
+        clock.lap("classify")
         
         # Get appropriate referrals based on urgency and location
         user_lat = user_location.get('lat') if user_location else None
         user_lng = user_location.get('lng') if user_location else None
         
-        referrals = self.referral_service.get_priority_centers_by_urgency(
-            urgency, user_lat, user_lng
-        )
+        if referral_source is not None:
+            referrals = await referral_source.get_priority_centers_by_urgency(
+                urgency, user_lat, user_lng
+            )
+        else:
+            referrals = self.referral_service.get_priority_centers_by_urgency(
+                urgency, user_lat, user_lng
+            )
+        clock.lap("referrals")
         
         # Enhance referrals with emergency information if needed
         if urgency == "Immediate":
             referrals = self.referral_service.add_emergency_contacts(referrals)
+            clock.lap("emergency_contacts")
         
         # Calculate confidence percentage
         confidence = self._calculate_confidence(risk_score, screening_request)
@@ -64,9 +93,11 @@ class AnalysisService:
         explanation = self.scoring_service.generate_explanation(
             risk_score, likelihood, reasons, "en"  # TODO: Add language detection
         )
+        clock.lap("explanation")
         
         # Enhance explanation with AI analysis if available
         ai_analysis = await self._generate_ai_analysis(screening_request, risk_score)
+        clock.lap("ai_analysis")
         
         # Generate session ID if not provided
         session_id = screening_request.session_id or str(uuid.uuid4())
@@ -85,8 +116,33 @@ class AnalysisService:
         )
         
         logger.info(f"Analysis completed: {likelihood} risk ({risk_score}/20), {urgency} urgency")
+        if cache_key is not None:
+            self.result_cache.put(cache_key, result)
+        clock.lap("build_result")
         return result
     
+    def _reuse_result(self, cached: AnalysisResult, screening_request: ScreeningRequest,
+                      user_location: Optional[Dict]) -> AnalysisResult:
+        """
+        Copy of a memoized result with a fresh session ID and distances from
+        this user's exact location
+        """
+        user_lat = user_location.get('lat') if user_location else None
+        user_lng = user_location.get('lng') if user_location else None
+        
+        referrals = cached.referrals
+        if user_lat is not None and user_lng is not None:
+            referrals = []
+            for referral in cached.referrals:
+                distance = self.referral_service._calculate_distance(user_lat, user_lng, referral.lat, referral.lng)
+                referrals.append(referral.copy(update={'distance': f"{distance:.1f} km"}))
+        
+        logger.info(f"Analysis reused from cache: {cached.likelihood} risk ({cached.risk_score}/20)")
+        return cached.copy(update={
+            'session_id': screening_request.session_id or str(uuid.uuid4()),
+            'referrals': referrals
+        })
+    
     def _calculate_confidence(self, risk_score: int, screening_request: ScreeningRequest) -> int:
         """
         Calculate confidence percentage based on various factors
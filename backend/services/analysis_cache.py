@@ -0,0 +1,104 @@
+from collections import OrderedDict
+from models.screening import ScreeningRequest, AnalysisResult
+from typing import Any, Dict, Optional, Tuple
+import hashlib
+import json
+import math
+import os
+import time
+
+DEFAULT_MAX_ENTRIES = 10000
+DEFAULT_TTL_SECONDS = 600.0
+DEFAULT_GRID_DEG = 0.01  # about 1 km
+
+
+class AnalysisResultCache:
+    """
+    LRU + TTL memo of analysis results keyed by a canonical hash of the
+    inputs the analysis depends on: symptoms, deep questions, age, number of
+    uploads and the user location quantized to a grid cell.
+
+    Submissions from the same cell share referral ranking; callers should
+    recompute per-user details (session id, distances) on a hit.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, ttl_seconds: float = DEFAULT_TTL_SECONDS,
+                 grid_deg: float = DEFAULT_GRID_DEG):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.grid_deg = grid_deg
+        self._entries: "OrderedDict[str, Tuple[float, AnalysisResult]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+
+    @classmethod
+    def from_env(cls) -> "AnalysisResultCache":
+        """
+        Build a cache configured by ANALYSIS_CACHE_MAX_ENTRIES (0 disables it),
+        ANALYSIS_CACHE_TTL_SECONDS and ANALYSIS_CACHE_GRID_DEG
+        """
+        return cls(
+            max_entries=int(os.environ.get("ANALYSIS_CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES)),
+            ttl_seconds=float(os.environ.get("ANALYSIS_CACHE_TTL_SECONDS", DEFAULT_TTL_SECONDS)),
+            grid_deg=float(os.environ.get("ANALYSIS_CACHE_GRID_DEG", DEFAULT_GRID_DEG))
+        )
+
+    def grid_cell(self, user_location: Optional[Dict]) -> Optional[Tuple[int, int]]:
+        lat = user_location.get('lat') if user_location else None
+        lng = user_location.get('lng') if user_location else None
+        if lat is None or lng is None:
+            return None
+        return (math.floor(float(lat) / self.grid_deg), math.floor(float(lng) / self.grid_deg))
+
+    def make_key(self, screening_request: ScreeningRequest, user_location: Optional[Dict] = None) -> str:
+        canonical = json.dumps({
+            "symptoms": screening_request.symptoms.dict(),
+            "deep_questions": screening_request.deep_questions.dict(),
+            "age": screening_request.user.age,
+            "uploads": len(screening_request.uploads),
+            "cell": self.grid_cell(user_location)
+        }, sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[AnalysisResult]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        stored_at, result = entry
+        if time.monotonic() - stored_at > self.ttl_seconds:
+            del self._entries[key]
+            self.expired += 1
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return result
+
+    def put(self, key: str, result: AnalysisResult) -> None:
+        if self.max_entries <= 0:
+            return
+        self._entries[key] = (time.monotonic(), result)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "grid_deg": self.grid_deg,
+            "hits": self.hits,
+            "misses": self.misses,
+            "expired": self.expired,
+            "evictions": self.evictions
+        }
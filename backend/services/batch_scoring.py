@@ -0,0 +1,155 @@
+from typing import Dict, List, Mapping, Optional, Union
+from models.screening import Symptoms, DeepQuestions
+from services.scoring import TBScoringService
+import numpy as np
+import pandas as pd
+import logging
+
+logger = logging.getLogger(__name__)
+
+ColumnarBatch = Union[pd.DataFrame, Mapping[str, object]]
+
+
+class BatchScoringService:
+    """
+    Vectorized TB scoring over columnar batches of screenings.
+
+    Mirrors TBScoringService.calculate_comprehensive_score, get_risk_classification
+    and get_urgency_level exactly, but computes every component with array ops so
+    historical screenings can be rescored in bulk. Reasons are not produced.
+    """
+
+    SYMPTOM_COLUMNS = list(TBScoringService.SYMPTOM_WEIGHTS.keys())
+    CONSTITUTIONAL_COLUMNS = ['fever_evening', 'weight_loss', 'night_sweats', 'loss_of_appetite']
+    IMMEDIATE_CONDITIONS = ['previous_tb_not_completed', 'hiv']
+
+    def __init__(self, scoring_service: Optional[TBScoringService] = None):
+        self.scoring_service = scoring_service or TBScoringService()
+        self._symptom_weights = np.array(
+            [self.scoring_service.SYMPTOM_WEIGHTS[key] for key in self.SYMPTOM_COLUMNS],
+            dtype=np.int64
+        )
+
+    def build_frame(self, symptoms: List[Symptoms], deep_questions: List[DeepQuestions]) -> pd.DataFrame:
+        """
+        Build a columnar batch from parallel lists of model instances
+        """
+        if len(symptoms) != len(deep_questions):
+            raise ValueError("symptoms and deep_questions must have the same length")
+
+        frame = pd.DataFrame.from_records([s.dict() for s in symptoms])
+        deep_frame = pd.DataFrame.from_records([d.dict() for d in deep_questions])
+        for column in ['cough_duration_weeks', 'exposure_contact', 'previous_conditions']:
+            frame[column] = deep_frame[column] if column in deep_frame else None
+        return frame
+
+    def score_batch(self, batch: ColumnarBatch) -> Dict[str, np.ndarray]:
+        """
+        Score a columnar batch (DataFrame or mapping of column name to array).
+
+        Returns arrays of scores, risk classifications and urgency levels.
+        """
+        n = self._batch_length(batch)
+
+        symptom_matrix = np.column_stack(
+            [self._bool_column(batch, key, n) for key in self.SYMPTOM_COLUMNS]
+        ) if n else np.zeros((0, len(self.SYMPTOM_COLUMNS)), dtype=bool)
+        none_of_the_above = self._bool_column(batch, 'none_of_the_above', n)
+
+        # Base symptom score ("none of the above" zeroes it, as in the scalar path)
+        symptom_score = np.where(none_of_the_above, 0, symptom_matrix.astype(np.int64) @ self._symptom_weights)
+
+        # Risk factors and critical conditions from the exploded condition lists
+        conditions = self._object_column(batch, 'previous_conditions', n).map(
+            lambda value: list(value) if isinstance(value, (list, tuple, np.ndarray)) else []
+        )
+        exploded = conditions.explode()
+        risk_score = (
+            exploded.map(self.scoring_service.RISK_ADJUSTMENTS)
+            .fillna(0)
+            .groupby(level=0)
+            .sum()
+            .reindex(range(n), fill_value=0)
+            .to_numpy(dtype=np.int64)
+        )
+        has_immediate_condition = (
+            exploded.isin(self.IMMEDIATE_CONDITIONS)
+            .groupby(level=0)
+            .any()
+            .reindex(range(n), fill_value=False)
+            .to_numpy(dtype=bool)
+        )
+
+        # Exposure history
+        exposure_score = (
+            self._object_column(batch, 'exposure_contact', n)
+            .map(self.scoring_service.EXPOSURE_WEIGHTS)
+            .fillna(0)
+            .to_numpy(dtype=np.int64)
+        )
+
+        base_score = symptom_score + risk_score + exposure_score
+
+        # Duration and severity escalation
+        cough_gt_2_weeks = symptom_matrix[:, self.SYMPTOM_COLUMNS.index('cough_gt_2_weeks')]
+        cough_with_sputum = symptom_matrix[:, self.SYMPTOM_COLUMNS.index('cough_with_sputum')]
+        cough_with_blood = symptom_matrix[:, self.SYMPTOM_COLUMNS.index('cough_with_blood')]
+        fever_evening = symptom_matrix[:, self.SYMPTOM_COLUMNS.index('fever_evening')]
+        prolonged_cough = (
+            (self._object_column(batch, 'cough_duration_weeks', n) == "> 1 month").to_numpy(dtype=bool)
+            & (cough_gt_2_weeks | cough_with_sputum)
+            & (base_score >= 4)
+        )
+        constitutional_count = symptom_matrix[
+            :, [self.SYMPTOM_COLUMNS.index(key) for key in self.CONSTITUTIONAL_COLUMNS]
+        ].sum(axis=1)
+
+        escalation_score = (
+            2 * prolonged_cough.astype(np.int64)
+            + 2 * (cough_with_blood & fever_evening).astype(np.int64)
+            + (constitutional_count >= 3).astype(np.int64)
+        )
+
+        scores = np.minimum(base_score + escalation_score, 20)
+
+        risk_levels = np.select(
+            [scores >= 12, scores >= 8, scores >= 4],
+            ["Confirmed", "High", "Moderate"],
+            default="Low"
+        )
+        urgencies = np.select(
+            [(scores >= 10) | cough_with_blood | has_immediate_condition, scores >= 6],
+            ["Immediate", "TestSoon"],
+            default="Monitor"
+        )
+
+        logger.info(f"Batch scored {n} screenings")
+        return {
+            "scores": scores,
+            "risk_levels": risk_levels,
+            "urgencies": urgencies
+        }
+
+    def _batch_length(self, batch: ColumnarBatch) -> int:
+        if isinstance(batch, pd.DataFrame):
+            return len(batch)
+        lengths = {len(column) for column in batch.values()}
+        if len(lengths) > 1:
+            raise ValueError("All batch columns must have the same length")
+        return lengths.pop() if lengths else 0
+
+    def _bool_column(self, batch: ColumnarBatch, key: str, n: int) -> np.ndarray:
+        if key not in batch:
+            return np.zeros(n, dtype=bool)
+        column = pd.Series(np.asarray(batch[key], dtype=object))
+        return column.fillna(False).to_numpy(dtype=bool)
+
+    def _object_column(self, batch: ColumnarBatch, key: str, n: int) -> pd.Series:
+        if key not in batch:
+            return pd.Series([None] * n, dtype=object)
+        values = batch[key]
+        if isinstance(values, pd.Series):
+            return values.reset_index(drop=True).astype(object)
+        column = np.empty(n, dtype=object)
+        column[:] = list(values)
+        return pd.Series(column, dtype=object)
@@ -0,0 +1,350 @@
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pydantic import ValidationError
+from pymongo.errors import BulkWriteError
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from models.screening import FileUpload, ScreeningRequest, ScreeningSession
+from services.analysis import AnalysisService
+from services.blob_store import BlobStore
+from services.parallel_analysis import ParallelAnalyzer, run_in_worker, worker_analysis_service
+from repositories.screening_rollups import ScreeningRollupRepository
+from repositories.uploaded_files import UploadedFileRepository, UploadReferenceError
+from services.session_writer import DUPLICATE_KEY, stored_documents
+from datetime import datetime, timezone
+import csv
+import itertools
+import json
+import os
+import time
+import uuid
+import logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 500
+
+# CSV cells holding lists, separated by LIST_SEPARATOR
+LIST_COLUMNS = frozenset({"deep_questions.previous_conditions"})
+LIST_SEPARATOR = ";"
+
+# Sections whose fields are all optional, so a sheet may leave out their columns
+OPTIONAL_SECTIONS = ("symptoms", "deep_questions")
+
+# Result columns written when the results file is a .csv
+RESULT_COLUMNS = ["row", "session_id", "likelihood", "risk_score", "urgency",
+                  "confidence_percent", "recommended_tests", "error"]
+
+
+class CheckpointMismatchError(Exception):
+    """
+    Raised when a checkpoint was written for a different input file
+    """
+
+
+def _nest(row: Dict[str, str]) -> Dict[str, Any]:
+    """
+    Turn dotted CSV columns (user.age, symptoms.cough_gt_2_weeks, ...) into
+    the nested screening document; empty cells are left out (so model
+    defaults apply) but their sections are kept
+    """
+    document: Dict[str, Any] = {section: {} for section in OPTIONAL_SECTIONS}
+    for column, value in row.items():
+        if column is None:
+            continue  # extra cells past the header
+        *parents, leaf = column.strip().split(".")
+        target = document
+        for part in parents:
+            target = target.setdefault(part, {})
+        if value is None or value.strip() == "":
+            continue
+        value = value.strip()
+        if column in LIST_COLUMNS:
+            value = [item.strip() for item in value.split(LIST_SEPARATOR) if item.strip()]
+        target[leaf] = value
+    return document
+
+
+def read_screening_rows(path: str, skip: int = 0) -> Iterator[Tuple[int, Any]]:
+    """
+    Stream (row number, screening document) pairs from a CSV or JSONL file,
+    one row at a time. Rows are numbered from 1; the first skip rows are
+    read past without parsing. Unparseable JSON lines yield the exception.
+    """
+    with open(path, newline="", encoding="utf-8-sig") as file:
+        if path.lower().endswith(".csv"):
+            rows = enumerate(csv.DictReader(file), start=1)
+            for number, row in itertools.islice(rows, skip, None):
+                yield number, _nest(row)
+        else:
+            lines = enumerate((line for line in file if line.strip()), start=1)
+            for number, line in itertools.islice(lines, skip, None):
+                try:
+                    yield number, json.loads(line)
+                except ValueError as e:
+                    yield number, e
+
+
+def parse_screened_at(value: Any) -> datetime:
+    """
+    Screening date of a row: an ISO 8601 date or date-time, stored as naive
+    UTC like the sessions /api/analyze writes
+    """
+    if not isinstance(value, str):
+        raise ValueError(f"Invalid screened_at: {value!r}")
+    try:
+        screened_at = datetime.fromisoformat(value.strip())
+    except ValueError:
+        raise ValueError(f"Invalid screened_at: {value!r} (expected an ISO 8601 date or date-time)")
+    if screened_at.tzinfo is not None:
+        screened_at = screened_at.astimezone(timezone.utc).replace(tzinfo=None)
+    return screened_at
+
+
+async def screen_rows(analysis_service: AnalysisService,
+                      rows: List[Tuple[int, Any, str]]) -> List[Tuple[Dict, Optional[Dict]]]:
+    """
+    Validate and analyze (row number, screening document, default session id)
+    rows. Returns a result record and session document per row; invalid rows
+    get an error record and no session.
+    """
+    screened = []
+    for number, document, session_id in rows:
+        try:
+            if isinstance(document, Exception):
+                raise document
+            user_location = document.pop("user_location", None)
+            if user_location:
+                user_location = {key: float(value) for key, value in user_location.items()}
+            screened_at = document.pop("screened_at", None)
+            # Camp data is often imported days after the screening took place
+            created_at = parse_screened_at(screened_at) if screened_at else datetime.utcnow()
+            screening_request = ScreeningRequest(**document)
+        except (ValidationError, ValueError, TypeError) as e:
+            screened.append(({"row": number, "error": str(e)}, None))
+            continue
+
+        screening_request.session_id = screening_request.session_id or session_id
+        analysis_result = await analysis_service.analyze_screening(screening_request, user_location)
+        session = ScreeningSession(
+            id=analysis_result.session_id,
+            user_info=screening_request.user,
+            symptoms=screening_request.symptoms,
+            deep_questions=screening_request.deep_questions,
+            uploads=screening_request.uploads,
+            local_score=screening_request.local_score,
+            analysis_result=analysis_result,
+            created_at=created_at,
+            updated_at=created_at
+        )
+        screened.append((
+            {"row": number, **analysis_result.dict()},
+            session.dict(exclude={'uploads': {'__all__': {'content_base64'}}})
+        ))
+    return screened
+
+
+def screen_shard(rows: List[Tuple[int, Any, str]]) -> List[Tuple[Dict, Optional[Dict]]]:
+    """
+    screen_rows with the worker's AnalysisService (entry point for worker processes)
+    """
+    return run_in_worker(screen_rows(worker_analysis_service(), rows))
+
+
+class BatchCheckpoint:
+    """
+    Progress of a batch run, saved after every committed chunk: rows done,
+    the results file size at that point and the job id session ids derive
+    from. Written atomically, so an interrupted run resumes from the last
+    complete chunk.
+    """
+
+    def __init__(self, path: str, input_path: str, job_id: Optional[str] = None,
+                 rows_done: int = 0, output_offset: int = 0, counts: Optional[Dict[str, int]] = None):
+        self.path = Path(path)
+        self.input_path = input_path
+        self.job_id = job_id or str(uuid.uuid4())
+        self.rows_done = rows_done
+        self.output_offset = output_offset
+        self.counts = counts or {"analyzed": 0, "invalid": 0, "stored": 0}
+
+    @staticmethod
+    def _fingerprint(input_path: str) -> Dict[str, Any]:
+        return {"input": os.path.abspath(input_path), "input_size": os.path.getsize(input_path)}
+
+    @classmethod
+    def load_or_create(cls, path: str, input_path: str) -> "BatchCheckpoint":
+        """
+        Resume from an existing checkpoint for input_path, or start a new one
+        """
+        try:
+            with open(path) as file:
+                saved = json.load(file)
+        except FileNotFoundError:
+            return cls(path, input_path)
+
+        expected = cls._fingerprint(input_path)
+        if any(saved.get(key) != value for key, value in expected.items()):
+            raise CheckpointMismatchError(
+                f"Checkpoint {path} belongs to {saved.get('input')}; remove it to start over"
+            )
+        return cls(path, input_path, saved["job_id"], saved["rows_done"],
+                   saved["output_offset"], saved["counts"])
+
+    def session_id(self, row_number: int) -> str:
+        # Stable across resumes, so re-run rows hit the unique index on id
+        return str(uuid.uuid5(uuid.UUID(self.job_id), str(row_number)))
+
+    def save(self) -> None:
+        state = dict(self._fingerprint(self.input_path), job_id=self.job_id, rows_done=self.rows_done,
+                     output_offset=self.output_offset, counts=self.counts)
+        staged = self.path.with_name(self.path.name + ".tmp")
+        with open(staged, "w") as file:
+            json.dump(state, file)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(staged, self.path)
+
+    def remove(self) -> None:
+        self.path.unlink(missing_ok=True)
+
+
+class BatchScreeningRunner:
+    """
+    Offline screening of camp data: rows are validated as ScreeningRequest,
+    analyzed, stored in screening_sessions with one insert_many per chunk
+    (and counted in screening_rollups) and written to a results file. Only
+    one chunk is held in memory at a time. With a parallel_analyzer, each
+    chunk is validated and analyzed in its worker processes instead of by
+    analysis_service.
+
+    Inline upload content is moved to blob_store first, as /api/analyze does;
+    without a database and blob store, rows carrying it are rejected.
+    """
+
+    def __init__(self, analysis_service: AnalysisService, db: Optional[AsyncIOMotorDatabase] = None,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE, progress_interval: float = 5.0,
+                 parallel_analyzer: Optional[ParallelAnalyzer] = None,
+                 blob_store: Optional[BlobStore] = None):
+        self.analysis_service = analysis_service
+        self.parallel_analyzer = parallel_analyzer
+        self.db = db
+        self.blob_store = blob_store
+        self.chunk_size = chunk_size
+        self.progress_interval = progress_interval
+
+    async def run(self, input_path: str, output_path: str,
+                  checkpoint_path: Optional[str] = None) -> Dict[str, int]:
+        """
+        Process input_path into output_path, resuming from checkpoint_path
+        (default: <output_path>.checkpoint) if a previous run was interrupted
+        """
+        checkpoint = BatchCheckpoint.load_or_create(checkpoint_path or f"{output_path}.checkpoint", input_path)
+        if checkpoint.rows_done:
+            logger.info(f"Resuming {input_path} after row {checkpoint.rows_done}")
+
+        # Drop results written after the last checkpoint; those rows run again
+        if os.path.exists(output_path):
+            os.truncate(output_path, checkpoint.output_offset if checkpoint.rows_done else 0)
+        as_csv = output_path.lower().endswith(".csv")
+
+        started = last_report = time.perf_counter()
+        processed = 0
+        with open(output_path, "a", newline="", encoding="utf-8") as output:
+            writer = csv.DictWriter(output, RESULT_COLUMNS) if as_csv else None
+            if writer and output.tell() == 0:
+                writer.writeheader()
+
+            rows = read_screening_rows(input_path, skip=checkpoint.rows_done)
+            while True:
+                chunk = list(itertools.islice(rows, self.chunk_size))
+                if not chunk:
+                    break
+
+                records, sessions = await self._process_chunk(chunk, checkpoint)
+                checkpoint.counts["stored"] += await self._store(sessions)
+                for record in records:
+                    if writer:
+                        writer.writerow(self._flatten(record))
+                    else:
+                        output.write(json.dumps(record, default=str) + "\n")
+                output.flush()
+
+                checkpoint.rows_done = chunk[-1][0]
+                checkpoint.output_offset = output.tell()
+                checkpoint.save()
+
+                processed += len(chunk)
+                now = time.perf_counter()
+                if now - last_report >= self.progress_interval:
+                    logger.info(f"{checkpoint.rows_done} rows done ({processed / (now - started):.0f} rows/s)")
+                    last_report = now
+
+        elapsed = time.perf_counter() - started
+        logger.info(f"Finished {input_path}: {checkpoint.rows_done} rows, {processed} this run "
+                    f"({processed / elapsed if elapsed else 0:.0f} rows/s), {checkpoint.counts}")
+        checkpoint.remove()
+        return dict(checkpoint.counts, rows=checkpoint.rows_done)
+
+    async def _process_chunk(self, chunk: List[Tuple[int, Any]],
+                             checkpoint: BatchCheckpoint) -> Tuple[List[Dict], List[Dict]]:
+        rows = [(number, await self._store_uploads(document), checkpoint.session_id(number))
+                for number, document in chunk]
+        if self.parallel_analyzer is not None:
+            screened = await self.parallel_analyzer.map_shards(screen_shard, rows)
+        else:
+            screened = await screen_rows(self.analysis_service, rows)
+
+        records, sessions = [], []
+        for record, session in screened:
+            records.append(record)
+            if session is None:
+                checkpoint.counts["invalid"] += 1
+            else:
+                checkpoint.counts["analyzed"] += 1
+                sessions.append(session)
+        return records, sessions
+
+    async def _store_uploads(self, document: Any) -> Any:
+        """
+        The row with its uploads resolved to references, or the error that
+        makes it invalid
+        """
+        uploads = document.get("uploads") if isinstance(document, dict) else None
+        if not uploads:
+            return document
+        inline = any(isinstance(upload, dict) and upload.get("content_base64") for upload in uploads)
+        if self.db is None or self.blob_store is None:
+            if inline:
+                return ValueError("Inline upload content needs the database and blob store; "
+                                  "reference uploaded files by file_id instead")
+            return document
+        try:
+            resolved = await UploadedFileRepository(self.db, self.blob_store).resolve(
+                [FileUpload(**upload) for upload in uploads]
+            )
+        except (ValidationError, TypeError, UploadReferenceError) as e:
+            return ValueError(str(e))
+        return dict(document, uploads=[upload.dict() for upload in resolved])
+
+    async def _store(self, sessions: List[Dict]) -> int:
+        if self.db is None or not sessions:
+            return 0
+        try:
+            await self.db.screening_sessions.insert_many(sessions, ordered=False)
+            stored = sessions
+        except BulkWriteError as e:
+            # Rows re-run after a resume are already stored
+            failed = [error for error in e.details.get("writeErrors", [])
+                      if error.get("code") != DUPLICATE_KEY]
+            if failed:
+                raise
+            stored = stored_documents(sessions, e)
+        await ScreeningRollupRepository(self.db).record(stored)
+        return len(stored)
+
+    @staticmethod
+    def _flatten(record: Dict[str, Any]) -> Dict[str, Any]:
+        flat = {column: record.get(column) for column in RESULT_COLUMNS}
+        if flat["recommended_tests"] is not None:
+            flat["recommended_tests"] = LIST_SEPARATOR.join(flat["recommended_tests"])
+        return flat
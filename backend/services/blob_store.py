@@ -0,0 +1,433 @@
+from abc import ABC, abstractmethod
+from motor.motor_asyncio import AsyncIOMotorDatabase, AsyncIOMotorGridFSBucket
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, Optional
+import asyncio
+import hashlib
+import io
+import os
+import tempfile
+import uuid
+import logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_GRIDFS_BUCKET = "upload_blobs"
+DEFAULT_STREAM_CHUNK_SIZE = 64 * 1024
+
+
+class BlobNotFoundError(Exception):
+    """
+    Raised when a blob key is not present in the store
+    """
+
+
+def content_key(data: bytes) -> str:
+    """
+    Blob key for some content: its SHA-256 hex digest
+    """
+    return hashlib.sha256(data).hexdigest()
+
+
+class BlobWriter(ABC):
+    """
+    Incremental write of one blob whose key is only known at the end.
+
+    Chunks go to a staging location; commit(key) moves them under the key,
+    or discards them if that content is already stored.
+    """
+
+    @abstractmethod
+    async def write(self, chunk: bytes) -> None:
+        ...
+
+    @abstractmethod
+    async def commit(self, key: str, content_type: Optional[str] = None) -> None:
+        ...
+
+    @abstractmethod
+    async def abort(self) -> None:
+        """
+        Discard staged data (safe to call more than once, or after commit)
+        """
+
+
+class BlobStore(ABC):
+    """
+    Content-addressed storage for uploaded files.
+
+    Blobs are keyed by the SHA-256 of their bytes, so storing the same content
+    twice keeps a single copy. Metadata (file name, type, uploader) lives with
+    the caller; a store only maps keys to bytes.
+    """
+
+    kind = "base"
+
+    @abstractmethod
+    async def exists(self, key: str) -> bool:
+        ...
+
+    @abstractmethod
+    async def _write(self, key: str, data: bytes, content_type: Optional[str]) -> None:
+        ...
+
+    @abstractmethod
+    async def get(self, key: str) -> bytes:
+        ...
+
+    @abstractmethod
+    async def delete(self, key: str) -> None:
+        ...
+
+    @abstractmethod
+    async def open_reader(self, key: str, start: int = 0, end: Optional[int] = None,
+                          chunk_size: int = DEFAULT_STREAM_CHUNK_SIZE) -> AsyncIterator[bytes]:
+        """
+        Chunks of bytes [start, end) of a blob, read as they are consumed.
+
+        Raises BlobNotFoundError here rather than on the first chunk, so
+        callers can answer 404 before sending response headers.
+        """
+
+    @abstractmethod
+    async def open_writer(self) -> BlobWriter:
+        """
+        Start a streamed write; see BlobWriter
+        """
+
+    async def put(self, data: bytes, content_type: Optional[str] = None) -> str:
+        """
+        Store data (unless already present) and return its key
+        """
+        key = content_key(data)
+        if await self.exists(key):
+            logger.info(f"Blob {key[:12]} already stored, skipping write")
+            return key
+        await self._write(key, data, content_type)
+        return key
+
+
+class FilesystemBlobStore(BlobStore):
+    """
+    Blobs as files under a root directory, sharded by key prefix
+    """
+
+    kind = "filesystem"
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, key: str) -> Path:
+        if len(key) != 64 or not all(c in "0123456789abcdef" for c in key):
+            raise BlobNotFoundError(key)
+        return self.root / key[:2] / key[2:4] / key
+
+    async def exists(self, key: str) -> bool:
+        try:
+            return await asyncio.to_thread(self._path(key).is_file)
+        except BlobNotFoundError:
+            return False
+
+    async def _write(self, key: str, data: bytes, content_type: Optional[str]) -> None:
+        await asyncio.to_thread(self._write_sync, self._path(key), data)
+
+    def _write_sync(self, path: Path, data: bytes) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        temp_path.write_bytes(data)
+        os.replace(temp_path, path)
+
+    async def get(self, key: str) -> bytes:
+        try:
+            return await asyncio.to_thread(self._path(key).read_bytes)
+        except FileNotFoundError:
+            raise BlobNotFoundError(key)
+
+    async def delete(self, key: str) -> None:
+        try:
+            await asyncio.to_thread(self._path(key).unlink)
+        except FileNotFoundError:
+            pass
+
+    async def open_reader(self, key: str, start: int = 0, end: Optional[int] = None,
+                          chunk_size: int = DEFAULT_STREAM_CHUNK_SIZE) -> AsyncIterator[bytes]:
+        try:
+            file = await asyncio.to_thread(open, self._path(key), "rb")
+        except FileNotFoundError:
+            raise BlobNotFoundError(key)
+        return self._read_file(file, start, end, chunk_size)
+
+    async def _read_file(self, file, start: int, end: Optional[int], chunk_size: int) -> AsyncIterator[bytes]:
+        try:
+            await asyncio.to_thread(file.seek, start)
+            remaining = None if end is None else end - start
+            while remaining is None or remaining > 0:
+                size = chunk_size if remaining is None else min(chunk_size, remaining)
+                chunk = await asyncio.to_thread(file.read, size)
+                if not chunk:
+                    break
+                if remaining is not None:
+                    remaining -= len(chunk)
+                yield chunk
+        finally:
+            file.close()
+
+    async def open_writer(self) -> BlobWriter:
+        staging_dir = self.root / ".staging"
+        staging_dir.mkdir(exist_ok=True)
+        return _StagedFileWriter(staging_dir / f"{uuid.uuid4().hex}.tmp", self._commit_staged)
+
+    def _commit_staged(self, staged: Path, key: str, content_type: Optional[str]) -> None:
+        path = self._path(key)
+        if path.is_file():
+            staged.unlink()
+            return
+        path.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(staged, path)
+
+
+class _StagedFileWriter(BlobWriter):
+    """
+    Writes chunks to a local staging file, then hands it to a commit callback
+    (run in a thread) that moves or uploads it under its key
+    """
+
+    def __init__(self, staged: Path, commit_staged):
+        self.staged = staged
+        self._commit_staged = commit_staged
+        self._file = open(staged, "wb")
+
+    async def write(self, chunk: bytes) -> None:
+        await asyncio.to_thread(self._file.write, chunk)
+
+    async def commit(self, key: str, content_type: Optional[str] = None) -> None:
+        self._file.close()
+        await asyncio.to_thread(self._commit_staged, self.staged, key, content_type)
+
+    async def abort(self) -> None:
+        self._file.close()
+        try:
+            self.staged.unlink()
+        except FileNotFoundError:
+            pass
+
+
+class GridFSBlobStore(BlobStore):
+    """
+    Blobs in a GridFS bucket of the application database, one file per key
+    """
+
+    kind = "gridfs"
+
+    def __init__(self, db: AsyncIOMotorDatabase, bucket_name: str = DEFAULT_GRIDFS_BUCKET):
+        self.db = db
+        self.bucket_name = bucket_name
+        self.files = db[f"{bucket_name}.files"]
+        self._bucket: Optional[AsyncIOMotorGridFSBucket] = None
+
+    @property
+    def bucket(self) -> AsyncIOMotorGridFSBucket:
+        # Built on first use: most requests that get a store never touch it
+        if self._bucket is None:
+            self._bucket = AsyncIOMotorGridFSBucket(self.db, bucket_name=self.bucket_name)
+        return self._bucket
+
+    async def exists(self, key: str) -> bool:
+        return await self.files.find_one({"filename": key}, {"_id": 1}) is not None
+
+    async def _write(self, key: str, data: bytes, content_type: Optional[str]) -> None:
+        await self.bucket.upload_from_stream(key, data, metadata={"content_type": content_type})
+
+    async def get(self, key: str) -> bytes:
+        document = await self.files.find_one({"filename": key}, {"_id": 1})
+        if document is None:
+            raise BlobNotFoundError(key)
+        stream = await self.bucket.open_download_stream(document["_id"])
+        return await stream.read()
+
+    async def delete(self, key: str) -> None:
+        async for document in self.files.find({"filename": key}, {"_id": 1}):
+            await self.bucket.delete(document["_id"])
+
+    async def open_reader(self, key: str, start: int = 0, end: Optional[int] = None,
+                          chunk_size: int = DEFAULT_STREAM_CHUNK_SIZE) -> AsyncIterator[bytes]:
+        document = await self.files.find_one({"filename": key}, {"_id": 1})
+        if document is None:
+            raise BlobNotFoundError(key)
+        grid_out = await self.bucket.open_download_stream(document["_id"])
+        grid_out.seek(start)
+        return self._read_grid_out(grid_out, start, end, chunk_size)
+
+    async def _read_grid_out(self, grid_out, start: int, end: Optional[int],
+                             chunk_size: int) -> AsyncIterator[bytes]:
+        # read(n) fetches only the GridFS chunks (255 KiB each) covering n bytes
+        remaining = (grid_out.length if end is None else min(end, grid_out.length)) - start
+        while remaining > 0:
+            chunk = await grid_out.read(min(chunk_size, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+    async def open_writer(self) -> BlobWriter:
+        return _GridFSWriter(self)
+
+
+class _GridFSWriter(BlobWriter):
+    """
+    Streams chunks into a GridFS file under a staging name, renamed to its
+    key on commit
+    """
+
+    def __init__(self, store: GridFSBlobStore):
+        self.store = store
+        self.grid_in = store.bucket.open_upload_stream(f"staging/{uuid.uuid4().hex}")
+        self._done = False
+
+    async def write(self, chunk: bytes) -> None:
+        await self.grid_in.write(chunk)
+
+    async def commit(self, key: str, content_type: Optional[str] = None) -> None:
+        await self.grid_in.close()
+        self._done = True
+        if await self.store.exists(key):
+            await self.store.bucket.delete(self.grid_in._id)
+            return
+        await self.store.bucket.rename(self.grid_in._id, key)
+        await self.store.files.update_one({"_id": self.grid_in._id},
+                                          {"$set": {"metadata": {"content_type": content_type}}})
+
+    async def abort(self) -> None:
+        if not self._done:
+            self._done = True
+            await self.grid_in.abort()
+
+
+class S3BlobStore(BlobStore):
+    """
+    Blobs in an S3-compatible bucket (AWS S3, MinIO), one object per key
+    """
+
+    kind = "s3"
+
+    def __init__(self, bucket: str, prefix: str = "", client: Any = None,
+                 endpoint_url: Optional[str] = None):
+        if client is None:
+            import boto3
+            client = boto3.client("s3", endpoint_url=endpoint_url)
+        self.client = client
+        self.bucket = bucket
+        self.prefix = prefix
+
+    def _object_key(self, key: str) -> str:
+        return f"{self.prefix}{key}"
+
+    def _is_missing(self, error: Exception) -> bool:
+        code = getattr(error, "response", {}).get("Error", {}).get("Code")
+        return code in ("404", "NoSuchKey", "NotFound")
+
+    async def exists(self, key: str) -> bool:
+        try:
+            await asyncio.to_thread(self.client.head_object, Bucket=self.bucket, Key=self._object_key(key))
+            return True
+        except Exception as e:
+            if self._is_missing(e):
+                return False
+            raise
+
+    async def _write(self, key: str, data: bytes, content_type: Optional[str]) -> None:
+        extra = {"ContentType": content_type} if content_type else {}
+        await asyncio.to_thread(self.client.put_object, Bucket=self.bucket,
+                                Key=self._object_key(key), Body=data, **extra)
+
+    async def get(self, key: str) -> bytes:
+        try:
+            response = await asyncio.to_thread(self.client.get_object, Bucket=self.bucket,
+                                               Key=self._object_key(key))
+        except Exception as e:
+            if self._is_missing(e):
+                raise BlobNotFoundError(key)
+            raise
+        return await asyncio.to_thread(response["Body"].read)
+
+    async def delete(self, key: str) -> None:
+        await asyncio.to_thread(self.client.delete_object, Bucket=self.bucket, Key=self._object_key(key))
+
+    async def open_reader(self, key: str, start: int = 0, end: Optional[int] = None,
+                          chunk_size: int = DEFAULT_STREAM_CHUNK_SIZE) -> AsyncIterator[bytes]:
+        # Ranged GET, so S3 only sends the requested bytes
+        if end is not None and end <= start:
+            return self._read_body(io.BytesIO(), chunk_size)
+        extra = {}
+        if start or end is not None:
+            extra["Range"] = f"bytes={start}-{'' if end is None else end - 1}"
+        try:
+            response = await asyncio.to_thread(self.client.get_object, Bucket=self.bucket,
+                                               Key=self._object_key(key), **extra)
+        except Exception as e:
+            if self._is_missing(e):
+                raise BlobNotFoundError(key)
+            raise
+        return self._read_body(response["Body"], chunk_size)
+
+    async def _read_body(self, body, chunk_size: int) -> AsyncIterator[bytes]:
+        try:
+            while True:
+                chunk = await asyncio.to_thread(body.read, chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+        finally:
+            body.close()
+
+    async def open_writer(self) -> BlobWriter:
+        # Stage on local disk: S3 multipart parts must be at least 5 MB
+        handle, staged = tempfile.mkstemp(suffix=".blob")
+        os.close(handle)
+        return _StagedFileWriter(Path(staged), self._commit_staged)
+
+    def _commit_staged(self, staged: Path, key: str, content_type: Optional[str]) -> None:
+        try:
+            try:
+                self.client.head_object(Bucket=self.bucket, Key=self._object_key(key))
+                return
+            except Exception as e:
+                if not self._is_missing(e):
+                    raise
+            extra = {"ContentType": content_type} if content_type else {}
+            self.client.upload_file(str(staged), self.bucket, self._object_key(key), ExtraArgs=extra)
+        finally:
+            staged.unlink()
+
+
+# Filesystem and S3 stores hold no per-request state; build them once
+_shared_stores: Dict[str, BlobStore] = {}
+
+
+def blob_store_from_env(db: AsyncIOMotorDatabase) -> BlobStore:
+    """
+    Blob store selected by BLOB_STORE (gridfs, filesystem or s3).
+
+    gridfs (default) uses BLOB_STORE_GRIDFS_BUCKET in the given database;
+    filesystem uses BLOB_STORE_DIR; s3 uses BLOB_STORE_S3_BUCKET,
+    BLOB_STORE_S3_PREFIX and BLOB_STORE_S3_ENDPOINT_URL (e.g. a local MinIO).
+    """
+    kind = os.environ.get("BLOB_STORE", "gridfs").lower()
+    if kind == "gridfs":
+        return GridFSBlobStore(db, os.environ.get("BLOB_STORE_GRIDFS_BUCKET", DEFAULT_GRIDFS_BUCKET))
+
+    store = _shared_stores.get(kind)
+    if store is None:
+        if kind == "filesystem":
+            store = FilesystemBlobStore(os.environ.get("BLOB_STORE_DIR", "uploads"))
+        elif kind == "s3":
+            store = S3BlobStore(
+                bucket=os.environ["BLOB_STORE_S3_BUCKET"],
+                prefix=os.environ.get("BLOB_STORE_S3_PREFIX", ""),
+                endpoint_url=os.environ.get("BLOB_STORE_S3_ENDPOINT_URL") or None
+            )
+        else:
+            raise ValueError(f"Unknown BLOB_STORE: {kind}")
+        _shared_stores[kind] = store
+    return store
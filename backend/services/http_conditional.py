@@ -0,0 +1,43 @@
+from typing import Optional, Tuple
+
+
+def etag_matches(if_none_match: Optional[str], key: Optional[str]) -> bool:
+    """
+    Whether an If-None-Match header lists the entity tag key (or *)
+    """
+    if not if_none_match or not key:
+        return False
+    tags = [tag.strip().removeprefix("W/").strip('"') for tag in if_none_match.split(",")]
+    return "*" in tags or key in tags
+
+
+def parse_range(range_header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    Byte range [start, end) requested by a Range header for a size-byte
+    entity, or None to send the whole entity (no header, an unsupported unit
+    or several ranges). Raises ValueError when the range is unsatisfiable.
+    """
+    if not range_header:
+        return None
+    unit, _, spec = range_header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+
+    first, dash, last = (part.strip() for part in spec.partition("-"))
+    if not dash or not (first or last) or not all(part.isdigit() for part in (first, last) if part):
+        return None  # malformed: ignored, as RFC 7233 allows
+
+    if not first:
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0 or size == 0:
+            raise ValueError(range_header)
+        return max(size - length, 0), size
+
+    start = int(first)
+    end = int(last) + 1 if last else size
+    if last and end <= start:
+        return None  # last-byte-pos before first-byte-pos: invalid, ignored
+    if start >= size:
+        raise ValueError(range_header)
+    return start, min(end, size)
@@ -0,0 +1,270 @@
+from bisect import bisect_left
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+import math
+import os
+import threading
+import time
+
+# Seconds; fine-grained at the low end because most analyze stages take microseconds
+LATENCY_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+                   0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (1024, 10 * 1024, 100 * 1024, 512 * 1024, 1024 ** 2, 2 * 1024 ** 2,
+                5 * 1024 ** 2, 10 * 1024 ** 2)
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _labels(self, labelvalues: Tuple[str, ...], extra: str = "") -> str:
+        pairs = [f'{name}="{_escape(value)}"' for name, value in zip(self.labelnames, labelvalues)]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    """
+    Monotonic total per label combination
+    """
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, *labelvalues: str) -> None:
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        with self._lock:
+            values = sorted(self._values.items())
+        lines.extend(f"{self.name}{self._labels(labels)} {_format_value(value)}" for labels, value in values)
+        return lines
+
+
+class Histogram(_Metric):
+    """
+    Bucketed observations per label combination.
+
+    observe() only appends to a lock-free queue (deque appends are atomic),
+    so the request path never takes the lock or searches the buckets;
+    queued observations are folded into the buckets when the histogram is
+    read, or once MAX_PENDING of them have accumulated between scrapes.
+    """
+
+    kind = "histogram"
+    MAX_PENDING = 10000
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+        self._series: Dict[Tuple[str, ...], list] = {}  # labels -> [bucket counts, sum, count]
+        self._pending: deque = deque()
+
+    def observe(self, value: float, *labelvalues: str) -> None:
+        self._pending.append((labelvalues, value))
+        if len(self._pending) > self.MAX_PENDING:
+            self._fold()
+
+    def _fold(self) -> None:
+        with self._lock:
+            pending, buckets, series_by_labels = self._pending, self.buckets, self._series
+            for _ in range(len(pending)):
+                labelvalues, value = pending.popleft()
+                series = series_by_labels.get(labelvalues)
+                if series is None:
+                    series = series_by_labels[labelvalues] = [[0] * (len(buckets) + 1), 0.0, 0]
+                series[0][bisect_left(buckets, value)] += 1
+                series[1] += value
+                series[2] += 1
+
+    def snapshot(self, *labelvalues: str) -> Optional[Dict[str, float]]:
+        """
+        Count and sum of one series (None if nothing was observed)
+        """
+        self._fold()
+        with self._lock:
+            series = self._series.get(labelvalues)
+            return {"count": series[2], "sum": series[1]} if series else None
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        self._fold()
+        with self._lock:
+            series = sorted((labels, [list(counts), total, count])
+                            for labels, (counts, total, count) in self._series.items())
+        for labels, (counts, total, count) in series:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (math.inf,), counts):
+                cumulative += bucket_count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{self._labels(labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{self._labels(labels)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{self._labels(labels)} {count}")
+        return lines
+
+
+class StageClock:
+    """
+    Times consecutive stages of one request: lap(stage) records the time
+    since the previous lap (or since started) and restarts the clock, so each
+    stage costs one clock read
+    """
+
+    __slots__ = ("histogram", "enabled", "last")
+
+    def __init__(self, histogram: Histogram, enabled: bool = True, started: Optional[float] = None):
+        self.histogram = histogram
+        self.enabled = enabled
+        self.last = (started or time.perf_counter()) if enabled else 0.0
+
+    def lap(self, stage: str) -> None:
+        if self.enabled:
+            now = time.perf_counter()
+            self.histogram.observe(now - self.last, stage)
+            self.last = now
+
+    def restart(self) -> None:
+        """
+        Skip time already recorded elsewhere (e.g. by a nested clock)
+        """
+        if self.enabled:
+            self.last = time.perf_counter()
+
+
+class MetricsRegistry:
+    """
+    Process-wide metrics rendered in the Prometheus text format.
+
+    Disabled registries (METRICS_ENABLED=0) keep their metrics but stage()
+    and clocks skip the clock reads, so instrumented code costs a branch.
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._metrics: Dict[str, _Metric] = {}
+
+    @classmethod
+    def from_env(cls) -> "MetricsRegistry":
+        return cls(enabled=os.environ.get("METRICS_ENABLED", "1").lower() not in ("0", "false", "no"))
+
+    def _register(self, metric: _Metric) -> _Metric:
+        existing = self._metrics.get(metric.name)
+        if existing is not None:
+            return existing
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def clock(self, histogram: Histogram, started: Optional[float] = None) -> StageClock:
+        """
+        A StageClock over histogram, optionally running since started (perf_counter)
+        """
+        return StageClock(histogram, self.enabled, started)
+
+    @contextmanager
+    def stage(self, histogram: Histogram, *labelvalues: str) -> Iterator[None]:
+        """
+        Time the enclosed block into histogram (seconds)
+        """
+        if not self.enabled:
+            yield
+            return
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            histogram.observe(time.perf_counter() - started, *labelvalues)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+metrics = MetricsRegistry.from_env()
+
+# Shared instruments
+ANALYZE_STAGE_SECONDS = metrics.histogram(
+    "tb_analyze_stage_seconds", "Time spent in each stage of /api/analyze", ["stage"])
+HTTP_REQUEST_SECONDS = metrics.histogram(
+    "tb_http_request_duration_seconds", "HTTP request latency by route template",
+    ["method", "route", "status"])
+PDF_RENDER_SECONDS = metrics.histogram(
+    "tb_pdf_render_seconds", "PDF report time by source (cache hit or render pool)", ["source"])
+UPLOAD_SIZE_BYTES = metrics.histogram(
+    "tb_upload_size_bytes", "Size of accepted uploads", ["content_type"], SIZE_BUCKETS)
+UPLOAD_BYTES_TOTAL = metrics.counter(
+    "tb_upload_bytes_total", "Bytes of accepted uploads")
+MONGO_COMMAND_SECONDS = metrics.histogram(
+    "tb_mongo_command_duration_seconds", "MongoDB command latency as reported by the driver",
+    ["command", "outcome"])
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware timing every HTTP request into HTTP_REQUEST_SECONDS by
+    route template (not raw path, to bound label cardinality). The start
+    time is left in scope["state"]["request_started"] for per-stage clocks.
+    """
+
+    def __init__(self, app, registry: MetricsRegistry = metrics):
+        self.app = app
+        self.registry = registry
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.registry.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        scope.setdefault("state", {})["request_started"] = started
+        status = [500]
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get("route")
+            HTTP_REQUEST_SECONDS.observe(
+                time.perf_counter() - started,
+                scope["method"], getattr(route, "path", "unmatched"), str(status[0])
+            )
@@ -0,0 +1,161 @@
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Union
+from models.screening import Referral, ScreeningRequest
+from services.analysis import AnalysisService
+from services.process_pool import BoundedProcessPool
+from services.referrals import ReferralService
+from services.scoring import TBScoringService
+import asyncio
+import math
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SHARD_SIZE = 256
+MIN_SHARD_SIZE = 16
+
+# Per-worker state, set up once by init_analysis_worker
+_worker_analysis_service: Optional[AnalysisService] = None
+_worker_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def init_analysis_worker(referral_centers: Optional[List[Dict]] = None) -> None:
+    """
+    Build the worker's AnalysisService (scoring tables, referral index) once
+    """
+    global _worker_analysis_service, _worker_loop
+    referral_service = ReferralService(
+        [Referral(**center) for center in referral_centers] if referral_centers else None
+    )
+    _worker_analysis_service = AnalysisService(TBScoringService(), referral_service)
+    _worker_loop = asyncio.new_event_loop()
+
+
+def worker_analysis_service() -> AnalysisService:
+    """
+    The AnalysisService of the current worker process
+    """
+    if _worker_analysis_service is None:
+        init_analysis_worker()
+    return _worker_analysis_service
+
+
+def run_in_worker(coroutine: Awaitable) -> Any:
+    """
+    Run a coroutine on the worker's event loop (AnalysisService is async)
+    """
+    worker_analysis_service()
+    return _worker_loop.run_until_complete(coroutine)
+
+
+def analyze_shard(items: List[tuple]) -> List[Dict]:
+    """
+    Analyze (screening request dict, user location) pairs and return result
+    dicts (entry point for worker processes)
+    """
+    service = worker_analysis_service()
+
+    async def analyze_all():
+        results = []
+        for request_data, location in items:
+            result = await service.analyze_screening(ScreeningRequest(**request_data), location)
+            results.append(result.dict())
+        return results
+
+    return run_in_worker(analyze_all())
+
+
+class ParallelAnalyzer:
+    """
+    Runs AnalysisService work over a batch of screenings on several cores.
+
+    The batch is cut into shards of up to shard_size items, so each pool job
+    carries a few hundred screenings, and at most two shards per worker are
+    in flight. Shards travel as plain dicts and workers validate and dump the
+    models themselves: pickling pydantic models costs more than the analysis
+    and would keep the parent process from feeding more than a few workers.
+    Every worker holds one pre-initialized AnalysisService and
+    ReferralService. Results keep the input order.
+    """
+
+    def __init__(self, workers: int, shard_size: int = DEFAULT_SHARD_SIZE,
+                 referral_centers: Optional[List[Referral]] = None):
+        if workers < 1:
+            raise ValueError("ParallelAnalyzer needs at least one worker")
+        self.workers = workers
+        self.shard_size = shard_size
+        centers = [center.dict() for center in referral_centers] if referral_centers else None
+        self.pool = BoundedProcessPool(
+            max_workers=workers,
+            max_pending=workers * 2,
+            initializer=init_analysis_worker,
+            initargs=(centers,)
+        )
+
+    @classmethod
+    def from_env(cls, workers: Optional[int] = None,
+                 referral_centers: Optional[List[Referral]] = None) -> "ParallelAnalyzer":
+        """
+        Build an analyzer sized by BATCH_ANALYSIS_WORKERS (default: all cores)
+        and BATCH_ANALYSIS_SHARD_SIZE
+        """
+        if workers is None:
+            workers = int(os.environ.get("BATCH_ANALYSIS_WORKERS", os.cpu_count() or 1))
+        return cls(
+            workers=workers,
+            shard_size=int(os.environ.get("BATCH_ANALYSIS_SHARD_SIZE", DEFAULT_SHARD_SIZE)),
+            referral_centers=referral_centers
+        )
+
+    def shard_length(self, batch_length: int) -> int:
+        # Small batches still spread over every worker
+        return min(self.shard_size, max(MIN_SHARD_SIZE, math.ceil(batch_length / self.workers)))
+
+    async def map_shards(self, fn: Callable[[List], List], items: Sequence) -> List:
+        """
+        Run fn (a picklable module-level function) over shards of items in the
+        worker processes; fn gets a list of items and returns one result each
+        """
+        size = self.shard_length(len(items))
+        shards = [list(items[i:i + size]) for i in range(0, len(items), size)]
+
+        results: List[Optional[List]] = [None] * len(shards)
+        in_flight = {}
+        try:
+            for index, shard in enumerate(shards):
+                if len(in_flight) >= self.pool.max_pending:
+                    await self._collect(in_flight, results, asyncio.FIRST_COMPLETED)
+                in_flight[asyncio.ensure_future(self.pool.run(fn, shard))] = index
+            await self._collect(in_flight, results, asyncio.ALL_COMPLETED)
+        finally:
+            for task in in_flight:
+                task.cancel()
+        return [result for shard_results in results for result in shard_results]
+
+    async def analyze_batch(self, requests: Sequence[Union[ScreeningRequest, Dict]],
+                            user_locations: Optional[Sequence[Optional[Dict]]] = None) -> List[Dict]:
+        """
+        Analyze screening requests (models or request dicts) in the worker
+        processes; returns AnalysisResult dicts
+        """
+        if user_locations is None:
+            user_locations = [None] * len(requests)
+        items = [
+            (request.dict() if isinstance(request, ScreeningRequest) else request, location)
+            for request, location in zip(requests, user_locations)
+        ]
+        return await self.map_shards(analyze_shard, items)
+
+    @staticmethod
+    async def _collect(in_flight: Dict, results: List, return_when: str) -> None:
+        if not in_flight:
+            return
+        done, _ = await asyncio.wait(in_flight, return_when=return_when)
+        for task in done:
+            results[in_flight.pop(task)] = task.result()
+
+    def shutdown(self) -> None:
+        self.pool.shutdown()
+
+    def stats(self) -> Dict:
+        return dict(self.pool.stats(), shard_size=self.shard_size)
@@ -0,0 +1,188 @@
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional
+import hashlib
+import json
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+DEFAULT_DISK_MAX_BYTES = 1024 * 1024 * 1024
+
+
+class PDFReportCache:
+    """
+    Content-addressed cache of rendered PDF reports.
+
+    Entries are keyed by session id plus a hash of the session's analysis
+    result, and that key doubles as the HTTP ETag. The in-memory tier is an
+    LRU bounded by total bytes; an optional on-disk tier (write-through,
+    evicted oldest-first) survives restarts and is shared by workers.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES, disk_dir: Optional[str] = None,
+                 disk_max_bytes: int = DEFAULT_DISK_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.disk_max_bytes = disk_max_bytes
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        self._entries: "OrderedDict[str, bytes]" = OrderedDict()
+        self._current: Dict[str, str] = {}  # session id -> latest cached key
+        self._bytes = 0
+        self._disk_bytes = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        if self.disk_dir:
+            self.disk_dir.mkdir(parents=True, exist_ok=True)
+            self._disk_bytes = sum(f.stat().st_size for f in self.disk_dir.glob("*.pdf"))
+
+    @classmethod
+    def from_env(cls) -> "PDFReportCache":
+        """
+        Build a cache configured by PDF_CACHE_MAX_BYTES, PDF_CACHE_DIR and
+        PDF_CACHE_DISK_MAX_BYTES
+        """
+        return cls(
+            max_bytes=int(os.environ.get("PDF_CACHE_MAX_BYTES", DEFAULT_MAX_BYTES)),
+            disk_dir=os.environ.get("PDF_CACHE_DIR") or None,
+            disk_max_bytes=int(os.environ.get("PDF_CACHE_DISK_MAX_BYTES", DEFAULT_DISK_MAX_BYTES))
+        )
+
+    @staticmethod
+    def make_key(session_id: str, analysis_result: Dict[str, Any]) -> str:
+        """
+        Cache key / ETag for a session's current analysis result
+        """
+        canonical = json.dumps(analysis_result, sort_keys=True, separators=(",", ":"), default=str)
+        digest = hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:32]
+        return f"{session_id}.{digest}"
+
+    def current_key(self, session_id: str) -> Optional[str]:
+        """
+        Key of the most recently cached report for a session, if any.
+
+        Lets repeat downloads be answered with 304 without reading the
+        session. Invalidation is per process, so this is only trusted for
+        sessions not updated by another worker.
+        """
+        return self._current.get(session_id)
+
+    def get(self, key: str) -> Optional[bytes]:
+        data = self._entries.get(key)
+        if data is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return data
+
+        data = self._read_disk(key)
+        if data is not None:
+            self.disk_hits += 1
+            self._store_memory(key, data)
+            return data
+
+        self.misses += 1
+        return None
+
+    def put(self, key: str, data: bytes) -> None:
+        self._store_memory(key, data)
+        self._write_disk(key, data)
+
+    def invalidate(self, session_id: str) -> None:
+        """
+        Drop every cached report for a session (call on any session update)
+        """
+        self._current.pop(session_id, None)
+        prefix = f"{session_id}."
+        for key in [k for k in self._entries if k.startswith(prefix)]:
+            self._bytes -= len(self._entries.pop(key))
+        if self.disk_dir:
+            for path in self.disk_dir.glob(f"{self._session_file_prefix(session_id)}.*.pdf"):
+                self._remove_disk_file(path)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "disk_bytes": self._disk_bytes if self.disk_dir else None,
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses
+        }
+
+    def _store_memory(self, key: str, data: bytes) -> None:
+        if len(data) > self.max_bytes:
+            return
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._bytes -= len(previous)
+        self._entries[key] = data
+        self._bytes += len(data)
+        self._current[key.rsplit(".", 1)[0]] = key
+
+        while self._bytes > self.max_bytes:
+            evicted_key, evicted = self._entries.popitem(last=False)
+            self._bytes -= len(evicted)
+            session_id = evicted_key.rsplit(".", 1)[0]
+            if self._current.get(session_id) == evicted_key:
+                del self._current[session_id]
+
+    def _session_file_prefix(self, session_id: str) -> str:
+        # Session ids come from clients; never use them as file names directly
+        return hashlib.sha256(session_id.encode("utf-8")).hexdigest()[:24]
+
+    def _disk_path(self, key: str) -> Path:
+        session_id, digest = key.rsplit(".", 1)
+        return self.disk_dir / f"{self._session_file_prefix(session_id)}.{digest}.pdf"
+
+    def _read_disk(self, key: str) -> Optional[bytes]:
+        if not self.disk_dir:
+            return None
+        path = self._disk_path(key)
+        try:
+            data = path.read_bytes()
+            os.utime(path)  # refresh recency for disk eviction
+            return data
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            logger.warning(f"PDF cache disk read failed: {e}")
+            return None
+
+    def _write_disk(self, key: str, data: bytes) -> None:
+        if not self.disk_dir:
+            return
+        path = self._disk_path(key)
+        temp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        try:
+            existing = path.stat().st_size if path.exists() else 0
+            temp_path.write_bytes(data)
+            os.replace(temp_path, path)
+            self._disk_bytes += len(data) - existing
+        except OSError as e:
+            logger.warning(f"PDF cache disk write failed: {e}")
+            return
+
+        if self._disk_bytes > self.disk_max_bytes:
+            files = sorted(self.disk_dir.glob("*.pdf"), key=lambda f: f.stat().st_mtime)
+            for oldest in files:
+                if self._disk_bytes <= self.disk_max_bytes:
+                    break
+                self._remove_disk_file(oldest)
+
+    def _remove_disk_file(self, path: Path) -> None:
+        try:
+            size = path.stat().st_size
+            path.unlink()
+            self._disk_bytes -= size
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning(f"PDF cache disk eviction failed: {e}")
+
+
+# Process-wide cache shared by the PDF routes and session writers
+pdf_report_cache = PDFReportCache.from_env()
@@ -0,0 +1,309 @@
+from models.screening import ScreeningSession, SessionSummary
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import letter, A4
+from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, Image
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.units import inch
+from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_JUSTIFY
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from typing import Dict, Optional, Union
+import copy
+import io
+from datetime import datetime
+
+DISCLAIMER_TEXT = (
+    "This screening tool is for informational and educational purposes only and does not constitute medical advice, "
+    "diagnosis, or treatment. The results are based on self-reported symptoms and risk factors and should not replace "
+    "professional medical evaluation. Please consult with a qualified healthcare provider for proper diagnosis, "
+    "treatment, and medical guidance. TB is a serious medical condition that requires professional medical care."
+)
+
+HEADER_TABLE_COMMANDS = [
+    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#E6EEF6')),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.HexColor('#1F4E79')),
+    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+]
+
+class ReportTemplate:
+    """
+    Everything in the PDF report that does not depend on the session: styles,
+    table styles, static flowables and warmed font metrics. Built once per
+    process so rendering a report only binds session data.
+    """
+
+    def __init__(self):
+        # Get styles
+        styles = getSampleStyleSheet()
+
+        # Custom styles for medical report
+        self.title_style = ParagraphStyle(
+            'CustomTitle',
+            parent=styles['Heading1'],
+            fontSize=18,
+            spaceAfter=30,
+            alignment=TA_CENTER,
+            textColor=colors.HexColor('#1F4E79')  # Deep blue
+        )
+
+        self.heading_style = ParagraphStyle(
+            'CustomHeading',
+            parent=styles['Heading2'],
+            fontSize=14,
+            spaceAfter=12,
+            spaceBefore=20,
+            textColor=colors.HexColor('#1F4E79'),
+            borderPadding=4
+        )
+
+        self.normal_style = ParagraphStyle(
+            'CustomNormal',
+            parent=styles['Normal'],
+            fontSize=11,
+            spaceAfter=6,
+            alignment=TA_JUSTIFY
+        )
+
+        self.disclaimer_style = ParagraphStyle(
+            'Disclaimer',
+            parent=self.normal_style,
+            fontSize=9,
+            textColor=colors.HexColor('#666666'),
+            borderWidth=1,
+            borderColor=colors.HexColor('#CCCCCC'),
+            borderPadding=8,
+            backColor=colors.HexColor('#F8F9FA')
+        )
+
+        self.footer_style = ParagraphStyle(
+            'Footer',
+            parent=self.normal_style,
+            fontSize=8,
+            textColor=colors.HexColor('#888888'),
+            alignment=TA_CENTER
+        )
+
+        # Table styles
+        self.patient_table_style = TableStyle(HEADER_TABLE_COMMANDS + [
+            ('FONTSIZE', (0, 0), (-1, 0), 12),
+            ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+            ('FONTSIZE', (0, 1), (-1, -1), 10),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+            ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#CCCCCC'))
+        ])
+
+        # One result table style per likelihood (the likelihood cell is colored)
+        self.result_table_styles = {
+            likelihood: self._result_table_style(get_risk_color(likelihood))
+            for likelihood in ['Low', 'Moderate', 'High', 'Confirmed']
+        }
+        self.default_result_table_style = self._result_table_style(get_risk_color(''))
+
+        self.referral_table_style = TableStyle(HEADER_TABLE_COMMANDS + [
+            ('FONTSIZE', (0, 0), (-1, 0), 10),
+            ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+            ('FONTSIZE', (0, 1), (-1, -1), 9),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+            ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#CCCCCC')),
+            ('VALIGN', (0, 0), (-1, -1), 'TOP')
+        ])
+
+        # Static flowables, parsed once; use flowable() to get a copy per build
+        self.title = Paragraph("TUBERCULOSIS PRE-SCREENING REPORT", self.title_style)
+        self.headings = {
+            name: Paragraph(name, self.heading_style)
+            for name in ["PATIENT INFORMATION", "SCREENING RESULTS", "CLINICAL ASSESSMENT",
+                         "IDENTIFIED RISK FACTORS", "RECOMMENDED MEDICAL TESTS",
+                         "NEARBY TB TESTING CENTERS", "IMPORTANT MEDICAL DISCLAIMER"]
+        }
+        self.disclaimer = Paragraph(DISCLAIMER_TEXT, self.disclaimer_style)
+
+        # Load font metrics now rather than on the first report
+        for font_name in ['Helvetica', 'Helvetica-Bold']:
+            stringWidth("TB", font_name, 10)
+
+    def _result_table_style(self, result_color: colors.Color) -> TableStyle:
+        return TableStyle(HEADER_TABLE_COMMANDS[:2] + [
+            ('BACKGROUND', (1, 1), (1, 1), result_color),  # Likelihood cell
+        ] + HEADER_TABLE_COMMANDS[2:] + [
+            ('FONTSIZE', (0, 0), (-1, 0), 12),
+            ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+            ('FONTSIZE', (0, 1), (-1, -1), 10),
+            ('FONTNAME', (1, 1), (1, 1), 'Helvetica-Bold'),  # Bold likelihood
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+            ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#CCCCCC'))
+        ])
+
+    def result_table_style(self, likelihood: str) -> TableStyle:
+        return self.result_table_styles.get(likelihood, self.default_result_table_style)
+
+    def flowable(self, prototype):
+        """
+        Shallow copy of a static flowable. Layout writes wrap/split state onto
+        flowables, so a document must not share them, but the parsed text
+        fragments are shared.
+        """
+        return copy.copy(prototype)
+
+    def heading(self, name: str) -> Paragraph:
+        return self.flowable(self.headings[name])
+
+_report_template: Optional[ReportTemplate] = None
+
+def get_report_template() -> ReportTemplate:
+    """
+    Process-wide report template, built on first use
+    """
+    global _report_template
+    if _report_template is None:
+        _report_template = ReportTemplate()
+    return _report_template
+
+def render_pdf_bytes(session_data: Dict) -> bytes:
+    """
+    Render a session's PDF report to bytes (entry point for render worker processes)
+    """
+    return generate_professional_pdf(SessionSummary(**session_data)).getvalue()
+
+def generate_professional_pdf(session: Union[ScreeningSession, SessionSummary],
+                              template: Optional[ReportTemplate] = None) -> io.BytesIO:
+    """
+    Generate a professional, medical-grade PDF report
+    """
+    template = template or get_report_template()
+    normal_style = template.normal_style
+    buffer = io.BytesIO()
+
+    # Create PDF document with A4 page size
+    doc = SimpleDocTemplate(buffer, pagesize=A4, rightMargin=72, leftMargin=72,
+                          topMargin=72, bottomMargin=18)
+
+    # Build PDF content
+    content = []
+
+    # Header
+    content.append(template.flowable(template.title))
+    content.append(Spacer(1, 20))
+
+    # Report metadata
+    report_date = datetime.now().strftime("%B %d, %Y at %I:%M %p")
+    content.append(Paragraph(f"<b>Report Generated:</b> {report_date}", normal_style))
+    content.append(Paragraph(f"<b>Session ID:</b> {session.id}", normal_style))
+    content.append(Spacer(1, 20))
+
+    # Patient Information
+    content.append(template.heading("PATIENT INFORMATION"))
+
+    patient_data = [
+        ['Field', 'Value'],
+        ['Name', session.user_info.name or 'Not provided'],
+        ['Age', f"{session.user_info.age} years"],
+        ['Gender', session.user_info.gender or 'Not specified'],
+        ['Location', session.user_info.location or 'Not provided'],
+        ['Contact', session.user_info.contact or 'Not provided']
+    ]
+
+    patient_table = Table(patient_data, colWidths=[2*inch, 3*inch])
+    patient_table.setStyle(template.patient_table_style)
+
+    content.append(patient_table)
+    content.append(Spacer(1, 20))
+
+    # Screening Results
+    content.append(template.heading("SCREENING RESULTS"))
+
+    result = session.analysis_result
+
+    result_data = [
+        ['Assessment', 'Value'],
+        ['TB Likelihood', result.likelihood],
+        ['Risk Score', f"{result.risk_score}/20"],
+        ['AI Confidence', f"{result.confidence_percent}%"],
+        ['Urgency Level', result.urgency]
+    ]
+
+    result_table = Table(result_data, colWidths=[2*inch, 3*inch])
+    result_table.setStyle(template.result_table_style(result.likelihood))
+
+    content.append(result_table)
+    content.append(Spacer(1, 20))
+
+    # Explanation
+    content.append(template.heading("CLINICAL ASSESSMENT"))
+    content.append(Paragraph(result.explanation_plain, normal_style))
+
+    if result.ai_analysis:
+        content.append(Spacer(1, 10))
+        content.append(Paragraph(f"<b>AI Analysis:</b> {result.ai_analysis}", normal_style))
+
+    content.append(Spacer(1, 20))
+
+    # Risk factors
+    if result.reasons:
+        content.append(template.heading("IDENTIFIED RISK FACTORS"))
+        for i, reason in enumerate(result.reasons[:8], 1):  # Limit to 8 reasons
+            content.append(Paragraph(f"• {reason}", normal_style))
+
+        if len(result.reasons) > 8:
+            content.append(Paragraph(f"... and {len(result.reasons) - 8} additional factors", normal_style))
+
+        content.append(Spacer(1, 20))
+
+    # Recommended tests
+    if result.recommended_tests:
+        content.append(template.heading("RECOMMENDED MEDICAL TESTS"))
+        for test in result.recommended_tests:
+            content.append(Paragraph(f"• {test}", normal_style))
+        content.append(Spacer(1, 20))
+
+    # Referral centers
+    if result.referrals:
+        content.append(template.heading("NEARBY TB TESTING CENTERS"))
+
+        referral_data = [['Center Name', 'Type', 'Phone', 'Distance']]
+
+        for referral in result.referrals[:5]:  # Limit to 5 centers
+            referral_data.append([
+                referral.name,
+                referral.type,
+                referral.phone,
+                referral.distance or 'N/A'
+            ])
+
+        referral_table = Table(referral_data, colWidths=[2.2*inch, 1.2*inch, 1.1*inch, 0.8*inch])
+        referral_table.setStyle(template.referral_table_style)
+
+        content.append(referral_table)
+        content.append(Spacer(1, 20))
+
+    # Medical disclaimer
+    content.append(template.heading("IMPORTANT MEDICAL DISCLAIMER"))
+    content.append(template.flowable(template.disclaimer))
+
+    # Add footer with report generation info
+    content.append(Spacer(1, 30))
+    content.append(Paragraph(
+        f"Generated by TB Pre-Screening Platform • {datetime.now().strftime('%Y-%m-%d %H:%M:%S')} • Session: {session.id[:8]}",
+        template.footer_style
+    ))
+
+    # Build PDF
+    doc.build(content)
+
+    # Reset buffer position
+    buffer.seek(0)
+
+    return buffer
+
+def get_risk_color(likelihood: str) -> colors.Color:
+    """
+    Get appropriate color for risk level
+    """
+    color_map = {
+        'Low': colors.HexColor('#D4F6D4'),      # Light green
+        'Moderate': colors.HexColor('#FFF4D4'), # Light yellow
+        'High': colors.HexColor('#FFE4D4'),     # Light orange
+        'Confirmed': colors.HexColor('#FFD4D4') # Light red
+    }
+
+    return color_map.get(likelihood, colors.HexColor('#F0F0F0'))
@@ -0,0 +1,148 @@
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, List, Optional
+import asyncio
+import multiprocessing
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class PoolSaturatedError(Exception):
+    """
+    Raised when a BoundedProcessPool already has max_pending jobs in flight
+    """
+
+
+class BoundedProcessPool:
+    """
+    Process pool for CPU-bound work called from async routes.
+
+    Jobs run off the event loop. At most max_pending jobs may be queued or
+    running; further submissions fail fast with PoolSaturatedError so callers
+    can shed load, unless they pass wait_below to queue for a slot instead.
+    Each job is awaited with a timeout. A timed-out job cannot
+    be interrupted inside its worker, but its slot in the queue is released.
+    With max_workers=0 jobs run in the default thread pool instead, which
+    keeps the event loop free but shares the GIL.
+    """
+
+    def __init__(self, max_workers: int, max_pending: int, timeout: Optional[float] = None,
+                 initializer: Optional[Callable] = None, initargs: tuple = ()):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self._initializer = initializer
+        self._initargs = initargs
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._pending = 0
+        self._waiters: List[asyncio.Future] = []
+        self.completed = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.failed = 0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn, not fork: the parent holds Mongo and event-loop threads
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=self._initializer,
+                initargs=self._initargs
+            )
+        return self._executor
+
+    async def run(self, fn: Callable, *args: Any, wait_below: Optional[int] = None) -> Any:
+        """
+        Run fn(*args) in the pool and await its result. With wait_below, wait
+        until fewer than that many jobs are pending (capped at max_pending)
+        instead of raising PoolSaturatedError
+        """
+        if wait_below is not None:
+            await self._wait_for_slot(min(wait_below, self.max_pending))
+        elif self._pending >= self.max_pending:
+            self.rejected += 1
+            raise PoolSaturatedError(f"{self._pending} jobs already pending")
+
+        self._pending += 1
+        try:
+            if self.max_workers == 0:
+                job = asyncio.get_running_loop().run_in_executor(None, fn, *args)
+            else:
+                job = asyncio.wrap_future(self._get_executor().submit(fn, *args))
+            result = await asyncio.wait_for(job, self.timeout)
+            self.completed += 1
+            return result
+        except asyncio.TimeoutError:
+            self.timed_out += 1
+            raise
+        except BrokenProcessPool:
+            # A worker died; start a fresh pool for the next job
+            self.failed += 1
+            logger.error("Process pool broken, restarting workers")
+            self._discard_executor()
+            raise
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            self._pending -= 1
+            self._wake_waiters()
+
+    async def _wait_for_slot(self, limit: int) -> None:
+        while self._pending >= max(limit, 1):
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                await waiter
+            finally:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+
+    def _wake_waiters(self) -> None:
+        # Every waiter re-checks its own limit; the ones that lose the race wait again
+        waiters, self._waiters = self._waiters, []
+        for waiter in waiters:
+            if not waiter.done():
+                waiter.set_result(None)
+
+    def _discard_executor(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def shutdown(self) -> None:
+        """
+        Stop worker processes (called on application shutdown)
+        """
+        self._discard_executor()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_workers": self.max_workers,
+            "max_pending": self.max_pending,
+            "pending": self._pending,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+            "failed": self.failed
+        }
+
+
+def pool_from_env(prefix: str, default_workers: Optional[int] = None, default_timeout: float = 30.0,
+                  **kwargs: Any) -> BoundedProcessPool:
+    """
+    Build a pool configured by <prefix>_WORKERS, <prefix>_QUEUE_SIZE and
+    <prefix>_TIMEOUT_SECONDS environment variables
+    """
+    if default_workers is None:
+        default_workers = min(4, os.cpu_count() or 1)
+    workers = int(os.environ.get(f"{prefix}_WORKERS", default_workers))
+    return BoundedProcessPool(
+        max_workers=workers,
+        max_pending=int(os.environ.get(f"{prefix}_QUEUE_SIZE", max(workers, 1) * 4)),
+        timeout=float(os.environ.get(f"{prefix}_TIMEOUT_SECONDS", default_timeout)),
+        **kwargs
+    )
@@ -1,6 +1,6 @@
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from models.screening import Referral
-import math
+from services.spatial_index import GeoGridIndex, haversine_km
 import json
 from pathlib import Path
 
@@ -9,8 +9,28 @@ class ReferralService:
     Service to manage TB center referrals and location-based recommendations
     """
     
-    def __init__(self):
-        self.referral_centers = self._load_referral_data()
+    # Center types listed first for each urgency level
+    URGENCY_PRIORITY_TYPES = {
+        "Immediate": ["Hospital", "DOTS center", "Government Hospital"],
+        "TestSoon": ["Laboratory", "DOTS center", "Specialist Center"]
+    }
+    
+    # Above this many centers, bulk lookups use the grid index per point
+    # instead of one dense distance-matrix pass
+    BULK_DENSE_MAX_CENTERS = 2000
+    
+    def __init__(self, referral_centers: Optional[List[Referral]] = None):
+        self.reload(referral_centers if referral_centers is not None
+                    else self._load_referral_data())
+    
+    def reload(self, referral_centers: List[Referral]) -> None:
+        """
+        Replace the in-memory centers (e.g. with the referral_centers collection)
+        """
+        # Grid index so nearest-center lookups only visit nearby cells
+        spatial_index = GeoGridIndex((c.lat, c.lng) for c in referral_centers)
+        self.referral_centers = referral_centers
+        self.spatial_index = spatial_index
     
     def _load_referral_data(self) -> List[Referral]:
         """
@@ -105,20 +125,9 @@ class ReferralService:
             # Return default centers if no location provided
             return self.referral_centers[:max_results]
         
-        # Calculate distances and sort by proximity
-        centers_with_distance = []
-        
-        for center in self.referral_centers:
-            distance = self._calculate_distance(user_lat, user_lng, center.lat, center.lng)
-            if distance <= radius_km:
-                # Create a copy with distance information
-                center_dict = center.dict()
-                center_dict['distance'] = f"{distance:.1f} km"
-                centers_with_distance.append((distance, Referral(**center_dict)))
-        
-        # Sort by distance and return top results
-        centers_with_distance.sort(key=lambda x: x[0])
-        return [center for _, center in centers_with_distance[:max_results]]
+        # Nearest centers within the radius, already sorted by distance
+        hits = self.spatial_index.query_nearest(user_lat, user_lng, max_results, radius_km)
+        return self._centers_from_hits(hits)
     
     def get_priority_centers_by_urgency(self, urgency: str, user_lat: Optional[float] = None, 
                                       user_lng: Optional[float] = None) -> List[Referral]:
@@ -126,47 +135,76 @@ class ReferralService:
         Get prioritized centers based on urgency level
         """
         centers = self.get_nearby_centers(user_lat, user_lng, max_results=10)
+        return self._prioritize_by_urgency(centers, urgency)
+    
+    def get_referrals_bulk(self, queries: List[Tuple[Optional[float], Optional[float], Optional[str]]],
+                           radius_km: float = 50.0,
+                           max_results: int = 5) -> List[List[Referral]]:
+        """
+        Get referrals for many (lat, lng, urgency) queries at once.
         
-        if urgency == "Immediate":
-            # Prioritize hospitals and DOTS centers for immediate cases
-            priority_types = ["Hospital", "DOTS center", "Government Hospital"]
-            prioritized = [c for c in centers if c.type in priority_types]
-            other_centers = [c for c in centers if c.type not in priority_types]
-            return (prioritized + other_centers)[:5]
+        Each query is answered like GET /api/referrals: prioritized by urgency
+        when one is given, otherwise nearest within radius_km. Distances for all
+        located queries are computed in one vectorized pass.
+        """
+        located = [i for i, (lat, lng, _) in enumerate(queries) if lat is not None and lng is not None]
+        k = max(max_results, 10)
+        # Urgency lookups use the default 50 km radius, as in get_priority_centers_by_urgency
+        limits = [50.0 if queries[i][2] else radius_km for i in located]
+        lats = [queries[i][0] for i in located]
+        lngs = [queries[i][1] for i in located]
         
-        elif urgency == "TestSoon":
-            # Include all types but prioritize diagnostic facilities
-            priority_types = ["Laboratory", "DOTS center", "Specialist Center"]
-            prioritized = [c for c in centers if c.type in priority_types]
-            other_centers = [c for c in centers if c.type not in priority_types]
-            return (prioritized + other_centers)[:5]
+        if len(self.referral_centers) <= self.BULK_DENSE_MAX_CENTERS:
+            hits_per_query = self.spatial_index.query_nearest_many(lats, lngs, k, limits)
+        else:
+            hits_per_query = [
+                self.spatial_index.query_nearest(lat, lng, k, limit)
+                for lat, lng, limit in zip(lats, lngs, limits)
+            ]
+        hits_by_query = dict(zip(located, hits_per_query))
         
-        else:  # Monitor
-            # Include community resources and general facilities
+        results = []
+        for i, (lat, lng, urgency) in enumerate(queries):
+            if i in hits_by_query:
+                hits = hits_by_query[i]
+                if urgency:
+                    results.append(self._prioritize_by_urgency(self._centers_from_hits(hits[:10]), urgency))
+                else:
+                    results.append(self._centers_from_hits(hits[:max_results]))
+            elif urgency:
+                results.append(self.get_priority_centers_by_urgency(urgency))
+            else:
+                results.append(self.get_nearby_centers(max_results=max_results))
+        return results
+    
+    def _centers_from_hits(self, hits: List[Tuple[float, int]]) -> List[Referral]:
+        """
+        Copy indexed centers with their formatted distance
+        """
+        return [
+            self.referral_centers[i].copy(update={'distance': f"{distance:.1f} km"})
+            for distance, i in hits
+        ]
+    
+    def _prioritize_by_urgency(self, centers: List[Referral], urgency: str) -> List[Referral]:
+        """
+        Move center types suited to the urgency level to the front
+        """
+        priority_types = self.URGENCY_PRIORITY_TYPES.get(urgency)
+        if not priority_types:
+            # Monitor: include community resources and general facilities
             return centers[:5]
+        
+        prioritized = [c for c in centers if c.type in priority_types]
+        other_centers = [c for c in centers if c.type not in priority_types]
+        return (prioritized + other_centers)[:5]
     
     def _calculate_distance(self, lat1: float, lng1: float, lat2: float, lng2: float) -> float:
         """
         Calculate distance between two coordinates using Haversine formula
         Returns distance in kilometers
         """
-        # Convert latitude and longitude from degrees to radians
-        lat1_rad = math.radians(lat1)
-        lng1_rad = math.radians(lng1)
-        lat2_rad = math.radians(lat2)
-        lng2_rad = math.radians(lng2)
-        
-        # Haversine formula
-        dlat = lat2_rad - lat1_rad
-        dlng = lng2_rad - lng1_rad
-        
-        a = math.sin(dlat/2)**2 + math.cos(lat1_rad) * math.cos(lat2_rad) * math.sin(dlng/2)**2
-        c = 2 * math.asin(math.sqrt(a))
-        
-        # Radius of Earth in kilometers
-        earth_radius_km = 6371.0
-        
-        return earth_radius_km * c
+        return haversine_km(lat1, lng1, lat2, lng2)
     
     def add_emergency_contacts(self, referrals: List[Referral]) -> List[Referral]:
         """
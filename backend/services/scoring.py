@@ -41,10 +41,54 @@ class TBScoringService:
         'No known contact': 0
     }
     
+    def __init__(self):
+        # Precompute score/reason tables so the per-request path is table lookups
+        self._compiled = CompiledScoringTables(self)
+    
     def calculate_comprehensive_score(self, symptoms: Symptoms, deep_questions: DeepQuestions) -> Tuple[int, List[str]]:
         """
         Calculate comprehensive TB risk score with detailed reasoning
         """
+        tables = self._compiled
+        
+        # Symptom bitmask drives the symptom and fixed escalation tables
+        mask = tables.symptom_mask(symptoms)
+        if symptoms.none_of_the_above:
+            score, symptom_reasons = tables.NO_SYMPTOMS_ENTRY
+        else:
+            score, symptom_reasons = tables.symptom_table[mask]
+        
+        risk_score, risk_reasons = tables.lookup_conditions(deep_questions.previous_conditions)
+        score += risk_score
+        
+        exposure_score, exposure_reasons = tables.exposure_table.get(deep_questions.exposure_contact, tables.EMPTY_ENTRY)
+        score += exposure_score
+        
+        # Only the prolonged-cough rule depends on the running score
+        escalation_score, escalation_reasons = tables.escalation_table[mask]
+        if (deep_questions.cough_duration_weeks == "> 1 month" and
+            tables.cough_table[mask] and score >= 4):
+            escalation_score += 2
+            escalation_reasons = tables.PROLONGED_COUGH_REASONS + escalation_reasons
+        score += escalation_score
+        
+        reasons = [*symptom_reasons, *risk_reasons, *exposure_reasons, *escalation_reasons]
+        
+        age_adjustment = self._calculate_age_risk(deep_questions)
+        score += age_adjustment
+        if age_adjustment > 0:
+            reasons.append(f"Age-related risk factor (+{age_adjustment} pts)")
+        
+        final_score = min(score, 20)
+        
+        logger.info(f"Calculated TB risk score: {final_score}/20, reasons: {len(reasons)}")
+        return final_score, reasons
+    
+    def _calculate_comprehensive_score_reference(self, symptoms: Symptoms, deep_questions: DeepQuestions) -> Tuple[int, List[str]]:
+        """
+        Uncompiled reference implementation of calculate_comprehensive_score,
+        kept for parity tests and benchmarks
+        """
         score = 0
         reasons = []
         
@@ -269,4 +313,103 @@ class TBScoringService:
             'smoker': 'Smoking history',
             'alcohol_use': 'Alcohol use'
         }
-        return formatting.get(condition_key, condition_key.replace('_', ' ').title())
\ No newline at end of file
+        return formatting.get(condition_key, condition_key.replace('_', ' ').title())
+
+
+class CompiledScoringTables:
+    """
+    Score and reason tables precomputed from a TBScoringService's weights.
+    
+    The symptom score and the symptom-only escalation rules depend on 8 booleans,
+    so they are tabulated for all 256 bitmasks; conditions and exposures come
+    from fixed vocabularies and are tabulated per value (and per condition subset
+    in vocabulary order).
+    """
+    
+    EMPTY_ENTRY: Tuple[int, Tuple[str, ...]] = (0, ())
+    NO_SYMPTOMS_ENTRY: Tuple[int, Tuple[str, ...]] = (0, ("No TB-related symptoms reported",))
+    PROLONGED_COUGH_REASONS = ("Prolonged cough duration (>1 month) with other symptoms (+2 pts)",)
+    
+    def __init__(self, scoring_service: TBScoringService):
+        self.symptom_keys = list(scoring_service.SYMPTOM_WEIGHTS.keys())
+        bits = {key: 1 << i for i, key in enumerate(self.symptom_keys)}
+        
+        self.symptom_table: List[Tuple[int, Tuple[str, ...]]] = []
+        self.escalation_table: List[Tuple[int, Tuple[str, ...]]] = []
+        self.cough_table: List[bool] = []
+        
+        for mask in range(1 << len(self.symptom_keys)):
+            present = {key for key in self.symptom_keys if mask & bits[key]}
+            
+            score = 0
+            reasons = []
+            for key, weight in scoring_service.SYMPTOM_WEIGHTS.items():
+                if key in present:
+                    score += weight
+                    reasons.append(f"{scoring_service._format_symptom_name(key)} ({weight} pts)")
+            self.symptom_table.append((score, tuple(reasons)))
+            
+            escalation_score = 0
+            escalation_reasons = []
+            if 'cough_with_blood' in present and 'fever_evening' in present:
+                escalation_score += 2
+                escalation_reasons.append("Blood in sputum with fever - high concern (+2 pts)")
+            constitutional = present & {'fever_evening', 'weight_loss', 'night_sweats', 'loss_of_appetite'}
+            if len(constitutional) >= 3:
+                escalation_score += 1
+                escalation_reasons.append("Multiple constitutional symptoms (+1 pt)")
+            self.escalation_table.append((escalation_score, tuple(escalation_reasons)))
+            
+            self.cough_table.append('cough_gt_2_weeks' in present or 'cough_with_sputum' in present)
+        
+        self.condition_table: Dict[str, Tuple[int, str]] = {
+            condition: (weight, f"{scoring_service._format_condition_name(condition)} (+{weight} pts)")
+            for condition, weight in scoring_service.RISK_ADJUSTMENTS.items()
+        }
+        
+        # Every subset of known conditions, listed in vocabulary order
+        conditions = list(self.condition_table.keys())
+        self.condition_sets: Dict[Tuple[str, ...], Tuple[int, Tuple[str, ...]]] = {}
+        for mask in range(1 << len(conditions)):
+            subset = tuple(c for i, c in enumerate(conditions) if mask & (1 << i))
+            self.condition_sets[subset] = (
+                sum(self.condition_table[c][0] for c in subset),
+                tuple(self.condition_table[c][1] for c in subset)
+            )
+        
+        self.exposure_table: Dict[str, Tuple[int, Tuple[str, ...]]] = {
+            exposure: (weight, (f"{exposure} (+{weight} pts)",))
+            for exposure, weight in scoring_service.EXPOSURE_WEIGHTS.items()
+            if weight > 0
+        }
+    
+    def symptom_mask(self, symptoms: Symptoms) -> int:
+        """
+        Pack the 8 weighted symptom flags (in SYMPTOM_WEIGHTS order) into a table index
+        """
+        return (symptoms.cough_gt_2_weeks
+                | symptoms.cough_with_sputum << 1
+                | symptoms.cough_with_blood << 2
+                | symptoms.fever_evening << 3
+                | symptoms.weight_loss << 4
+                | symptoms.night_sweats << 5
+                | symptoms.chest_pain << 6
+                | symptoms.loss_of_appetite << 7)
+    
+    def lookup_conditions(self, conditions: List[str]) -> Tuple[int, Tuple[str, ...]]:
+        """
+        Score and reasons for a list of previous conditions, preserving input order
+        """
+        entry = self.condition_sets.get(tuple(conditions))
+        if entry is not None:
+            return entry
+        
+        # Out-of-order, duplicated or unknown conditions: assemble per condition
+        score = 0
+        reasons = []
+        for condition in conditions:
+            condition_entry = self.condition_table.get(condition)
+            if condition_entry is not None:
+                score += condition_entry[0]
+                reasons.append(condition_entry[1])
+        return score, tuple(reasons)
\ No newline at end of file
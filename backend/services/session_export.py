@@ -0,0 +1,139 @@
+from typing import Any, AsyncIterator, Dict, List
+from models.screening import Symptoms, DeepQuestions
+from services.stream_sink import StreamSink
+from datetime import datetime
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_EXPORT_BATCH_SIZE = 1000
+MAX_EXPORT_BATCH_SIZE = 10000
+LIST_SEPARATOR = ";"
+
+EXPORT_FORMATS = {
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+    "arrow": ("application/vnd.apache.arrow.stream", "arrows"),
+}
+
+SYMPTOM_FIELDS = list(Symptoms.model_fields)
+DEEP_QUESTION_FIELDS = [field for field in DeepQuestions.model_fields if field != "previous_conditions"]
+
+# Flat export columns and their Arrow types; names, contact details and
+# uploads are not exported
+COLUMNS = (
+    [("id", "string"), ("created_at", "timestamp"), ("updated_at", "timestamp"),
+     ("age", "int"), ("gender", "string"), ("location", "string")]
+    + [(f"symptom_{field}", "bool") for field in SYMPTOM_FIELDS]
+    + [(field, "string") for field in DEEP_QUESTION_FIELDS]
+    + [("previous_conditions", "string"), ("local_score", "int"),
+       ("likelihood", "string"), ("confidence_percent", "int"), ("urgency", "string"),
+       ("risk_score", "int"), ("recommended_tests", "string"), ("reasons", "string"),
+       ("referral_ids", "string")]
+)
+COLUMN_NAMES = [name for name, _ in COLUMNS]
+
+
+class ExportFormatUnavailableError(Exception):
+    """
+    Raised when a columnar format is requested but pyarrow is not installed
+    """
+
+
+def flatten_session(session: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    One flat export row of a screening session document (lists joined by ";")
+    """
+    user = session.get("user_info") or {}
+    symptoms = session.get("symptoms") or {}
+    deep = session.get("deep_questions") or {}
+    result = session.get("analysis_result") or {}
+
+    row = {
+        "id": session.get("id"),
+        "created_at": session.get("created_at"),
+        "updated_at": session.get("updated_at"),
+        "age": user.get("age"),
+        "gender": user.get("gender"),
+        "location": user.get("location"),
+    }
+    for field in SYMPTOM_FIELDS:
+        row[f"symptom_{field}"] = bool(symptoms.get(field, False))
+    for field in DEEP_QUESTION_FIELDS:
+        row[field] = deep.get(field)
+    row.update({
+        "previous_conditions": LIST_SEPARATOR.join(deep.get("previous_conditions") or []),
+        "local_score": session.get("local_score"),
+        "likelihood": result.get("likelihood"),
+        "confidence_percent": result.get("confidence_percent"),
+        "urgency": result.get("urgency"),
+        "risk_score": result.get("risk_score"),
+        "recommended_tests": LIST_SEPARATOR.join(result.get("recommended_tests") or []),
+        "reasons": LIST_SEPARATOR.join(result.get("reasons") or []),
+        "referral_ids": LIST_SEPARATOR.join(r.get("id", "") for r in result.get("referrals") or []),
+    })
+    return row
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+async def _batches(cursor, batch_size: int) -> AsyncIterator[List[Dict[str, Any]]]:
+    batch: List[Dict[str, Any]] = []
+    async for session in cursor:
+        batch.append(flatten_session(session))
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+async def stream_ndjson(cursor, batch_size: int = DEFAULT_EXPORT_BATCH_SIZE) -> AsyncIterator[bytes]:
+    """
+    NDJSON export, one flat row per line, sent a cursor batch at a time
+    """
+    async for batch in _batches(cursor, batch_size):
+        yield "".join(json.dumps(row, default=_json_default) + "\n" for row in batch).encode()
+
+
+def arrow_schema():
+    """
+    Arrow schema of the export columns (requires pyarrow)
+    """
+    try:
+        import pyarrow as pa
+    except ImportError:
+        raise ExportFormatUnavailableError("Parquet and Arrow exports require pyarrow")
+    types = {"string": pa.string(), "timestamp": pa.timestamp("ms"), "int": pa.int64(), "bool": pa.bool_()}
+    return pa.schema([(name, types[kind]) for name, kind in COLUMNS])
+
+
+async def stream_columnar(cursor, file_format: str,
+                          batch_size: int = DEFAULT_EXPORT_BATCH_SIZE) -> AsyncIterator[bytes]:
+    """
+    Parquet (one row group per batch) or Arrow IPC stream export, encoded
+    batch by batch so only one batch is held in memory
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = arrow_schema()
+    sink = StreamSink()
+    if file_format == "parquet":
+        writer = pq.ParquetWriter(sink, schema, compression="zstd")
+    else:
+        writer = pa.ipc.new_stream(sink, schema)
+    try:
+        async for batch in _batches(cursor, batch_size):
+            columns = [pa.array([row[name] for row in batch], type=schema.field(name).type)
+                       for name in COLUMN_NAMES]
+            writer.write_batch(pa.record_batch(columns, schema=schema))
+            yield sink.take()
+    finally:
+        writer.close()
+    yield sink.take()
@@ -0,0 +1,403 @@
+from motor.motor_asyncio import AsyncIOMotorCollection
+from pymongo.errors import BulkWriteError
+from bson import json_util
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+import asyncio
+import fcntl
+import itertools
+import os
+import socket
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+DUPLICATE_KEY = 11000
+
+
+def stored_documents(documents: List[Dict[str, Any]],
+                     error: Optional[BulkWriteError] = None) -> List[Dict[str, Any]]:
+    """
+    The documents an insert_many(ordered=False) actually inserted: all of
+    them, less those listed in its BulkWriteError (duplicates included)
+    """
+    if error is None:
+        return list(documents)
+    failed = {write_error.get("index") for write_error in error.details.get("writeErrors", [])}
+    return [document for index, document in enumerate(documents) if index not in failed]
+
+
+class WriteBufferFullError(Exception):
+    """
+    Raised when a SessionWriteBuffer stays full for longer than enqueue_timeout
+    """
+
+
+class SessionWriteBuffer:
+    """
+    Write-behind buffer for screening_sessions inserts.
+
+    submit() journals the document to a local spill file and returns; a
+    background task inserts buffered documents with insert_many(ordered=False)
+    once max_batch are waiting or flush_interval has passed. At most
+    max_buffered documents are held: past that, submit() waits for the flusher
+    (backpressure) and raises WriteBufferFullError after enqueue_timeout.
+
+    The spill journal is split into segments; a segment file is deleted once
+    every document in it is stored. Each process journals into its own
+    subdirectory of spill_dir (spill_name, default <hostname>-<pid>) and holds
+    an exclusive flock on it while running. On start, segments in
+    subdirectories whose lock can be taken, left by a crashed or stopped
+    process, are replayed; those of running processes are left alone.
+    Documents that already reached Mongo are skipped through the unique index
+    on id. The optional on_stored callback of start() gets each batch of newly
+    inserted documents.
+    """
+
+    LOCK_NAME = "lock"
+
+    def __init__(self, max_batch: int = 100, flush_interval: float = 0.2, max_buffered: int = 10000,
+                 spill_dir: Optional[str] = None, enqueue_timeout: float = 5.0, fsync: bool = False,
+                 enabled: bool = True, spill_name: Optional[str] = None):
+        self.enabled = enabled
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.max_buffered = max_buffered
+        self.enqueue_timeout = enqueue_timeout
+        self.fsync = fsync
+        self.spill_dir = Path(spill_dir) if spill_dir else None
+        self.spill_name = spill_name
+
+        self._collection: Optional[AsyncIOMotorCollection] = None
+        self._on_stored: Optional[Callable[[List[Dict[str, Any]]], Awaitable[Any]]] = None
+        self._pending: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()  # session id -> document
+        self._segment_of: Dict[str, int] = {}
+        self._segment_counts: Dict[int, int] = {}
+        self._segment = 0
+        self._own_dir: Optional[Path] = None
+        self._lock = None
+        self._spill_file = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._space: Optional[asyncio.Condition] = None
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+
+        self.submitted = 0
+        self.flushed = 0
+        self.batches = 0
+        self.failed_batches = 0
+        self.rejected = 0
+        self.last_flush_ms = 0.0
+
+    @classmethod
+    def from_env(cls) -> "SessionWriteBuffer":
+        """
+        Build a buffer configured by SESSION_WRITE_BEHIND (off by default),
+        SESSION_WRITE_BEHIND_BATCH_SIZE, _FLUSH_INTERVAL_MS, _MAX_BUFFERED,
+        _SPILL_DIR, _ENQUEUE_TIMEOUT_SECONDS and _FSYNC
+        """
+        prefix = "SESSION_WRITE_BEHIND"
+        return cls(
+            enabled=os.environ.get(prefix, "0").lower() in ("1", "true", "yes"),
+            max_batch=int(os.environ.get(f"{prefix}_BATCH_SIZE", 100)),
+            flush_interval=int(os.environ.get(f"{prefix}_FLUSH_INTERVAL_MS", 200)) / 1000,
+            max_buffered=int(os.environ.get(f"{prefix}_MAX_BUFFERED", 10000)),
+            spill_dir=os.environ.get(f"{prefix}_SPILL_DIR", "session_spill") or None,
+            enqueue_timeout=float(os.environ.get(f"{prefix}_ENQUEUE_TIMEOUT_SECONDS", 5.0)),
+            fsync=os.environ.get(f"{prefix}_FSYNC", "0").lower() in ("1", "true", "yes")
+        )
+
+    async def start(self, collection: AsyncIOMotorCollection,
+                    on_stored: Optional[Callable[[List[Dict[str, Any]]], Awaitable[Any]]] = None) -> None:
+        """
+        Replay spilled documents from a previous run and start the flusher
+        """
+        self._collection = collection
+        self._on_stored = on_stored
+        self._wakeup = asyncio.Event()
+        self._space = asyncio.Condition()
+        self._closing = False
+
+        if self.spill_dir:
+            # Named at start, not import: workers may be forked after import
+            self._own_dir = self.spill_dir / (self.spill_name or f"{socket.gethostname()}-{os.getpid()}")
+            self._own_dir.mkdir(parents=True, exist_ok=True)
+            self._lock = self._try_lock(self._own_dir)
+            if self._lock is None:
+                raise RuntimeError(f"Spill directory {self._own_dir} is in use by another process")
+            recovered = self._recover_segments()
+            self._open_segment(self._segment + 1)
+            recovered += self._adopt_orphaned_segments()
+            if recovered:
+                logger.info(f"Replaying {recovered} spilled screening sessions")
+
+        self._task = asyncio.create_task(self._run())
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._closing
+
+    async def submit(self, document: Dict[str, Any]) -> None:
+        """
+        Queue a session document for insertion
+        """
+        if not self.running:
+            raise RuntimeError("Session write buffer is not running")
+
+        if len(self._pending) >= self.max_buffered:
+            self._wakeup.set()
+            try:
+                async with self._space:
+                    await asyncio.wait_for(
+                        self._space.wait_for(lambda: len(self._pending) < self.max_buffered),
+                        self.enqueue_timeout
+                    )
+            except asyncio.TimeoutError:
+                self.rejected += 1
+                raise WriteBufferFullError(f"{len(self._pending)} sessions waiting to be written")
+
+        self._journal(document)
+        self._add(document, self._segment)
+        self.submitted += 1
+        if len(self._pending) >= self.max_batch:
+            self._wakeup.set()
+
+    def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """
+        A submitted document not yet written to Mongo, so reads see it
+        """
+        return self._pending.get(session_id)
+
+    async def drain(self, timeout: float = 10.0) -> None:
+        """
+        Flush everything buffered and stop (called on application shutdown).
+        Whatever cannot be written in time stays in the spill journal.
+        """
+        if self._task is None:
+            return
+        self._closing = True
+        self._wakeup.set()
+        try:
+            await asyncio.wait_for(self._task, timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Session write buffer drain timed out with {len(self._pending)} sessions pending")
+        self._task = None
+        if self._spill_file:
+            self._spill_file.close()
+            self._spill_file = None
+            self._remove_finished_segments()
+            if not self._segment_counts:
+                self._remove_spill_dir(self._own_dir)
+        if self._lock:
+            # Unwritten segments stay behind for the next process to adopt
+            self._lock.close()
+            self._lock = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "running": self.running,
+            "pending": len(self._pending),
+            "max_buffered": self.max_buffered,
+            "submitted": self.submitted,
+            "flushed": self.flushed,
+            "batches": self.batches,
+            "failed_batches": self.failed_batches,
+            "rejected": self.rejected,
+            "last_flush_ms": round(self.last_flush_ms, 3)
+        }
+
+    async def _run(self) -> None:
+        backoff = self.flush_interval
+        retrying = False
+        while True:
+            if retrying and not self._closing:
+                await asyncio.sleep(backoff)
+            elif len(self._pending) < self.max_batch and not self._closing:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+                except asyncio.TimeoutError:
+                    pass
+            self._wakeup.clear()
+
+            if not self._pending:
+                if self._closing:
+                    return
+                continue
+
+            retrying = not await self._flush_batch()
+            if retrying:
+                # Mongo is unavailable; documents stay buffered (and journaled)
+                # and submit() applies backpressure once the buffer fills up
+                backoff = min(max(backoff * 2, 0.1), 5.0)
+                if self._closing:
+                    return
+            else:
+                backoff = self.flush_interval
+
+    async def _flush_batch(self) -> bool:
+        batch = list(itertools.islice(self._pending.values(), self.max_batch))
+        if self._spill_file and self._segment_counts.get(self._segment):
+            self._open_segment(self._segment + 1)
+
+        dropped = 0
+        started = time.perf_counter()
+        try:
+            await self._collection.insert_many(batch, ordered=False)
+            stored = batch
+        except BulkWriteError as e:
+            stored = stored_documents(batch, e)
+            # Already-stored sessions (e.g. replayed after a crash) count as written
+            # Other per-document errors would fail again on retry; log and drop them
+            failed = [error for error in e.details.get("writeErrors", [])
+                      if error.get("code") != DUPLICATE_KEY]
+            if failed:
+                logger.error(f"Dropping {len(failed)} unwritable sessions: {failed}")
+                self.failed_batches += 1
+                dropped = len(failed)
+        except Exception as e:
+            logger.warning(f"Session batch insert failed, will retry: {e}")
+            self.failed_batches += 1
+            return False
+
+        self.last_flush_ms = (time.perf_counter() - started) * 1000
+        if self._on_stored is not None and stored:
+            try:
+                await self._on_stored(stored)
+            except Exception as e:
+                logger.warning(f"Post-write hook failed for {len(stored)} sessions: {e}")
+        self.batches += 1
+        self.flushed += len(batch) - dropped
+        for document in batch:
+            # A session re-submitted during the insert waits for the next batch
+            if self._pending.get(document["id"]) is document:
+                self._remove(document["id"])
+        self._remove_finished_segments()
+
+        async with self._space:
+            self._space.notify_all()
+        return True
+
+    def _add(self, document: Dict[str, Any], segment: int) -> None:
+        # A re-submitted session no longer holds its earlier segment open
+        self._remove(document["id"])
+        self._pending[document["id"]] = document
+        self._segment_of[document["id"]] = segment
+        self._segment_counts[segment] = self._segment_counts.get(segment, 0) + 1
+
+    def _remove(self, session_id: str) -> None:
+        self._pending.pop(session_id, None)
+        segment = self._segment_of.pop(session_id, None)
+        if segment is not None:
+            self._segment_counts[segment] -= 1
+
+    def _segment_path(self, segment: int) -> Path:
+        return self._own_dir / f"sessions-{segment:010d}.jsonl"
+
+    def _open_segment(self, segment: int) -> None:
+        if self._spill_file:
+            self._spill_file.close()
+        self._segment = segment
+        self._segment_counts.setdefault(segment, 0)
+        self._spill_file = open(self._segment_path(segment), "a", encoding="utf-8")
+
+    def _journal(self, document: Dict[str, Any]) -> None:
+        if not self._spill_file:
+            return
+        self._spill_file.write(json_util.dumps(document) + "\n")
+        self._spill_file.flush()
+        if self.fsync:
+            os.fsync(self._spill_file.fileno())
+
+    def _remove_finished_segments(self) -> None:
+        for segment, count in list(self._segment_counts.items()):
+            if count == 0 and (segment != self._segment or self._spill_file is None):
+                del self._segment_counts[segment]
+                if self._own_dir:
+                    self._segment_path(segment).unlink(missing_ok=True)
+
+    def _recover_segments(self) -> int:
+        # Our own directory: only non-empty after a crash of a process with
+        # the same name (e.g. a reused pid)
+        recovered = 0
+        for path in sorted(self._own_dir.glob("sessions-*.jsonl")):
+            segment = int(path.stem.split("-", 1)[1])
+            self._segment = max(self._segment, segment)
+            self._segment_counts.setdefault(segment, 0)
+            for document in self._read_segment(path):
+                if document.get("id") not in self._pending:
+                    self._add(document, segment)
+                    recovered += 1
+        self._remove_finished_segments()
+        return recovered
+
+    def _adopt_orphaned_segments(self) -> int:
+        """
+        Move documents spilled by processes that are no longer running into
+        the current segment, then delete their directories
+        """
+        adopted = 0
+        # Segments directly in spill_dir predate per-process directories
+        orphans = [(None, sorted(self.spill_dir.glob("sessions-*.jsonl")))]
+        for directory in sorted(path for path in self.spill_dir.iterdir() if path.is_dir()):
+            if directory == self._own_dir:
+                continue
+            lock = self._try_lock(directory)
+            if lock is None:
+                continue  # its process is still running
+            orphans.append((lock, sorted(directory.glob("sessions-*.jsonl"))))
+
+        for lock, paths in orphans:
+            try:
+                for path in paths:
+                    for document in self._read_segment(path):
+                        if document.get("id") not in self._pending:
+                            self._journal(document)
+                            self._add(document, self._segment)
+                            adopted += 1
+                    path.unlink(missing_ok=True)
+                if lock is not None:
+                    self._remove_spill_dir(Path(lock.name).parent)
+            finally:
+                if lock is not None:
+                    lock.close()
+        return adopted
+
+    def _read_segment(self, path: Path):
+        with open(path, encoding="utf-8") as spill:
+            for line in spill:
+                try:
+                    yield json_util.loads(line)
+                except ValueError:
+                    continue  # torn final line from a crash mid-write
+
+    def _try_lock(self, directory: Path):
+        """
+        Lock file of a spill directory, held with an exclusive flock, or None
+        when another process holds it (or the directory is gone)
+        """
+        try:
+            lock = open(directory / self.LOCK_NAME, "a")
+        except FileNotFoundError:
+            return None
+        try:
+            fcntl.flock(lock.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            lock.close()
+            return None
+        return lock
+
+    def _remove_spill_dir(self, directory: Path) -> None:
+        # Called with the directory's lock held
+        for path in directory.glob("sessions-*.jsonl"):
+            path.unlink(missing_ok=True)
+        (directory / self.LOCK_NAME).unlink(missing_ok=True)
+        try:
+            directory.rmdir()
+        except OSError:
+            pass  # already removed, or not empty
+
+# Process-wide buffer used by /api/analyze when SESSION_WRITE_BEHIND is on
+session_write_buffer = SessionWriteBuffer.from_env()
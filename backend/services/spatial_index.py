@@ -0,0 +1,226 @@
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+import math
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180.0
+
+# Upper bound on distance-matrix elements computed per chunk in bulk queries
+DENSE_CHUNK_ELEMENTS = 2_000_000
+
+
+def haversine_km(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """
+    Great-circle distance between two coordinates in kilometers
+    """
+    lat1_rad = math.radians(lat1)
+    lat2_rad = math.radians(lat2)
+    dlat = lat2_rad - lat1_rad
+    dlng = math.radians(lng2 - lng1)
+
+    a = math.sin(dlat / 2) ** 2 + math.cos(lat1_rad) * math.cos(lat2_rad) * math.sin(dlng / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(min(a, 1.0)))
+
+
+def haversine_km_many(lat_rad, lng_rad, cos_lat, lats_rad: np.ndarray, lngs_rad: np.ndarray,
+                      cos_lats: np.ndarray) -> np.ndarray:
+    """
+    Vectorized haversine distances in kilometers.
+
+    Inputs are radians plus precomputed cosines of the latitudes; they broadcast,
+    so a column of query points against a row of centers yields a matrix.
+    """
+    a = (np.sin((lats_rad - lat_rad) / 2) ** 2
+         + cos_lat * cos_lats * np.sin((lngs_rad - lng_rad) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+class GeoGridIndex:
+    """
+    Fixed-size lat/lng grid over a set of points, supporting radius and
+    k-nearest queries that only visit the cells around the query point.
+
+    Coordinates are held in contiguous float arrays and distances to candidate
+    points are computed in one vectorized pass. Longitudes are not wrapped at
+    the antimeridian, which is fine for the national referral network this
+    indexes.
+    """
+
+    def __init__(self, points: Iterable[Tuple[float, float]], cell_size_deg: float = 0.25):
+        self.cell_size_deg = cell_size_deg
+
+        coordinates = np.array(list(points), dtype=np.float64).reshape(-1, 2)
+        self.lats = np.ascontiguousarray(coordinates[:, 0])
+        self.lngs = np.ascontiguousarray(coordinates[:, 1])
+        self._lats_rad = np.radians(self.lats)
+        self._lngs_rad = np.radians(self.lngs)
+        self._cos_lats = np.cos(self._lats_rad)
+
+        buckets: Dict[Tuple[int, int], List[int]] = {}
+        rows = np.floor(self.lats / cell_size_deg).astype(np.int64)
+        cols = np.floor(self.lngs / cell_size_deg).astype(np.int64)
+        for i, cell in enumerate(zip(rows.tolist(), cols.tolist())):
+            buckets.setdefault(cell, []).append(i)
+        self.cells: Dict[Tuple[int, int], np.ndarray] = {
+            cell: np.array(indices, dtype=np.intp) for cell, indices in buckets.items()
+        }
+
+        if self.cells:
+            self._row_range = (int(rows.min()), int(rows.max()))
+            self._col_range = (int(cols.min()), int(cols.max()))
+
+    def __len__(self) -> int:
+        return len(self.lats)
+
+    def _cell(self, lat: float, lng: float) -> Tuple[int, int]:
+        return (math.floor(lat / self.cell_size_deg), math.floor(lng / self.cell_size_deg))
+
+    def distances_from(self, lat: float, lng: float, indices: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Distances in kilometers from one point to the given (default: all) points
+        """
+        lat_rad, lng_rad = math.radians(lat), math.radians(lng)
+        if indices is None:
+            return haversine_km_many(lat_rad, lng_rad, math.cos(lat_rad),
+                                     self._lats_rad, self._lngs_rad, self._cos_lats)
+        return haversine_km_many(lat_rad, lng_rad, math.cos(lat_rad),
+                                 self._lats_rad[indices], self._lngs_rad[indices], self._cos_lats[indices])
+
+    def query_radius(self, lat: float, lng: float, radius_km: float) -> List[Tuple[float, int]]:
+        """
+        All points within radius_km, as (distance_km, index) sorted by distance
+        """
+        if not self.cells:
+            return []
+
+        lat_span = radius_km / KM_PER_DEGREE
+        cos_lat = math.cos(math.radians(min(abs(lat) + lat_span, 90.0)))
+        # From the haversine formula: sin(d/2R) >= cos(max_lat) * sin(dlng/2)
+        ratio = math.sin(min(radius_km / (2 * EARTH_RADIUS_KM), math.pi / 2)) / cos_lat if cos_lat > 1e-9 else 2.0
+        lng_span = 180.0 if ratio >= 1.0 else math.degrees(2 * math.asin(ratio))
+
+        row_min, col_min = self._cell(lat - lat_span, lng - lng_span)
+        row_max, col_max = self._cell(lat + lat_span, lng + lng_span)
+        row_min, row_max = max(row_min, self._row_range[0]), min(row_max, self._row_range[1])
+        col_min, col_max = max(col_min, self._col_range[0]), min(col_max, self._col_range[1])
+
+        buckets: List[np.ndarray] = []
+        if (row_max - row_min + 1) * (col_max - col_min + 1) > len(self.cells):
+            # Query box is larger than the occupied grid; walk occupied cells instead
+            for (row, col), indices in self.cells.items():
+                if row_min <= row <= row_max and col_min <= col <= col_max:
+                    buckets.append(indices)
+        else:
+            for row in range(row_min, row_max + 1):
+                for col in range(col_min, col_max + 1):
+                    indices = self.cells.get((row, col))
+                    if indices is not None:
+                        buckets.append(indices)
+
+        if not buckets:
+            return []
+        candidates = np.concatenate(buckets)
+        distances = self.distances_from(lat, lng, candidates)
+        within = distances <= radius_km
+        return self._sorted_hits(distances[within], candidates[within])
+
+    def query_nearest(self, lat: float, lng: float, k: int,
+                      max_distance_km: Optional[float] = None) -> List[Tuple[float, int]]:
+        """
+        Up to k nearest points (optionally within max_distance_km), as
+        (distance_km, index) sorted by distance
+        """
+        if not self.cells or k <= 0:
+            return []
+
+        row0, col0 = self._cell(lat, lng)
+        max_ring = max(
+            abs(row0 - self._row_range[0]), abs(row0 - self._row_range[1]),
+            abs(col0 - self._col_range[0]), abs(col0 - self._col_range[1])
+        )
+
+        best_distances = np.empty(0, dtype=np.float64)
+        best_indices = np.empty(0, dtype=np.intp)
+        for ring in range(max_ring + 1):
+            if ring > 0:
+                # Every point in this ring is at least (ring - 1) cells away in
+                # latitude or longitude; bound the distance by the longitude case
+                ring_lat = min(abs(lat) + (ring + 1) * self.cell_size_deg, 90.0)
+                half_gap = min(math.radians((ring - 1) * self.cell_size_deg), math.pi) / 2
+                lower_bound_km = 2 * EARTH_RADIUS_KM * math.asin(
+                    min(math.cos(math.radians(ring_lat)) * math.sin(half_gap), 1.0)
+                )
+                if max_distance_km is not None and lower_bound_km > max_distance_km:
+                    break
+                if len(best_distances) == k and lower_bound_km > best_distances[-1]:
+                    break
+
+            buckets = self._ring_buckets(row0, col0, ring)
+            if not buckets:
+                continue
+            candidates = np.concatenate(buckets)
+            distances = self.distances_from(lat, lng, candidates)
+            if max_distance_km is not None:
+                within = distances <= max_distance_km
+                candidates, distances = candidates[within], distances[within]
+
+            best_distances = np.concatenate([best_distances, distances])
+            best_indices = np.concatenate([best_indices, candidates])
+            order = np.lexsort((best_indices, best_distances))[:k]
+            best_distances, best_indices = best_distances[order], best_indices[order]
+
+        return list(zip(best_distances.tolist(), best_indices.tolist()))
+
+    def query_nearest_many(self, lats: Sequence[float], lngs: Sequence[float], k: int,
+                           max_distance_km: Union[float, Sequence[float], None] = None
+                           ) -> List[List[Tuple[float, int]]]:
+        """
+        k nearest points for many query points in one vectorized pass over all
+        points (chunked to bound memory). max_distance_km may be per query.
+        """
+        query_lats = np.radians(np.asarray(lats, dtype=np.float64))
+        query_lngs = np.radians(np.asarray(lngs, dtype=np.float64))
+        n_queries, n_points = len(query_lats), len(self)
+        if n_queries == 0 or n_points == 0 or k <= 0:
+            return [[] for _ in range(n_queries)]
+
+        limits = np.broadcast_to(
+            np.asarray(np.inf if max_distance_km is None else max_distance_km, dtype=np.float64),
+            (n_queries,)
+        )
+        k = min(k, n_points)
+        chunk = max(1, DENSE_CHUNK_ELEMENTS // n_points)
+
+        results: List[List[Tuple[float, int]]] = []
+        for start in range(0, n_queries, chunk):
+            stop = min(start + chunk, n_queries)
+            q_lats = query_lats[start:stop, None]
+            distances = haversine_km_many(q_lats, query_lngs[start:stop, None], np.cos(q_lats),
+                                          self._lats_rad, self._lngs_rad, self._cos_lats)
+            distances[distances > limits[start:stop, None]] = np.inf
+
+            if k < n_points:
+                nearest = np.argpartition(distances, k - 1, axis=1)[:, :k]
+            else:
+                nearest = np.broadcast_to(np.arange(n_points), distances.shape)
+            nearest_distances = np.take_along_axis(distances, nearest, axis=1)
+
+            for row_distances, row_indices in zip(nearest_distances, nearest):
+                finite = np.isfinite(row_distances)
+                results.append(self._sorted_hits(row_distances[finite], row_indices[finite]))
+        return results
+
+    def _sorted_hits(self, distances: np.ndarray, indices: np.ndarray) -> List[Tuple[float, int]]:
+        order = np.lexsort((indices, distances))
+        return list(zip(distances[order].tolist(), indices[order].tolist()))
+
+    def _ring_buckets(self, row0: int, col0: int, ring: int) -> List[np.ndarray]:
+        if ring == 0:
+            cell = self.cells.get((row0, col0))
+            return [cell] if cell is not None else []
+
+        cells = [(row0 - ring, col) for col in range(col0 - ring, col0 + ring + 1)]
+        cells += [(row0 + ring, col) for col in range(col0 - ring, col0 + ring + 1)]
+        cells += [(row, col0 - ring) for row in range(row0 - ring + 1, row0 + ring)]
+        cells += [(row, col0 + ring) for row in range(row0 - ring + 1, row0 + ring)]
+        return [self.cells[cell] for cell in cells if cell in self.cells]
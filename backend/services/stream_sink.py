@@ -0,0 +1,40 @@
+class StreamSink:
+    """
+    Write-only, non-seekable file object that buffers encoder output (a ZIP
+    archive, Parquet or Arrow IPC writer) until the streaming response takes
+    it with take()
+    """
+
+    closed = False
+
+    def __init__(self):
+        self._buffer = bytearray()
+        self._position = 0
+
+    def write(self, data: bytes) -> int:
+        self._buffer += data
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def seekable(self) -> bool:
+        return False
+
+    def writable(self) -> bool:
+        return True
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+    def take(self) -> bytes:
+        """
+        Bytes written since the previous take()
+        """
+        data = bytes(self._buffer)
+        self._buffer.clear()
+        return data
@@ -0,0 +1,201 @@
+from fastapi import Request
+from services.blob_store import BlobStore, BlobWriter
+from typing import Dict, List, Optional, Sequence, Tuple
+import hashlib
+import multipart
+from multipart.multipart import parse_options_header
+
+ALLOWED_EXTENSIONS = ['.jpg', '.jpeg', '.png', '.pdf']
+
+# Leading bytes of each accepted file type
+FILE_SIGNATURES = [
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"%PDF-", "application/pdf"),
+]
+SNIFF_BYTES = max(len(signature) for signature, _ in FILE_SIGNATURES)
+
+# Non-file form fields (e.g. file_type) are tiny; cap them
+MAX_FIELD_BYTES = 1024
+
+
+class UploadRejectedError(Exception):
+    """
+    Raised when an upload is refused while it is being received
+    """
+
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+def sniff_content_type(head: bytes) -> Optional[str]:
+    """
+    Content type from a file's leading bytes, if it is an accepted type
+    """
+    for signature, content_type in FILE_SIGNATURES:
+        if head.startswith(signature):
+            return content_type
+    return None
+
+
+class UploadIngestor:
+    """
+    Consumes an upload chunk by chunk: enforces the size limit as soon as it
+    is crossed, hashes incrementally, sniffs the type from the first bytes
+    and hands each chunk straight to a blob writer
+    """
+
+    def __init__(self, writer: BlobWriter, max_bytes: int):
+        self.writer = writer
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.content_type: Optional[str] = None
+        self._sha256 = hashlib.sha256()
+        self._head = b""
+
+    async def feed(self, chunk: bytes) -> None:
+        self.size += len(chunk)
+        if self.size > self.max_bytes:
+            raise UploadRejectedError(413, f"File size exceeds {self.max_bytes // (1024 * 1024)}MB limit")
+
+        if len(self._head) < SNIFF_BYTES:
+            self._head += chunk[:SNIFF_BYTES - len(self._head)]
+            if len(self._head) == SNIFF_BYTES:
+                self._sniff()
+
+        self._sha256.update(chunk)
+        await self.writer.write(chunk)
+
+    def finish(self) -> str:
+        """
+        Validate the complete upload and return its content key
+        """
+        if self.content_type is None:
+            self._sniff()
+        return self._sha256.hexdigest()
+
+    def _sniff(self) -> None:
+        self.content_type = sniff_content_type(self._head)
+        if self.content_type is None:
+            raise UploadRejectedError(400, "Invalid file type. Allowed: JPG, PNG, PDF")
+
+
+def _check_extension(filename: str) -> None:
+    extension = filename[filename.rfind("."):].lower() if "." in filename else ""
+    if extension not in ALLOWED_EXTENSIONS:
+        raise UploadRejectedError(400, "Invalid file type. Allowed: JPG, PNG, PDF")
+
+
+async def ingest_multipart_upload(request: Request, blob_store: BlobStore, max_bytes: int,
+                                  file_field: str = "file", required_fields: Sequence[str] = ()) -> Dict:
+    """
+    Parse a multipart/form-data upload straight off the request stream.
+
+    The file part is streamed into the blob store as it arrives, so peak
+    memory is one network chunk and an oversized or mistyped upload is
+    refused before the rest of the body is read. Returns the form fields
+    plus filename, declared_content_type, content_type (sniffed), size and
+    blob_key of the stored file.
+    """
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > max_bytes + 64 * 1024:
+        raise UploadRejectedError(413, f"File size exceeds {max_bytes // (1024 * 1024)}MB limit")
+
+    media_type, params = parse_options_header(request.headers.get("content-type", ""))
+    if media_type != b"multipart/form-data" or b"boundary" not in params:
+        raise UploadRejectedError(400, "Expected multipart/form-data upload")
+
+    events: List[Tuple[str, bytes]] = []
+    header_field = b""
+    header_value = b""
+
+    def on_part_begin() -> None:
+        events.append(("begin", b""))
+
+    def on_header_field(data: bytes, start: int, end: int) -> None:
+        nonlocal header_field
+        header_field += data[start:end]
+
+    def on_header_value(data: bytes, start: int, end: int) -> None:
+        nonlocal header_value
+        header_value += data[start:end]
+
+    def on_header_end() -> None:
+        nonlocal header_field, header_value
+        if header_field.lower() == b"content-disposition":
+            events.append(("disposition", header_value))
+        elif header_field.lower() == b"content-type":
+            events.append(("content_type", header_value))
+        header_field = header_value = b""
+
+    def on_part_data(data: bytes, start: int, end: int) -> None:
+        events.append(("data", data[start:end]))
+
+    parser = multipart.MultipartParser(params[b"boundary"], {
+        "on_part_begin": on_part_begin,
+        "on_header_field": on_header_field,
+        "on_header_value": on_header_value,
+        "on_header_end": on_header_end,
+        "on_part_data": on_part_data,
+    })
+
+    fields: Dict[str, str] = {}
+    result: Dict = {}
+    ingestor: Optional[UploadIngestor] = None
+    part_name: Optional[str] = None
+    part_is_file = False
+    part_value = b""
+
+    def end_field() -> None:
+        if part_name is not None and not part_is_file:
+            fields[part_name] = part_value.decode("utf-8", errors="replace")
+
+    writer = await blob_store.open_writer()
+    try:
+        async for chunk in request.stream():
+            parser.write(chunk)
+            for kind, data in events:
+                if kind == "begin":
+                    end_field()
+                    part_name, part_is_file, part_value = None, False, b""
+                elif kind == "disposition":
+                    _, options = parse_options_header(data)
+                    part_name = options.get(b"name", b"").decode("utf-8", errors="replace")
+                    filename = options.get(b"filename")
+                    if part_name == file_field and filename is not None:
+                        if ingestor is not None:
+                            raise UploadRejectedError(400, "Only one file per upload")
+                        result["filename"] = filename.decode("utf-8", errors="replace")
+                        _check_extension(result["filename"])
+                        ingestor = UploadIngestor(writer, max_bytes)
+                        part_is_file = True
+                elif kind == "content_type":
+                    if part_is_file:
+                        result["declared_content_type"] = data.decode("latin-1")
+                elif part_is_file:
+                    await ingestor.feed(data)
+                else:
+                    part_value += data
+                    if len(part_value) > MAX_FIELD_BYTES:
+                        raise UploadRejectedError(400, "Form field too large")
+            events.clear()
+        parser.finalize()
+        end_field()
+
+        missing = [name for name in required_fields if name not in fields]
+        if ingestor is None:
+            missing.insert(0, file_field)
+        if missing:
+            raise UploadRejectedError(422, f"Missing form field: {', '.join(missing)}")
+
+        blob_key = ingestor.finish()
+        await writer.commit(blob_key, ingestor.content_type)
+    except BaseException:
+        await writer.abort()
+        raise
+
+    result.setdefault("declared_content_type", None)
+    result.update(fields=fields, content_type=ingestor.content_type, size=ingestor.size, blob_key=blob_key)
+    return result
@@ -0,0 +1,8 @@
+import sys
+from pathlib import Path
+
+# Benchmarks run as `python -m tests.benchmarks.<name>` from the repository root;
+# make the backend modules importable the same way backend/server.py sees them.
+BACKEND_DIR = Path(__file__).resolve().parents[2] / "backend"
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
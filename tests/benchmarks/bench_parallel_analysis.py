@@ -0,0 +1,99 @@
+"""
+Benchmark for parallel batch analysis across worker processes.
+
+Analyzes a batch of synthetic screenings in process and with ParallelAnalyzer
+at 1, 2, 4, ... workers, and reports throughput, speedup over one worker and
+parallel efficiency. Requests are handed to the pool as dicts, the way batch
+files arrive. Pools are warmed up before timing, so worker start-up is not
+measured.
+
+    python -m tests.benchmarks.bench_parallel_analysis [--screenings N] [--max-workers N] [--shard-size N]
+"""
+import argparse
+import asyncio
+import logging
+import os
+import random
+import time
+
+from models.screening import ScreeningRequest, UserInfo
+from services.analysis import AnalysisService
+from services.parallel_analysis import DEFAULT_SHARD_SIZE, ParallelAnalyzer
+from tests.benchmarks.bench_scoring import make_workload
+
+
+def make_batch(size, seed=0):
+    rng = random.Random(seed)
+    requests, locations = [], []
+    for i, (symptoms, deep_questions) in enumerate(make_workload(size, seed)):
+        requests.append(ScreeningRequest(
+            user=UserInfo(age=rng.randint(1, 90)),
+            symptoms=symptoms,
+            deep_questions=deep_questions,
+            local_score=rng.randint(0, 20),
+            session_id=str(i)
+        ))
+        located = rng.random() < 0.8
+        locations.append({"lat": rng.uniform(8.0, 35.0), "lng": rng.uniform(68.0, 97.0)} if located else None)
+    return requests, locations
+
+
+def worker_counts(max_workers):
+    counts, workers = [], 1
+    while workers < max_workers:
+        counts.append(workers)
+        workers *= 2
+    return counts + [max_workers]
+
+
+async def in_process(requests, locations):
+    service = AnalysisService()
+    started = time.perf_counter()
+    for request, location in zip(requests, locations):
+        await service.analyze_screening(request, location)
+    return len(requests) / (time.perf_counter() - started)
+
+
+async def parallel(requests, locations, workers, shard_size):
+    requests = [request.model_dump() for request in requests]
+    analyzer = ParallelAnalyzer(workers, shard_size)
+    try:
+        # Start every worker before timing
+        await analyzer.analyze_batch(requests[:workers * shard_size], locations[:workers * shard_size])
+        started = time.perf_counter()
+        await analyzer.analyze_batch(requests, locations)
+        return len(requests) / (time.perf_counter() - started)
+    finally:
+        analyzer.shutdown()
+
+
+def run(screenings=100000, max_workers=None, shard_size=DEFAULT_SHARD_SIZE):
+    requests, locations = make_batch(screenings)
+    results = {"in_process": asyncio.run(in_process(requests, locations))}
+    for workers in worker_counts(max_workers or os.cpu_count() or 1):
+        results[workers] = asyncio.run(parallel(requests, locations, workers, shard_size))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--screenings", type=int, default=100000)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--shard-size", type=int, default=DEFAULT_SHARD_SIZE)
+    args = parser.parse_args()
+
+    # Keep per-screening log records out of the measurement
+    logging.disable(logging.INFO)
+
+    results = run(args.screenings, args.max_workers, args.shard_size)
+    print(f"{args.screenings} screenings, shard size {args.shard_size}, {os.cpu_count()} cores")
+    print(f"in process: {results.pop('in_process'):>10.0f} screenings/s")
+    baseline = results[1]
+    for workers, rate in results.items():
+        speedup = rate / baseline
+        print(f"{workers:>3} workers: {rate:>10.0f} screenings/s  "
+              f"speedup {speedup:5.2f}x  efficiency {speedup / workers:5.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Micro-benchmark for PDF report rendering.
+
+Compares renders/second when every report builds its own ReportTemplate
+(styles, table styles and static flowables, as before templates were cached)
+against rendering with the process-wide template.
+
+    python -m tests.benchmarks.bench_pdf [--renders N]
+"""
+import argparse
+import time
+
+from models.screening import (
+    AnalysisResult, DeepQuestions, Referral, ScreeningSession, Symptoms, UserInfo
+)
+from services.pdf_report import ReportTemplate, generate_professional_pdf, get_report_template
+from services.referrals import ReferralService
+
+
+def make_sessions(size):
+    referrals = ReferralService().referral_centers[:5]
+    sessions = []
+    for i in range(size):
+        likelihood = ["Low", "Moderate", "High", "Confirmed"][i % 4]
+        sessions.append(ScreeningSession(
+            user_info=UserInfo(name=f"Patient {i}", age=20 + i % 50, gender="Female", location="Mumbai"),
+            symptoms=Symptoms(cough_gt_2_weeks=True, night_sweats=bool(i % 2)),
+            deep_questions=DeepQuestions(),
+            local_score=i % 20,
+            analysis_result=AnalysisResult(
+                likelihood=likelihood,
+                confidence_percent=70 + i % 30,
+                reasons=[f"Risk factor {n}" for n in range(i % 10)],
+                urgency="TestSoon",
+                recommended_tests=["Sputum smear microscopy", "Chest X-ray"],
+                referrals=[Referral(**r.dict()) for r in referrals],
+                explanation_plain="Symptoms reported are consistent with possible TB. " * 4,
+                session_id=str(i),
+                risk_score=i % 20
+            )
+        ))
+    return sessions
+
+
+def renders_per_second(render, sessions, renders):
+    """Best-of-3 throughput"""
+    best = 0.0
+    for _ in range(3):
+        started = time.perf_counter()
+        for i in range(renders):
+            render(sessions[i % len(sessions)])
+        best = max(best, renders / (time.perf_counter() - started))
+    return best
+
+
+def run(renders=200):
+    sessions = make_sessions(20)
+    template = get_report_template()
+    return {
+        "per_render_template_per_sec": renders_per_second(
+            lambda s: generate_professional_pdf(s, ReportTemplate()), sessions, renders),
+        "cached_template_per_sec": renders_per_second(
+            lambda s: generate_professional_pdf(s, template), sessions, renders),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--renders", type=int, default=200)
+    args = parser.parse_args()
+
+    results = run(args.renders)
+    print(f"template per render: {results['per_render_template_per_sec']:.1f} renders/s")
+    print(f"cached template:     {results['cached_template_per_sec']:.1f} renders/s")
+    print(f"speedup:             {results['cached_template_per_sec'] / results['per_render_template_per_sec']:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
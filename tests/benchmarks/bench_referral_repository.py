@@ -0,0 +1,81 @@
+"""
+Benchmark for $geoNear referral queries against the in-memory ReferralService.
+
+Seeds synthetic centers into a scratch database on a local mongod (MONGO_URL,
+default mongodb://localhost:27017), runs the same nearby and urgency-priority
+lookups through ReferralCenterRepository and ReferralService, and drops the
+scratch database afterwards.
+
+    python -m tests.benchmarks.bench_referral_repository [--sizes 1000 10000] [--queries N]
+"""
+import argparse
+import asyncio
+import os
+import time
+
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from repositories.referral_centers import ReferralCenterRepository
+from services.referrals import ReferralService
+from tests.benchmarks.bench_referrals import make_centers, make_queries
+
+SCRATCH_DB = "bench_referral_centers"
+
+
+async def per_query_us(fn, queries):
+    started = time.perf_counter()
+    for lat, lng in queries:
+        await fn(lat, lng)
+    return (time.perf_counter() - started) / len(queries) * 1e6
+
+
+async def run(sizes=(1000, 10000), queries=200):
+    client = AsyncIOMotorClient(os.environ.get("MONGO_URL", "mongodb://localhost:27017"))
+    results = []
+    try:
+        for size in sizes:
+            await client.drop_database(SCRATCH_DB)
+            centers = make_centers(size)
+            service = ReferralService(centers)
+            repository = ReferralCenterRepository(client[SCRATCH_DB], service)
+            await repository.ensure_indexes()
+            await repository.seed(centers)
+            query_points = make_queries(queries)
+
+            async def memory_nearby(lat, lng):
+                return service.get_nearby_centers(lat, lng)
+
+            async def memory_priority(lat, lng):
+                return service.get_priority_centers_by_urgency("Immediate", lat, lng)
+
+            results.append({
+                "centers": size,
+                "memory_nearby_us": await per_query_us(memory_nearby, query_points),
+                "mongo_nearby_us": await per_query_us(repository.get_nearby_centers, query_points),
+                "memory_priority_us": await per_query_us(memory_priority, query_points),
+                "mongo_priority_us": await per_query_us(
+                    lambda lat, lng: repository.get_priority_centers_by_urgency("Immediate", lat, lng),
+                    query_points
+                ),
+            })
+    finally:
+        await client.drop_database(SCRATCH_DB)
+        client.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{'centers':>8} {'memory nearby us':>17} {'mongo nearby us':>16} "
+          f"{'memory priority us':>19} {'mongo priority us':>18}")
+    for row in asyncio.run(run(args.sizes, args.queries)):
+        print(f"{row['centers']:>8} {row['memory_nearby_us']:>17.1f} {row['mongo_nearby_us']:>16.1f} "
+              f"{row['memory_priority_us']:>19.1f} {row['mongo_priority_us']:>18.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Benchmark for ReferralService nearest-center lookups on synthetic networks.
+
+Measures index build time and per-query latency of radius and k-nearest
+queries against a linear haversine scan and a vectorized full pass, plus the
+per-point cost of bulk lookups, for 1k/10k/100k centers spread across India.
+
+    python -m tests.benchmarks.bench_referrals [--sizes 1000 10000 100000] [--queries N]
+"""
+import argparse
+import random
+import time
+
+import numpy as np
+
+from models.screening import Referral
+from services.referrals import ReferralService
+from services.spatial_index import haversine_km
+
+CENTER_TYPES = ["DOTS center", "Hospital", "Laboratory", "Specialist Clinic",
+                "Community Support", "Government Hospital"]
+
+
+def make_centers(size, seed=0):
+    rng = random.Random(seed)
+    return [
+        Referral(
+            id=str(i),
+            name=f"Synthetic Center {i}",
+            type=rng.choice(CENTER_TYPES),
+            phone="+91 00000 00000",
+            address="Synthetic address",
+            lat=rng.uniform(8.0, 35.0),
+            lng=rng.uniform(68.0, 97.0)
+        )
+        for i in range(size)
+    ]
+
+
+def make_queries(count, seed=1):
+    rng = random.Random(seed)
+    return [(rng.uniform(8.0, 35.0), rng.uniform(68.0, 97.0)) for _ in range(count)]
+
+
+def linear_nearest(centers, lat, lng, radius_km, k):
+    hits = []
+    for center in centers:
+        distance = haversine_km(lat, lng, center.lat, center.lng)
+        if distance <= radius_km:
+            hits.append((distance, center))
+    hits.sort(key=lambda hit: hit[0])
+    return hits[:k]
+
+
+def vectorized_nearest(index, lat, lng, radius_km, k):
+    distances = index.distances_from(lat, lng)
+    candidates = np.flatnonzero(distances <= radius_km)
+    return candidates[np.argsort(distances[candidates], kind="stable")][:k]
+
+
+def per_query_us(fn, queries):
+    started = time.perf_counter()
+    for lat, lng in queries:
+        fn(lat, lng)
+    return (time.perf_counter() - started) / len(queries) * 1e6
+
+
+def bulk_per_point_us(service, queries):
+    bulk_queries = [(lat, lng, None) for lat, lng in queries]
+    started = time.perf_counter()
+    service.get_referrals_bulk(bulk_queries)
+    return (time.perf_counter() - started) / len(queries) * 1e6
+
+
+def run(sizes=(1000, 10000, 100000), queries=200):
+    results = []
+    query_points = make_queries(queries)
+    for size in sizes:
+        centers = make_centers(size)
+
+        started = time.perf_counter()
+        service = ReferralService(centers)
+        build_ms = (time.perf_counter() - started) * 1000
+
+        index = service.spatial_index
+        results.append({
+            "centers": size,
+            "build_ms": build_ms,
+            "linear_scan_us": per_query_us(lambda lat, lng: linear_nearest(centers, lat, lng, 50.0, 5),
+                                           query_points[:max(queries // 10, 1)]),
+            "vectorized_scan_us": per_query_us(lambda lat, lng: vectorized_nearest(index, lat, lng, 50.0, 5),
+                                               query_points),
+            "radius_50km_us": per_query_us(lambda lat, lng: index.query_radius(lat, lng, 50.0), query_points),
+            "knn_5_us": per_query_us(lambda lat, lng: index.query_nearest(lat, lng, 5), query_points),
+            "get_nearby_centers_us": per_query_us(lambda lat, lng: service.get_nearby_centers(lat, lng), query_points),
+            "bulk_per_point_us": bulk_per_point_us(service, query_points),
+        })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{'centers':>8} {'build ms':>9} {'linear us':>10} {'vector us':>10} {'radius us':>10} "
+          f"{'knn us':>8} {'service us':>11} {'bulk us':>8}")
+    for row in run(args.sizes, args.queries):
+        print(f"{row['centers']:>8} {row['build_ms']:>9.1f} {row['linear_scan_us']:>10.1f} "
+              f"{row['vectorized_scan_us']:>10.1f} {row['radius_50km_us']:>10.1f} {row['knn_5_us']:>8.1f} "
+              f"{row['get_nearby_centers_us']:>11.1f} {row['bulk_per_point_us']:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Micro-benchmark for TBScoringService.calculate_comprehensive_score.
+
+Compares per-call latency of the compiled lookup-table path against the
+uncompiled reference implementation on a fixed mix of screenings.
+
+    python -m tests.benchmarks.bench_scoring [--calls N]
+"""
+import argparse
+import logging
+import random
+import time
+
+from models.screening import Symptoms, DeepQuestions
+from services.scoring import TBScoringService
+
+SYMPTOM_FIELDS = list(TBScoringService.SYMPTOM_WEIGHTS.keys())
+EXPOSURES = ["No known contact", "Family member with TB", "Close workplace contact",
+             "Neighbour / Community contact"]
+CONDITIONS = list(TBScoringService.RISK_ADJUSTMENTS.keys())
+
+
+def make_workload(size, seed=0):
+    rng = random.Random(seed)
+    workload = []
+    for _ in range(size):
+        symptoms = Symptoms(**{field: rng.random() < 0.35 for field in SYMPTOM_FIELDS})
+        deep_questions = DeepQuestions(
+            cough_duration_weeks=rng.choice(["2-4 weeks", "> 1 month"]),
+            exposure_contact=rng.choice(EXPOSURES),
+            previous_conditions=rng.sample(CONDITIONS, rng.randint(0, 2))
+        )
+        workload.append((symptoms, deep_questions))
+    return workload
+
+
+def time_per_call(score_fn, workload, calls):
+    """Best-of-3 mean latency in microseconds"""
+    best = float("inf")
+    for _ in range(3):
+        started = time.perf_counter()
+        for i in range(calls):
+            score_fn(*workload[i % len(workload)])
+        best = min(best, (time.perf_counter() - started) / calls)
+    return best * 1e6
+
+
+def run(calls=50000):
+    service = TBScoringService()
+    workload = make_workload(1000)
+    return {
+        "reference_us_per_call": time_per_call(service._calculate_comprehensive_score_reference, workload, calls),
+        "compiled_us_per_call": time_per_call(service.calculate_comprehensive_score, workload, calls),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--calls", type=int, default=50000)
+    args = parser.parse_args()
+
+    # Keep per-call log records out of the measurement
+    logging.disable(logging.INFO)
+
+    results = run(args.calls)
+    print(f"reference: {results['reference_us_per_call']:.2f} us/call")
+    print(f"compiled:  {results['compiled_us_per_call']:.2f} us/call")
+    print(f"speedup:   {results['reference_us_per_call'] / results['compiled_us_per_call']:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Bytes transferred per session read, with and without projections.
+
+Stores one session with legacy inline uploads (two base64 X-rays) and one with
+upload references, then measures the BSON size of what each read returns:
+the old full find_one, the summary projection used by /api/session/{id}/summary,
+/api/reports and the PDF report, and a fields=analysis_result read. Uses a
+scratch database on a local mongod (MONGO_URL, default
+mongodb://localhost:27017), or an in-process mock with --mock.
+
+    python -m tests.benchmarks.bench_session_reads [--upload-kb N] [--mock]
+"""
+import argparse
+import asyncio
+import base64
+import os
+
+import bson
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from models.screening import DeepQuestions, FileUpload, ScreeningSession, Symptoms, UserInfo
+from repositories.screening_sessions import ScreeningSessionRepository
+from tests.benchmarks.bench_pdf import make_sessions
+
+SCRATCH_DB = "bench_session_reads"
+
+READS = {
+    "full (before)": None,
+    "summary": ScreeningSessionRepository.SUMMARY_FIELDS,
+    "fields=analysis_result": ["analysis_result"],
+}
+
+
+def make_documents(upload_kb):
+    analysis_result = make_sessions(1)[0].analysis_result
+    base = dict(
+        user_info=UserInfo(name="Patient", age=42, gender="Male", location="Pune"),
+        symptoms=Symptoms(cough_gt_2_weeks=True, fever_evening=True),
+        deep_questions=DeepQuestions(cough_duration_weeks="> 1 month", previous_conditions=["diabetes"]),
+        local_score=9,
+        analysis_result=analysis_result
+    )
+    xray = base64.b64encode(os.urandom(upload_kb * 1024)).decode()
+    inline = ScreeningSession(id="inline", uploads=[
+        FileUpload(type="chest_xray", filename=f"xray{i}.jpg", content_base64=xray) for i in range(2)
+    ], **base)
+    referenced = ScreeningSession(id="referenced", uploads=[
+        FileUpload(type="chest_xray", filename=f"xray{i}.jpg", file_id="0" * 24, blob_key="0" * 64,
+                   size=upload_kb * 1024, content_type="image/jpeg") for i in range(2)
+    ], **base)
+    return [inline.dict(), referenced.dict()]
+
+
+async def run(upload_kb=1500, mock=False):
+    if mock:
+        from mongomock_motor import AsyncMongoMockClient
+        client = AsyncMongoMockClient()
+    else:
+        client = AsyncIOMotorClient(os.environ.get("MONGO_URL", "mongodb://localhost:27017"))
+
+    db = client[SCRATCH_DB]
+    await db.screening_sessions.delete_many({})
+    await db.screening_sessions.insert_many(make_documents(upload_kb))
+    repository = ScreeningSessionRepository(db)
+
+    results = []
+    try:
+        for session_id in ["inline", "referenced"]:
+            for read, fields in READS.items():
+                document = await repository.get(session_id, fields)
+                results.append({"session": session_id, "read": read, "bytes": len(bson.encode(document))})
+    finally:
+        await db.screening_sessions.delete_many({})
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--upload-kb", type=int, default=1500)
+    parser.add_argument("--mock", action="store_true", help="use mongomock instead of a local mongod")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args.upload_kb, args.mock))
+    print(f"{'session':>12} {'read':>24} {'bytes':>12}")
+    for row in results:
+        print(f"{row['session']:>12} {row['read']:>24} {row['bytes']:>12,}")
+
+
+if __name__ == "__main__":
+    main()
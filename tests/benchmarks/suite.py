@@ -0,0 +1,250 @@
+"""
+Benchmark suite for the hot paths, with machine-readable results.
+
+Times TBScoringService scoring, ReferralService lookups at several network
+sizes, generate_professional_pdf, and /api/analyze and /api/pdf/report
+end to end through an in-process ASGI client on an in-memory Mongo mock
+(with the analysis and PDF caches emptied before every request).
+Each benchmark reports the median and best per-operation latency over
+several repeats. --output writes the results as JSON. --baseline compares
+them against an earlier results file and exits with status 1 when a
+benchmark's median is more than --threshold slower.
+
+    python -m tests.benchmarks.suite [--output results.json] [--baseline baseline.json]
+        [--threshold 0.25] [--only scoring referrals pdf endpoints] [--quick]
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List
+
+from services.pdf_report import generate_professional_pdf, get_report_template
+from services.referrals import ReferralService
+from services.scoring import TBScoringService
+from tests.benchmarks.bench_metrics import LOCATIONS, make_requests
+from tests.benchmarks.bench_pdf import make_sessions
+from tests.benchmarks.bench_referrals import make_centers, make_queries
+from tests.benchmarks.bench_scoring import make_workload
+
+SUITE_VERSION = 1
+DEFAULT_THRESHOLD = 0.25
+REFERRAL_SIZES = (1000, 10000, 100000)
+URGENCIES = ["Immediate", "TestSoon", "Monitor"]
+
+
+def summarize(samples_us: List[float], ops: int) -> Dict[str, Any]:
+    return {
+        "unit": "us/op",
+        "median": statistics.median(samples_us),
+        "min": min(samples_us),
+        "repeats": len(samples_us),
+        "ops": ops,
+    }
+
+
+def measure(fn: Callable[[int], Any], ops: int, repeats: int) -> Dict[str, Any]:
+    """Per-operation latency of fn(0..ops-1), repeated"""
+    samples = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        for i in range(ops):
+            fn(i)
+        samples.append((time.perf_counter() - started) / ops * 1e6)
+    return summarize(samples, ops)
+
+
+async def measure_async(fn: Callable[[int], Any], ops: int, repeats: int) -> Dict[str, Any]:
+    samples = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        for i in range(ops):
+            await fn(i)
+        samples.append((time.perf_counter() - started) / ops * 1e6)
+    return summarize(samples, ops)
+
+
+def bench_scoring(scale: float, repeats: int) -> Dict[str, Dict[str, Any]]:
+    service = TBScoringService()
+    workload = make_workload(1000)
+    return {
+        "scoring.comprehensive_score": measure(
+            lambda i: service.calculate_comprehensive_score(*workload[i % len(workload)]),
+            int(20000 * scale), repeats),
+    }
+
+
+def bench_referrals(scale: float, repeats: int) -> Dict[str, Dict[str, Any]]:
+    results = {}
+    queries = make_queries(500)
+    for size in REFERRAL_SIZES:
+        service = ReferralService(make_centers(size))
+        results[f"referrals.priority_by_urgency.{size}"] = measure(
+            lambda i: service.get_priority_centers_by_urgency(URGENCIES[i % 3], *queries[i % len(queries)]),
+            int(2000 * scale), repeats)
+        # One bulk call covers every query point; report the cost of one point
+        bulk_queries = [(lat, lng, None) for lat, lng in queries]
+        bulk = measure(lambda i: service.get_referrals_bulk(bulk_queries), max(int(10 * scale), 1), repeats)
+        results[f"referrals.bulk_per_point.{size}"] = {
+            **bulk, "median": bulk["median"] / len(queries), "min": bulk["min"] / len(queries)}
+    return results
+
+
+def bench_pdf(scale: float, repeats: int) -> Dict[str, Dict[str, Any]]:
+    sessions = make_sessions(20)
+    template = get_report_template()
+    return {
+        "pdf.generate_professional_pdf": measure(
+            lambda i: generate_professional_pdf(sessions[i % len(sessions)], template),
+            max(int(50 * scale), 1), repeats),
+    }
+
+
+async def _bench_endpoints(scale: float, repeats: int) -> Dict[str, Dict[str, Any]]:
+    import httpx
+    from mongomock_motor import AsyncMongoMockClient
+
+    import database
+    from main import app
+    from routes.pdf import render_pool
+    from routes.screening import analysis_cache, get_blob_store
+    from services.blob_store import FilesystemBlobStore
+    from services.pdf_cache import pdf_report_cache
+
+    db = AsyncMongoMockClient()["bench_suite"]
+    blob_dir = tempfile.TemporaryDirectory()
+    app.dependency_overrides[database.get_database] = lambda: db
+    app.dependency_overrides[get_blob_store] = lambda: FilesystemBlobStore(blob_dir.name)
+
+    bodies = [{"screening_request": request.model_dump(mode="json"), "user_location": LOCATIONS[i % len(LOCATIONS)]}
+              for i, request in enumerate(make_requests(500))]
+    results = {}
+    try:
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+            async def analyze(i):
+                # Drop memoized results so every request runs the analysis, not a cache hit
+                analysis_cache.clear()
+                response = await client.post("/api/analyze", json=bodies[i % len(bodies)])
+                response.raise_for_status()
+                return response.json()["session_id"]
+
+            session_ids = [await analyze(i) for i in range(20)]  # warm up and seed reports
+
+            async def pdf_report(i):
+                # Drop the cached report so every download renders
+                session_id = session_ids[i % len(session_ids)]
+                pdf_report_cache.invalidate(session_id)
+                response = await client.get(f"/api/pdf/report/{session_id}")
+                response.raise_for_status()
+
+            results["endpoint.analyze"] = await measure_async(analyze, int(300 * scale), repeats)
+            # Start the render pool's workers before timing: spawning them
+            # would otherwise land in the first repeat
+            await pdf_report(0)
+            results["endpoint.pdf_report"] = await measure_async(pdf_report, max(int(40 * scale), 1), repeats)
+    finally:
+        app.dependency_overrides.clear()
+        render_pool.shutdown()
+        blob_dir.cleanup()
+    return results
+
+
+def bench_endpoints(scale: float, repeats: int) -> Dict[str, Dict[str, Any]]:
+    return asyncio.run(_bench_endpoints(scale, repeats))
+
+
+GROUPS = {
+    "scoring": bench_scoring,
+    "referrals": bench_referrals,
+    "pdf": bench_pdf,
+    "endpoints": bench_endpoints,
+}
+
+
+def run(groups=tuple(GROUPS), scale: float = 1.0, repeats: int = 5) -> Dict[str, Any]:
+    results: Dict[str, Dict[str, Any]] = {}
+    for group in groups:
+        results.update(GROUPS[group](scale, repeats))
+    return {
+        "suite_version": SUITE_VERSION,
+        "created_at": datetime.utcnow().isoformat() + "Z",
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "results": results,
+    }
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any],
+            threshold: float = DEFAULT_THRESHOLD) -> List[Dict[str, Any]]:
+    """
+    Median latency change of every benchmark run against the baseline; a
+    benchmark regressed when it is more than threshold (a fraction) slower.
+    Benchmarks without a baseline are listed but never regress.
+    """
+    previous = baseline["results"]
+    rows = []
+    for name, result in sorted(results["results"].items()):
+        if name not in previous:
+            rows.append({"name": name, "baseline": None, "current": result["median"],
+                         "change": None, "regressed": False})
+            continue
+        change = result["median"] / previous[name]["median"] - 1
+        rows.append({"name": name, "baseline": previous[name]["median"], "current": result["median"],
+                     "change": change, "regressed": change > threshold})
+    return rows
+
+
+def _format_us(value) -> str:
+    return f"{value:12.2f}" if value is not None else f"{'-':>12}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--baseline", help="results file to compare against")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help=f"allowed median slowdown as a fraction (default: {DEFAULT_THRESHOLD})")
+    parser.add_argument("--only", nargs="+", choices=list(GROUPS), default=list(GROUPS))
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--quick", action="store_true", help="a tenth of the operations (smoke run)")
+    args = parser.parse_args()
+
+    # Keep per-call log records out of the measurement
+    logging.disable(logging.WARNING)
+
+    results = run(args.only, 0.1 if args.quick else 1.0, args.repeats)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if not args.baseline:
+        print(f"{'benchmark':<40} {'median us':>12} {'min us':>12}")
+        for name, result in results["results"].items():
+            print(f"{name:<40} {result['median']:12.2f} {result['min']:12.2f}")
+        return
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    rows = compare(results, baseline, args.threshold)
+    print(f"{'benchmark':<40} {'baseline us':>12} {'current us':>12} {'change':>8}")
+    for row in rows:
+        change = f"{row['change'] * 100:+7.1f}%" if row["change"] is not None else f"{'new':>8}"
+        flag = "  REGRESSED" if row["regressed"] else ""
+        print(f"{row['name']:<40} {_format_us(row['baseline'])} {_format_us(row['current'])} {change}{flag}")
+
+    regressed = [row["name"] for row in rows if row["regressed"]]
+    if regressed:
+        print(f"{len(regressed)} benchmark(s) regressed by more than {args.threshold:.0%}: {', '.join(regressed)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
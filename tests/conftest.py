@@ -0,0 +1,8 @@
+import sys
+from pathlib import Path
+
+# The backend is run from its own directory (see backend/server.py), so make its
+# modules importable the same way for the test suite.
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
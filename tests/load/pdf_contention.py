@@ -0,0 +1,113 @@
+"""
+Load test: /api/analyze latency while PDF reports are being rendered.
+
+Runs a fixed /api/analyze load against a running server twice, first on its
+own and then while background clients download PDF reports continuously.
+Prints latency percentiles for both phases, which should stay flat now that
+rendering happens in the PDF render pool.
+
+    python -m tests.load.pdf_contention --base-url http://localhost:8001 \
+        [--requests 500] [--concurrency 8] [--pdf-clients 8]
+"""
+import argparse
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+SCREENING = {
+    "screening_request": {
+        "user": {"age": 42, "name": "Load Test", "location": "Mumbai"},
+        "symptoms": {"cough_gt_2_weeks": True, "fever_evening": True, "weight_loss": True},
+        "deep_questions": {
+            "cough_duration_weeks": "> 1 month",
+            "exposure_contact": "Family member with TB",
+            "previous_conditions": ["diabetes"]
+        },
+        "local_score": 10
+    },
+    "user_location": {"lat": 19.0760, "lng": 72.8777}
+}
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def summarize(latencies_ms):
+    return {
+        "count": len(latencies_ms),
+        "p50_ms": percentile(latencies_ms, 50),
+        "p95_ms": percentile(latencies_ms, 95),
+        "p99_ms": percentile(latencies_ms, 99),
+        "mean_ms": statistics.fmean(latencies_ms),
+    }
+
+
+def analyze_load(base_url, total, concurrency):
+    local = threading.local()
+
+    def one(_):
+        session = getattr(local, "session", None) or requests.Session()
+        local.session = session
+        started = time.perf_counter()
+        response = session.post(f"{base_url}/api/analyze", json=SCREENING, timeout=60)
+        response.raise_for_status()
+        return (time.perf_counter() - started) * 1000
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        return list(pool.map(one, range(total)))
+
+
+def pdf_downloader(base_url, session_id, stop, counts):
+    session = requests.Session()
+    while not stop.is_set():
+        response = session.get(f"{base_url}/api/pdf/report/{session_id}", timeout=120)
+        counts[response.status_code] = counts.get(response.status_code, 0) + 1
+        if response.status_code == 503:
+            time.sleep(float(response.headers.get("Retry-After", 1)) / 10)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--base-url", default="http://localhost:8001")
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--pdf-clients", type=int, default=8)
+    args = parser.parse_args()
+
+    session_id = requests.post(f"{args.base_url}/api/analyze", json=SCREENING, timeout=60).json()["session_id"]
+    analyze_load(args.base_url, min(args.requests, 50), args.concurrency)  # warm-up
+
+    baseline = summarize(analyze_load(args.base_url, args.requests, args.concurrency))
+
+    stop = threading.Event()
+    counts = {}
+    downloaders = [
+        threading.Thread(target=pdf_downloader, args=(args.base_url, session_id, stop, counts), daemon=True)
+        for _ in range(args.pdf_clients)
+    ]
+    for thread in downloaders:
+        thread.start()
+    started = time.perf_counter()
+    try:
+        contended = summarize(analyze_load(args.base_url, args.requests, args.concurrency))
+    finally:
+        stop.set()
+        for thread in downloaders:
+            thread.join()
+    elapsed = time.perf_counter() - started
+
+    print(f"{'phase':<22} {'n':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'mean ms':>8}")
+    for name, row in [("analyze only", baseline), ("analyze + PDF renders", contended)]:
+        print(f"{name:<22} {row['count']:>6} {row['p50_ms']:>8.1f} {row['p95_ms']:>8.1f} "
+              f"{row['p99_ms']:>8.1f} {row['mean_ms']:>8.1f}")
+    rendered = counts.get(200, 0)
+    print(f"PDF downloads: {rendered} ok ({rendered / elapsed:.1f}/s), statuses: {counts}")
+
+
+if __name__ == "__main__":
+    main()
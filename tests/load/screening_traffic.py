@@ -0,0 +1,389 @@
+"""
+Load test: realistic screening traffic against one app worker and mongod.
+
+Virtual users run screening journeys back to back for --duration seconds.
+Each journey optionally uploads a chest X-ray, then posts the screening to
+/api/analyze. It then reads the result page (/api/session/{id}/summary),
+sometimes browses /api/referrals near the user, and sometimes downloads
+the PDF report. Screenings are synthesized from symptom profiles, answers
+the frontend offers, upload sizes of phone photos and scans, and
+locations across the referral area. Throughput, latency percentiles and
+error rates are reported per endpoint.
+
+With --ramp the load steps through several concurrency levels. It reports
+the highest screenings/s whose /api/analyze p99 stays within --slo-p99-ms
+(with under 1% errors), which is the sustainable rate of one worker.
+The warm-up and every level use their own seed, so no level replays the
+screenings of another; each level's analysis cache hit rate is reported
+alongside.
+
+--start-app starts a scratch mongod (needs mongod on PATH) and one uvicorn
+worker of the backend, and stops both afterwards. Without it, point
+--base-url at a running server.
+
+    python -m tests.load.screening_traffic [--base-url http://localhost:8001 | --start-app]
+        [--duration 60] [--concurrency 16] [--ramp 4 8 16 32] [--slo-p99-ms 500] [--json out.json]
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+
+import requests
+
+from tests.load.pdf_contention import percentile
+
+BACKEND_DIR = Path(__file__).resolve().parents[2] / "backend"
+
+# Share of journeys that do each optional step
+UPLOAD_RATE = 0.2
+REFERRALS_RATE = 0.5
+PDF_RATE = 0.3
+PDF_REPEAT_RATE = 0.3  # of PDF downloads, how many come back with If-None-Match
+
+# (weight, per-symptom probability) of who comes to be screened
+SYMPTOM_PROFILES = [
+    (0.30, {"cough_gt_2_weeks": 0.05, "cough_with_sputum": 0.05, "cough_with_blood": 0.0, "fever_evening": 0.05,
+            "weight_loss": 0.03, "night_sweats": 0.03, "chest_pain": 0.05, "loss_of_appetite": 0.05}),
+    (0.45, {"cough_gt_2_weeks": 0.5, "cough_with_sputum": 0.3, "cough_with_blood": 0.02, "fever_evening": 0.3,
+            "weight_loss": 0.15, "night_sweats": 0.15, "chest_pain": 0.2, "loss_of_appetite": 0.2}),
+    (0.25, {"cough_gt_2_weeks": 0.9, "cough_with_sputum": 0.7, "cough_with_blood": 0.2, "fever_evening": 0.7,
+            "weight_loss": 0.6, "night_sweats": 0.6, "chest_pain": 0.4, "loss_of_appetite": 0.5}),
+]
+# Deep question answers of people reporting the matching symptom
+COUGH_DURATIONS = ["2-4 weeks", "> 1 month"]
+COUGH_TYPES = ["Dry", "With sputum"]
+FEVER_PATTERNS = ["Evening/low-grade", "High with chills", "Comes and goes"]
+WEIGHT_APPETITE = ["Weight loss", "Appetite loss", "Both"]
+SWEATS_FATIGUE = ["Night sweats", "Fatigue", "Both"]
+EXPOSURES = ["No known contact", "Family member with TB", "Close workplace contact",
+             "Neighbour / Community contact"]
+CONDITIONS = [("diabetes", 0.12), ("smoker", 0.15), ("alcohol_use", 0.1), ("previous_tb_completed", 0.05),
+              ("previous_tb_not_completed", 0.02), ("hiv", 0.02), ("kidney_disease", 0.02), ("cancer", 0.01)]
+
+# (weight, name, lat, lng, spread in degrees) of where screenings come from;
+# the rest carry no location
+LOCATIONS = [
+    (0.6, "Mumbai", 19.07, 72.88, 0.12),
+    (0.1, "Hyderabad", 17.42, 78.45, 0.1),
+    (0.1, "Delhi", 28.6, 77.2, 0.15),
+]
+NO_LOCATION_RATE = 0.2
+
+# X-ray photos and scans: log-normal around 400 KB, capped below the 10 MB limit
+UPLOAD_MEDIAN_BYTES = 400 * 1024
+UPLOAD_MAX_BYTES = 8 * 1024 * 1024
+UPLOAD_FORMATS = [("image/jpeg", b"\xff\xd8\xff\xe0", "jpg"), ("image/png", b"\x89PNG\r\n\x1a\n", "png"),
+                  ("application/pdf", b"%PDF-1.4\n", "pdf")]
+
+
+class TrafficGenerator:
+    """
+    Synthetic screenings and upload payloads from a seeded random source
+    (one per virtual user)
+    """
+
+    def __init__(self, seed):
+        self.rng = random.Random(seed)
+
+    def _weighted(self, choices):
+        return self.rng.choices(choices, weights=[choice[0] for choice in choices])[0]
+
+    def location(self):
+        if self.rng.random() < NO_LOCATION_RATE:
+            return None, None
+        _, name, lat, lng, spread = self._weighted(LOCATIONS)
+        return name, {"lat": round(lat + self.rng.gauss(0, spread), 5), "lng": round(lng + self.rng.gauss(0, spread), 5)}
+
+    def screening(self, uploads=()):
+        rng = self.rng
+        _, probabilities = self._weighted(SYMPTOM_PROFILES)
+        symptoms = {name: rng.random() < p for name, p in probabilities.items()}
+        symptoms["none_of_the_above"] = not any(symptoms.values())
+        deep_questions = {
+            "exposure_contact": rng.choices(EXPOSURES, weights=[0.7, 0.12, 0.08, 0.1])[0],
+            "previous_conditions": [name for name, p in CONDITIONS if rng.random() < p],
+        }
+        if symptoms["cough_gt_2_weeks"]:
+            deep_questions["cough_duration_weeks"] = rng.choice(COUGH_DURATIONS)
+            deep_questions["cough_type"] = "With blood" if symptoms["cough_with_blood"] else rng.choice(COUGH_TYPES)
+        if symptoms["fever_evening"]:
+            deep_questions["fever_pattern"] = rng.choice(FEVER_PATTERNS)
+        if symptoms["weight_loss"] or symptoms["loss_of_appetite"]:
+            deep_questions["weight_appetite"] = rng.choice(WEIGHT_APPETITE)
+        if symptoms["night_sweats"]:
+            deep_questions["night_sweats_fatigue"] = rng.choice(SWEATS_FATIGUE)
+
+        location_name, user_location = self.location()
+        return {
+            "screening_request": {
+                "user": {"name": f"Load {rng.randrange(10 ** 6)}", "age": rng.randint(15, 80),
+                         "gender": rng.choice(["Male", "Female"]), "location": location_name,
+                         "contact": f"9{rng.randrange(10 ** 9):09d}"},
+                "symptoms": symptoms,
+                "deep_questions": deep_questions,
+                "uploads": list(uploads),
+                "local_score": sum(symptoms.values()) * 2,
+            },
+            "user_location": user_location,
+        }
+
+    def upload(self):
+        """(filename, bytes, content type) of an X-ray upload"""
+        size = min(int(self.rng.lognormvariate(0, 0.8) * UPLOAD_MEDIAN_BYTES), UPLOAD_MAX_BYTES)
+        content_type, signature, extension = self.rng.choices(UPLOAD_FORMATS, weights=[0.6, 0.25, 0.15])[0]
+        body = signature + self.rng.randbytes(max(size - len(signature), 0))
+        return f"xray_{self.rng.randrange(10 ** 6)}.{extension}", body, content_type
+
+
+class Recorder:
+    """
+    Latency and status of every request, per endpoint
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.statuses = defaultdict(lambda: defaultdict(int))
+        self.errors = defaultdict(int)
+
+    def request(self, http, endpoint, method, url, ok_statuses=(200,), **kwargs):
+        started = time.perf_counter()
+        try:
+            response = http.request(method, url, timeout=120, **kwargs)
+            status = response.status_code
+        except requests.RequestException as e:
+            response, status = None, type(e).__name__
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        with self._lock:
+            self.latencies[endpoint].append(elapsed_ms)
+            self.statuses[endpoint][status] += 1
+            if status not in ok_statuses:
+                self.errors[endpoint] += 1
+        return response if status in ok_statuses else None
+
+    def summary(self, elapsed):
+        rows = {}
+        for endpoint, latencies in sorted(self.latencies.items()):
+            rows[endpoint] = {
+                "count": len(latencies),
+                "per_sec": len(latencies) / elapsed,
+                "error_rate": self.errors[endpoint] / len(latencies),
+                "p50_ms": percentile(latencies, 50),
+                "p90_ms": percentile(latencies, 90),
+                "p99_ms": percentile(latencies, 99),
+                "max_ms": max(latencies),
+                "statuses": {str(status): n for status, n in self.statuses[endpoint].items()},
+            }
+        return rows
+
+
+def journey(base_url, http, generator, recorder):
+    rng = generator.rng
+    uploads = []
+    if rng.random() < UPLOAD_RATE:
+        filename, body, content_type = generator.upload()
+        response = recorder.request(http, "POST /api/upload", "POST", f"{base_url}/api/upload",
+                                    files={"file": (filename, body, content_type)},
+                                    data={"file_type": "chest_xray"})
+        if response is not None:
+            uploads.append({"type": "chest_xray", "file_id": response.json()["file_id"]})
+
+    screening = generator.screening(uploads)
+    response = recorder.request(http, "POST /api/analyze", "POST", f"{base_url}/api/analyze", json=screening)
+    if response is None:
+        return
+    result = response.json()
+    session_id = result["session_id"]
+
+    recorder.request(http, "GET /api/session/{id}/summary", "GET", f"{base_url}/api/session/{session_id}/summary")
+
+    location = screening["user_location"]
+    if location and rng.random() < REFERRALS_RATE:
+        recorder.request(http, "GET /api/referrals", "GET", f"{base_url}/api/referrals",
+                         params={**location, "urgency": result["urgency"]})
+
+    if rng.random() < PDF_RATE:
+        url = f"{base_url}/api/pdf/report/{session_id}"
+        pdf = recorder.request(http, "GET /api/pdf/report/{id}", "GET", url)
+        if pdf is not None and rng.random() < PDF_REPEAT_RATE:
+            recorder.request(http, "GET /api/pdf/report/{id}", "GET", url, ok_statuses=(200, 304),
+                             headers={"If-None-Match": pdf.headers.get("ETag", "")})
+
+
+def run_load(base_url, concurrency, duration, seed=0):
+    """
+    Run journeys from concurrency virtual users for duration seconds
+    """
+    recorder = Recorder()
+    deadline = time.perf_counter() + duration
+
+    def user(index):
+        http = requests.Session()
+        generator = TrafficGenerator(seed * 100003 + index)
+        while time.perf_counter() < deadline:
+            journey(base_url, http, generator, recorder)
+
+    started = time.perf_counter()
+    users = [threading.Thread(target=user, args=(i,), daemon=True) for i in range(concurrency)]
+    for thread in users:
+        thread.start()
+    for thread in users:
+        thread.join()
+    return recorder.summary(time.perf_counter() - started)
+
+
+def wait_until_healthy(base_url, timeout=60.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if requests.get(f"{base_url}/api/health", timeout=2).json().get("status") == "healthy":
+                return
+        except (requests.RequestException, ValueError):
+            pass
+        time.sleep(0.5)
+    raise RuntimeError(f"{base_url} did not become healthy within {timeout:.0f}s")
+
+
+class LocalStack:
+    """
+    Scratch mongod and a single uvicorn worker of the backend
+    """
+
+    def __init__(self, app_port=8011, mongo_port=27027):
+        self.app_port = app_port
+        self.mongo_port = mongo_port
+        self.base_url = f"http://127.0.0.1:{app_port}"
+        self._processes = []
+        self._dbpath = None
+
+    def __enter__(self):
+        mongod = shutil.which("mongod")
+        if mongod is None:
+            raise RuntimeError("--start-app needs mongod on PATH")
+        self._dbpath = tempfile.TemporaryDirectory(prefix="loadtest-mongo-")
+        self._processes.append(subprocess.Popen(
+            [mongod, "--dbpath", self._dbpath.name, "--port", str(self.mongo_port), "--bind_ip", "127.0.0.1"],
+            stdout=subprocess.DEVNULL
+        ))
+        env = {**os.environ, "MONGO_URL": f"mongodb://127.0.0.1:{self.mongo_port}", "DB_NAME": "loadtest",
+               "BLOB_STORE": "gridfs"}
+        self._processes.append(subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "server:app", "--port", str(self.app_port), "--workers", "1",
+             "--log-level", "warning"],
+            cwd=BACKEND_DIR, env=env
+        ))
+        try:
+            wait_until_healthy(self.base_url)
+        except Exception:
+            self.__exit__(None, None, None)
+            raise
+        return self
+
+    def __exit__(self, *exc):
+        for process in reversed(self._processes):
+            process.terminate()
+            try:
+                process.wait(timeout=15)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        self._processes.clear()
+        if self._dbpath is not None:
+            self._dbpath.cleanup()
+            self._dbpath = None
+
+
+def print_summary(rows):
+    print(f"{'endpoint':<30} {'n':>7} {'req/s':>8} {'errors':>7} {'p50 ms':>8} {'p90 ms':>8} "
+          f"{'p99 ms':>8} {'max ms':>8}  statuses")
+    for endpoint, row in rows.items():
+        print(f"{endpoint:<30} {row['count']:>7} {row['per_sec']:>8.1f} {row['error_rate']:>6.1%} "
+              f"{row['p50_ms']:>8.1f} {row['p90_ms']:>8.1f} {row['p99_ms']:>8.1f} {row['max_ms']:>8.1f}  "
+              f"{row['statuses']}")
+
+
+def within_slo(rows, slo_p99_ms):
+    analyze = rows.get("POST /api/analyze")
+    return bool(analyze) and analyze["p99_ms"] <= slo_p99_ms and analyze["error_rate"] < 0.01
+
+
+def analysis_cache_counts(base_url):
+    """
+    (hits, misses) of the server's analysis result cache so far
+    """
+    try:
+        cache = requests.get(f"{base_url}/api/analysis/cache/stats", timeout=5).json()["cache"]
+        return cache["hits"], cache["misses"]
+    except (requests.RequestException, ValueError, KeyError):
+        return None
+
+
+def run(base_url, levels, duration, slo_p99_ms, seed):
+    # Every run of journeys gets its own seed: replaying the same screenings
+    # would let /api/analyze answer from its result cache
+    run_load(base_url, min(levels), min(duration, 5), seed * 1000)  # warm-up
+    steps = []
+    for index, concurrency in enumerate(levels, start=1):
+        before = analysis_cache_counts(base_url)
+        rows = run_load(base_url, concurrency, duration, seed * 1000 + index)
+        after = analysis_cache_counts(base_url)
+        hit_rate = None
+        if before and after and sum(after) > sum(before):
+            hit_rate = (after[0] - before[0]) / (sum(after) - sum(before))
+        steps.append({"concurrency": concurrency, "endpoints": rows, "analysis_cache_hit_rate": hit_rate,
+                      "within_slo": within_slo(rows, slo_p99_ms)})
+        print(f"\nconcurrency {concurrency}:")
+        print_summary(rows)
+    return steps
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--base-url", default="http://localhost:8001")
+    parser.add_argument("--start-app", action="store_true", help="start a scratch mongod and one uvicorn worker")
+    parser.add_argument("--duration", type=float, default=60.0, help="seconds per load level")
+    parser.add_argument("--concurrency", type=int, default=16, help="virtual users")
+    parser.add_argument("--ramp", type=int, nargs="+", help="concurrency levels to step through instead")
+    parser.add_argument("--slo-p99-ms", type=float, default=500.0, help="/api/analyze p99 objective")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="also write every level's results to this file")
+    args = parser.parse_args()
+
+    levels = sorted(args.ramp) if args.ramp else [args.concurrency]
+    if args.start_app:
+        with LocalStack() as stack:
+            steps = run(stack.base_url, levels, args.duration, args.slo_p99_ms, args.seed)
+    else:
+        steps = run(args.base_url, levels, args.duration, args.slo_p99_ms, args.seed)
+
+    print(f"\n{'concurrency':>11} {'screenings/s':>13} {'analyze p99 ms':>15} {'errors':>7} {'cache hits':>10}  "
+          f"SLO {args.slo_p99_ms:.0f} ms")
+    for step in steps:
+        analyze = step["endpoints"].get("POST /api/analyze", {})
+        errors = sum(row["error_rate"] * row["count"] for row in step["endpoints"].values())
+        requests_made = sum(row["count"] for row in step["endpoints"].values()) or 1
+        hit_rate = step["analysis_cache_hit_rate"]
+        hits = f"{hit_rate:>10.1%}" if hit_rate is not None else f"{'-':>10}"
+        print(f"{step['concurrency']:>11} {analyze.get('per_sec', 0.0):>13.1f} {analyze.get('p99_ms', 0.0):>15.1f} "
+              f"{errors / requests_made:>6.1%} {hits}  {'ok' if step['within_slo'] else 'BREACHED'}")
+    sustained = [step["endpoints"]["POST /api/analyze"]["per_sec"] for step in steps if step["within_slo"]]
+    if sustained:
+        print(f"sustained within SLO: {max(sustained):.1f} screenings/s")
+    else:
+        print("no load level met the SLO")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"slo_p99_ms": args.slo_p99_ms, "duration_s": args.duration, "levels": steps}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
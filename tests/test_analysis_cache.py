@@ -0,0 +1,55 @@
+import asyncio
+
+from models.screening import DeepQuestions, ScreeningRequest, Symptoms, UserInfo
+from services.analysis import AnalysisService
+from services.analysis_cache import AnalysisResultCache
+
+
+def make_request(age=40, cough=True):
+    return ScreeningRequest(
+        user=UserInfo(age=age),
+        symptoms=Symptoms(cough_gt_2_weeks=cough, fever_evening=True),
+        deep_questions=DeepQuestions(exposure_contact="Family member with TB"),
+        local_score=5
+    )
+
+
+def test_hit_reuses_result_with_fresh_session_and_exact_distances():
+    cache = AnalysisResultCache(grid_deg=0.01)
+    service = AnalysisService(result_cache=cache)
+
+    first = asyncio.run(service.analyze_screening(make_request(), {"lat": 19.0761, "lng": 72.8771}))
+    second = asyncio.run(service.analyze_screening(make_request(), {"lat": 19.0768, "lng": 72.8779}))
+    uncached = asyncio.run(AnalysisService().analyze_screening(make_request(), {"lat": 19.0768, "lng": 72.8779}))
+
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+    assert second.session_id != first.session_id
+    assert second.dict(exclude={"session_id"}) == uncached.dict(exclude={"session_id"})
+
+
+def test_key_covers_inputs_and_location_cell():
+    cache = AnalysisResultCache(grid_deg=0.01)
+    key = cache.make_key(make_request(), {"lat": 19.0761, "lng": 72.8771})
+
+    assert key == cache.make_key(make_request(), {"lat": 19.0769, "lng": 72.8779})
+    assert key != cache.make_key(make_request(), {"lat": 19.0861, "lng": 72.8771})
+    assert key != cache.make_key(make_request(age=70), {"lat": 19.0761, "lng": 72.8771})
+    assert key != cache.make_key(make_request(cough=False), {"lat": 19.0761, "lng": 72.8771})
+    assert key != cache.make_key(make_request(), None)
+
+
+def test_lru_and_ttl_eviction():
+    cache = AnalysisResultCache(max_entries=2, ttl_seconds=60)
+    result = asyncio.run(AnalysisService().analyze_screening(make_request()))
+    cache.put("a", result)
+    cache.put("b", result)
+    cache.get("a")
+    cache.put("c", result)
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.stats()["evictions"] == 1
+
+    cache.ttl_seconds = -1
+    assert cache.get("a") is None
+    assert cache.stats()["expired"] == 1
@@ -0,0 +1,115 @@
+import itertools
+import random
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from models.screening import Symptoms, DeepQuestions
+from services.scoring import TBScoringService
+from services.batch_scoring import BatchScoringService
+
+SYMPTOM_FIELDS = list(TBScoringService.SYMPTOM_WEIGHTS.keys()) + ['none_of_the_above']
+DURATIONS = [None, "< 2 weeks", "2-4 weeks", "> 1 month"]
+EXPOSURES = [None, "No known contact", "Family member with TB", "Close workplace contact",
+             "Neighbour / Community contact", "Unknown exposure"]
+CONDITIONS = list(TBScoringService.RISK_ADJUSTMENTS.keys()) + ['asthma']
+
+
+@pytest.fixture(scope="module")
+def scoring_service():
+    return TBScoringService()
+
+
+@pytest.fixture(scope="module")
+def batch_service(scoring_service):
+    return BatchScoringService(scoring_service)
+
+
+def _scalar_results(scoring_service, symptoms, deep_questions):
+    scores, risk_levels, urgencies = [], [], []
+    for symptom, deep in zip(symptoms, deep_questions):
+        score, _ = scoring_service.calculate_comprehensive_score(symptom, deep)
+        scores.append(score)
+        risk_levels.append(scoring_service.get_risk_classification(score))
+        urgencies.append(scoring_service.get_urgency_level(score, symptom, deep))
+    return scores, risk_levels, urgencies
+
+
+def _random_deep_questions(rng):
+    return DeepQuestions(
+        cough_duration_weeks=rng.choice(DURATIONS),
+        exposure_contact=rng.choice(EXPOSURES),
+        # Duplicates are intentional: the scalar path counts them twice
+        previous_conditions=[rng.choice(CONDITIONS) for _ in range(rng.randint(0, 4))]
+    )
+
+
+def _assert_parity(scoring_service, batch_service, symptoms, deep_questions):
+    expected_scores, expected_levels, expected_urgencies = _scalar_results(
+        scoring_service, symptoms, deep_questions
+    )
+    results = batch_service.score_batch(batch_service.build_frame(symptoms, deep_questions))
+
+    assert results["scores"].dtype == np.int64
+    assert results["scores"].tolist() == expected_scores
+    assert results["risk_levels"].tolist() == expected_levels
+    assert results["urgencies"].tolist() == expected_urgencies
+
+
+def test_every_symptom_combination_matches_scalar(scoring_service, batch_service):
+    rng = random.Random(42)
+    symptoms, deep_questions = [], []
+    for flags in itertools.product([False, True], repeat=len(SYMPTOM_FIELDS)):
+        for _ in range(4):
+            symptoms.append(Symptoms(**dict(zip(SYMPTOM_FIELDS, flags))))
+            deep_questions.append(_random_deep_questions(rng))
+
+    _assert_parity(scoring_service, batch_service, symptoms, deep_questions)
+
+
+def test_random_batches_match_scalar(scoring_service, batch_service):
+    rng = random.Random(7)
+    symptoms = [Symptoms(**{field: rng.random() < 0.4 for field in SYMPTOM_FIELDS}) for _ in range(2000)]
+    deep_questions = [_random_deep_questions(rng) for _ in range(2000)]
+
+    _assert_parity(scoring_service, batch_service, symptoms, deep_questions)
+
+
+def test_mapping_of_arrays_input(scoring_service, batch_service):
+    batch = {
+        'cough_gt_2_weeks': np.array([True, False, True]),
+        'cough_with_blood': np.array([False, False, True]),
+        'fever_evening': np.array([True, False, True]),
+        'cough_duration_weeks': ["> 1 month", None, "2-4 weeks"],
+        'exposure_contact': ["Family member with TB", None, "No known contact"],
+        'previous_conditions': [['diabetes'], [], ['hiv', 'smoker']],
+    }
+    results = batch_service.score_batch(batch)
+
+    symptoms = [
+        Symptoms(cough_gt_2_weeks=True, fever_evening=True),
+        Symptoms(),
+        Symptoms(cough_gt_2_weeks=True, cough_with_blood=True, fever_evening=True),
+    ]
+    deep_questions = [
+        DeepQuestions(cough_duration_weeks="> 1 month", exposure_contact="Family member with TB",
+                      previous_conditions=['diabetes']),
+        DeepQuestions(),
+        DeepQuestions(cough_duration_weeks="2-4 weeks", exposure_contact="No known contact",
+                      previous_conditions=['hiv', 'smoker']),
+    ]
+    expected_scores, expected_levels, expected_urgencies = _scalar_results(
+        scoring_service, symptoms, deep_questions
+    )
+    assert results["scores"].tolist() == expected_scores
+    assert results["risk_levels"].tolist() == expected_levels
+    assert results["urgencies"].tolist() == expected_urgencies
+
+
+def test_empty_batch(batch_service):
+    results = batch_service.score_batch(pd.DataFrame())
+
+    assert len(results["scores"]) == 0
+    assert len(results["risk_levels"]) == 0
+    assert len(results["urgencies"]) == 0
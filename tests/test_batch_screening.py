@@ -0,0 +1,186 @@
+import asyncio
+import base64
+import csv
+import json
+from datetime import datetime
+
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+from services.analysis import AnalysisService
+from services.batch_screening import BatchScreeningRunner, CheckpointMismatchError, read_screening_rows
+from services.blob_store import FilesystemBlobStore
+from services.parallel_analysis import ParallelAnalyzer
+
+HEADER = ["user.age", "symptoms.cough_gt_2_weeks", "symptoms.fever_evening",
+          "deep_questions.previous_conditions", "local_score", "user_location.lat", "user_location.lng"]
+
+
+def write_camp_csv(path, rows):
+    with open(path, "w", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(HEADER)
+        for i in range(rows):
+            age = "" if i == 3 else str(20 + i)  # row 4 is missing the required age
+            writer.writerow([age, "yes" if i % 2 else "no", "true", "diabetes;hiv" if i % 5 == 0 else "",
+                             i % 7, "19.07", "72.87"])
+
+
+class Interrupted(Exception):
+    pass
+
+
+class FailingAnalysisService(AnalysisService):
+    """Raises once a given number of rows were analyzed, like a killed run"""
+
+    def __init__(self, fail_after):
+        super().__init__()
+        self.fail_after = fail_after
+        self.calls = 0
+
+    async def analyze_screening(self, screening_request, user_location=None):
+        self.calls += 1
+        if self.calls > self.fail_after:
+            raise Interrupted
+        return await super().analyze_screening(screening_request, user_location)
+
+
+def test_csv_rows_are_nested_and_skippable(tmp_path):
+    path = tmp_path / "camp.csv"
+    write_camp_csv(path, 6)
+
+    rows = list(read_screening_rows(str(path), skip=4))
+
+    assert [number for number, _ in rows] == [5, 6]
+    assert rows[0][1]["user"] == {"age": "24"}
+    assert rows[0][1]["symptoms"]["cough_gt_2_weeks"] == "no"
+    assert rows[0][1]["user_location"] == {"lat": "19.07", "lng": "72.87"}
+    assert "previous_conditions" not in rows[0][1]["deep_questions"]
+    assert rows[1][1]["deep_questions"]["previous_conditions"] == ["diabetes", "hiv"]
+
+
+def test_resumes_after_interruption_without_duplicates(tmp_path):
+    path, output = tmp_path / "camp.csv", tmp_path / "results.jsonl"
+    write_camp_csv(path, 23)
+    db = AsyncMongoMockClient()["batch"]
+
+    async def scenario():
+        await db.screening_sessions.create_index("id", unique=True)
+        with pytest.raises(Interrupted):
+            await BatchScreeningRunner(FailingAnalysisService(12), db, chunk_size=5).run(str(path), str(output))
+        interrupted = await db.screening_sessions.count_documents({})
+        counts = await BatchScreeningRunner(AnalysisService(), db, chunk_size=5).run(str(path), str(output))
+        return interrupted, counts, await db.screening_sessions.count_documents({})
+
+    interrupted, counts, stored = asyncio.run(scenario())
+    records = [json.loads(line) for line in output.read_text().splitlines()]
+
+    assert interrupted == 9  # two complete chunks (one invalid row)
+    assert [record["row"] for record in records] == list(range(1, 24))
+    assert "error" in records[3]
+    assert records[0]["referrals"][0]["distance"].endswith("km")
+    assert counts == {"analyzed": 22, "invalid": 1, "stored": 22, "rows": 23}
+    assert stored == 22
+    assert len({record["session_id"] for record in records if "session_id" in record}) == 22
+    assert not (tmp_path / "results.jsonl.checkpoint").exists()
+
+
+def test_csv_results_and_checkpoint_for_other_input(tmp_path):
+    path, other, output = tmp_path / "camp.csv", tmp_path / "other.csv", tmp_path / "results.csv"
+    write_camp_csv(path, 8)
+    write_camp_csv(other, 9)
+
+    async def interrupted_run():
+        with pytest.raises(Interrupted):
+            await BatchScreeningRunner(FailingAnalysisService(4), chunk_size=3).run(str(path), str(output))
+
+    asyncio.run(interrupted_run())
+    with pytest.raises(CheckpointMismatchError):
+        asyncio.run(BatchScreeningRunner(AnalysisService()).run(str(other), str(output)))
+
+    counts = asyncio.run(BatchScreeningRunner(AnalysisService(), chunk_size=3).run(str(path), str(output)))
+    with open(output, newline="") as file:
+        results = list(csv.DictReader(file))
+
+    assert counts["stored"] == 0
+    assert [int(result["row"]) for result in results] == list(range(1, 9))
+    assert results[0]["likelihood"] and results[0]["error"] == ""
+
+
+def test_parallel_run_matches_in_process_results(tmp_path):
+    path = tmp_path / "camp.csv"
+    write_camp_csv(path, 40)
+    analyzer = ParallelAnalyzer(workers=2)
+
+    try:
+        sequential = asyncio.run(BatchScreeningRunner(AnalysisService(), chunk_size=15).run(
+            str(path), str(tmp_path / "sequential.jsonl")))
+        parallel = asyncio.run(BatchScreeningRunner(AnalysisService(), chunk_size=15, parallel_analyzer=analyzer).run(
+            str(path), str(tmp_path / "parallel.jsonl")))
+    finally:
+        analyzer.shutdown()
+
+    # Session ids derive from each run's own job id
+    def results(name):
+        return [{key: value for key, value in json.loads(line).items() if key != "session_id"}
+                for line in (tmp_path / name).read_text().splitlines()]
+
+    assert parallel == sequential
+    assert results("parallel.jsonl") == results("sequential.jsonl")
+
+
+def write_jsonl(path, documents):
+    path.write_text("".join(json.dumps(document) + "\n" for document in documents))
+
+
+def screening(**extra):
+    return dict({"user": {"age": 40}, "symptoms": {"cough_gt_2_weeks": True}, "deep_questions": {},
+                 "local_score": 3}, **extra)
+
+
+def test_inline_uploads_are_stored_and_screening_dates_kept(tmp_path):
+    path, output = tmp_path / "camp.jsonl", tmp_path / "results.jsonl"
+    content = b"\x89PNG\r\n\x1a\n" + b"\x00" * 64
+    write_jsonl(path, [
+        screening(screened_at="2026-09-14", uploads=[
+            {"type": "xray", "filename": "chest.png", "content_base64": base64.b64encode(content).decode()}
+        ]),
+        screening(screened_at="2026-09-15T10:30:00+05:30"),
+        screening(screened_at="last week"),
+        screening(),
+    ])
+    db = AsyncMongoMockClient()["batch_uploads"]
+    store = FilesystemBlobStore(str(tmp_path / "blobs"))
+
+    async def scenario():
+        counts = await BatchScreeningRunner(AnalysisService(), db, blob_store=store).run(str(path), str(output))
+        sessions = await db.screening_sessions.find({}, {"_id": 0}).to_list(None)
+        return counts, {session["id"]: session for session in sessions}
+
+    started = datetime.utcnow()
+    counts, sessions = asyncio.run(scenario())
+    records = [json.loads(line) for line in output.read_text().splitlines()]
+
+    assert counts["analyzed"] == 3 and counts["invalid"] == 1
+    assert "screened_at" in records[2]["error"]
+    first, second, fourth = (sessions[records[i]["session_id"]] for i in (0, 1, 3))
+    upload = first["uploads"][0]
+    assert upload["file_id"] and upload["size"] == len(content) and "content_base64" not in upload
+    assert asyncio.run(store.get(upload["blob_key"])) == content
+    assert first["created_at"] == datetime(2026, 9, 14)
+    assert second["created_at"] == datetime(2026, 9, 15, 5, 0)
+    assert fourth["created_at"] >= started.replace(microsecond=0)
+
+
+def test_inline_uploads_are_rejected_without_a_database(tmp_path):
+    path, output = tmp_path / "camp.jsonl", tmp_path / "results.jsonl"
+    write_jsonl(path, [
+        screening(uploads=[{"type": "xray", "filename": "chest.png", "content_base64": "iVBORw0KGgo="}]),
+        screening(uploads=[{"type": "xray", "file_id": "5f0000000000000000000000"}]),
+    ])
+
+    counts = asyncio.run(BatchScreeningRunner(AnalysisService()).run(str(path), str(output)))
+    records = [json.loads(line) for line in output.read_text().splitlines()]
+
+    assert counts["invalid"] == 1 and counts["analyzed"] == 1
+    assert "file_id" in records[0]["error"]
@@ -0,0 +1,24 @@
+from tests.benchmarks.suite import compare
+
+
+def results(**medians):
+    return {"results": {name.replace("_", "."): {"unit": "us/op", "median": median, "min": median}
+                        for name, median in medians.items()}}
+
+
+def test_compare_flags_only_slowdowns_beyond_threshold():
+    baseline = results(scoring_score=2.0, pdf_render=10000.0, endpoint_analyze=1500.0)
+    current = results(scoring_score=2.4, pdf_render=13000.0, endpoint_analyze=1000.0)
+
+    rows = {row["name"]: row for row in compare(current, baseline, threshold=0.25)}
+
+    assert not rows["scoring.score"]["regressed"]  # +20%
+    assert rows["pdf.render"]["regressed"] and round(rows["pdf.render"]["change"], 2) == 0.3
+    assert not rows["endpoint.analyze"]["regressed"]  # faster
+
+
+def test_compare_lists_new_benchmarks_without_failing():
+    rows = compare(results(scoring_score=2.0, referrals_lookup=50.0), results(scoring_score=2.0))
+
+    assert [row["name"] for row in rows] == ["referrals.lookup", "scoring.score"]
+    assert rows[0]["change"] is None and not rows[0]["regressed"]
@@ -0,0 +1,39 @@
+import asyncio
+import hashlib
+
+import pytest
+
+from services.blob_store import (BlobNotFoundError, BlobStore, BlobWriter, FilesystemBlobStore, GridFSBlobStore,
+                                 S3BlobStore)
+
+
+def test_filesystem_store_is_content_addressed_and_deduplicates(tmp_path):
+    store = FilesystemBlobStore(str(tmp_path))
+    data = b"%PDF-1.4 chest x-ray report"
+
+    key = asyncio.run(store.put(data, "application/pdf"))
+    again = asyncio.run(store.put(data, "application/pdf"))
+
+    assert key == again == hashlib.sha256(data).hexdigest()
+    assert asyncio.run(store.get(key)) == data
+    assert len([p for p in tmp_path.rglob("*") if p.is_file()]) == 1
+
+
+def test_filesystem_store_missing_and_invalid_keys(tmp_path):
+    store = FilesystemBlobStore(str(tmp_path))
+
+    assert not asyncio.run(store.exists("0" * 64))
+    assert not asyncio.run(store.exists("../etc/passwd"))
+    with pytest.raises(BlobNotFoundError):
+        asyncio.run(store.get("0" * 64))
+    with pytest.raises(BlobNotFoundError):
+        asyncio.run(store.get("../etc/passwd"))
+
+
+def test_store_interfaces_are_abstract():
+    with pytest.raises(TypeError):
+        BlobStore()
+    with pytest.raises(TypeError):
+        BlobWriter()
+    for store in (FilesystemBlobStore, GridFSBlobStore, S3BlobStore):
+        assert not store.__abstractmethods__
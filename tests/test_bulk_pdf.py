@@ -0,0 +1,47 @@
+import asyncio
+import threading
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from mongomock_motor import AsyncMongoMockClient
+
+import database
+import routes.pdf as pdf_routes
+from services.process_pool import BoundedProcessPool
+
+
+def test_bulk_export_over_the_limit_is_refused_not_truncated(monkeypatch):
+    db = AsyncMongoMockClient()["bulk_pdf"]
+    asyncio.run(db.screening_sessions.insert_many(
+        [{"id": f"s{i}", "analysis_result": {"likelihood": "High"}} for i in range(3)]
+    ))
+    monkeypatch.setattr(pdf_routes, "BULK_MAX_SESSIONS", 2)
+    app = FastAPI()
+    app.include_router(pdf_routes.router)
+    app.dependency_overrides[database.get_database] = lambda: db
+
+    response = TestClient(app).post("/api/pdf/bulk", json={"session_ids": ["s0", "s1", "s2"]})
+
+    assert response.status_code == 413
+    assert "More than 2 sessions" in response.json()["detail"]
+
+
+def test_bulk_renders_wait_for_a_slot_and_leave_headroom():
+    pool = BoundedProcessPool(max_workers=0, max_pending=2)
+    release = threading.Event()
+
+    async def scenario():
+        held = asyncio.ensure_future(pool.run(release.wait, 5))
+        await asyncio.sleep(0.01)
+        # A bulk job queues behind the held slot instead of raising ...
+        bulk = asyncio.ensure_future(pool.run(str, "bulk", wait_below=1))
+        await asyncio.sleep(0.05)
+        assert not bulk.done()
+        # ... while an interactive render still gets the remaining slot
+        assert await pool.run(str, "interactive") == "interactive"
+        release.set()
+        assert await held is True
+        return await asyncio.wait_for(bulk, 5)
+
+    assert asyncio.run(scenario()) == "bulk"
+    assert pool.stats()["rejected"] == 0 and pool.stats()["pending"] == 0
@@ -0,0 +1,47 @@
+import itertools
+import random
+
+import pytest
+
+from models.screening import Symptoms, DeepQuestions
+from services.scoring import TBScoringService
+
+SYMPTOM_FIELDS = list(TBScoringService.SYMPTOM_WEIGHTS.keys()) + ['none_of_the_above']
+DURATIONS = [None, "2-4 weeks", "> 1 month"]
+EXPOSURES = [None, "No known contact", "Family member with TB", "Close workplace contact",
+             "Neighbour / Community contact", "Unknown exposure"]
+CONDITIONS = list(TBScoringService.RISK_ADJUSTMENTS.keys()) + ['asthma']
+
+
+@pytest.fixture(scope="module")
+def scoring_service():
+    return TBScoringService()
+
+
+def test_compiled_matches_reference_for_every_symptom_combination(scoring_service):
+    rng = random.Random(3)
+    for flags in itertools.product([False, True], repeat=len(SYMPTOM_FIELDS)):
+        symptoms = Symptoms(**dict(zip(SYMPTOM_FIELDS, flags)))
+        for _ in range(6):
+            deep_questions = DeepQuestions(
+                cough_duration_weeks=rng.choice(DURATIONS),
+                exposure_contact=rng.choice(EXPOSURES),
+                previous_conditions=[rng.choice(CONDITIONS) for _ in range(rng.randint(0, 4))]
+            )
+            assert (scoring_service.calculate_comprehensive_score(symptoms, deep_questions) ==
+                    scoring_service._calculate_comprehensive_score_reference(symptoms, deep_questions))
+
+
+def test_condition_subsets_in_vocabulary_order_use_precomputed_entries(scoring_service):
+    conditions = ['previous_tb_not_completed', 'hiv', 'smoker']
+    tables = scoring_service._compiled
+
+    assert tuple(conditions) in tables.condition_sets
+    symptoms = Symptoms(cough_gt_2_weeks=True)
+    for ordering in (conditions, list(reversed(conditions))):
+        deep_questions = DeepQuestions(previous_conditions=ordering)
+        assert (scoring_service.calculate_comprehensive_score(symptoms, deep_questions) ==
+                scoring_service._calculate_comprehensive_score_reference(symptoms, deep_questions))
+    assert tables.lookup_conditions(list(reversed(conditions)))[1] == (
+        "Smoking history (+1 pts)", "HIV infection (+4 pts)", "Incomplete previous TB treatment (+5 pts)"
+    )
@@ -0,0 +1,86 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+
+# Imports main with load_dotenv replaced by one that "loads" the given
+# settings, so the test checks that .env is read before the modules that
+# configure themselves from it are imported
+SCRIPT = """
+import json, os, sys
+import dotenv
+
+def load_dotenv(*args, **kwargs):
+    os.environ.update(json.loads(sys.argv[1]))
+    return True
+
+dotenv.load_dotenv = load_dotenv
+import main
+print(json.dumps({name: eval(expression) for name, expression in json.loads(sys.argv[2]).items()}))
+"""
+
+
+def import_main_with_dotenv(settings, expressions):
+    result = subprocess.run(
+        [sys.executable, "-c", SCRIPT, json.dumps(settings), json.dumps(expressions)],
+        cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def test_pdf_render_settings_come_from_dotenv():
+    values = import_main_with_dotenv(
+        {"PDF_RENDER_WORKERS": "3", "PDF_RENDER_QUEUE_SIZE": "7", "PDF_RENDER_TIMEOUT_SECONDS": "9",
+         "PDF_RENDER_RETRY_AFTER": "2", "PDF_BULK_MAX_SESSIONS": "11"},
+        {"stats": "main.render_pool.stats()", "timeout": "main.render_pool.timeout",
+         "retry_after": "sys.modules['routes.pdf'].RETRY_AFTER_SECONDS",
+         "bulk_max": "sys.modules['routes.pdf'].BULK_MAX_SESSIONS"}
+    )
+
+    assert values["stats"]["max_workers"] == 3 and values["stats"]["max_pending"] == 7
+    assert values["timeout"] == 9.0
+    assert values["retry_after"] == 2
+    assert values["bulk_max"] == 11
+
+
+def test_pdf_cache_settings_come_from_dotenv(tmp_path):
+    values = import_main_with_dotenv(
+        {"PDF_CACHE_MAX_BYTES": "1234", "PDF_CACHE_DIR": str(tmp_path), "PDF_CACHE_DISK_MAX_BYTES": "5678"},
+        {"cache": "[sys.modules['services.pdf_cache'].pdf_report_cache.max_bytes, "
+                  "sys.modules['services.pdf_cache'].pdf_report_cache.disk_max_bytes, "
+                  "str(sys.modules['services.pdf_cache'].pdf_report_cache.disk_dir)]"}
+    )
+
+    assert values["cache"] == [1234, 5678, str(tmp_path)]
+
+
+def test_session_write_behind_settings_come_from_dotenv(tmp_path):
+    values = import_main_with_dotenv(
+        {"SESSION_WRITE_BEHIND": "1", "SESSION_WRITE_BEHIND_BATCH_SIZE": "25",
+         "SESSION_WRITE_BEHIND_SPILL_DIR": str(tmp_path)},
+        {"buffer": "[main.session_write_buffer.enabled, main.session_write_buffer.max_batch, "
+                   "str(main.session_write_buffer.spill_dir)]"}
+    )
+
+    assert values["buffer"] == [True, 25, str(tmp_path)]
+
+
+def test_analysis_cache_settings_come_from_dotenv():
+    values = import_main_with_dotenv(
+        {"ANALYSIS_CACHE_MAX_ENTRIES": "7", "ANALYSIS_CACHE_TTL_SECONDS": "30"},
+        {"cache": "[sys.modules['routes.screening'].analysis_cache.max_entries, "
+                  "sys.modules['routes.screening'].analysis_cache.ttl_seconds]"}
+    )
+
+    assert values["cache"] == [7, 30.0]
+
+
+def test_metrics_switch_comes_from_dotenv():
+    values = import_main_with_dotenv(
+        {"METRICS_ENABLED": "0"},
+        {"enabled": "sys.modules['services.metrics'].metrics.enabled"}
+    )
+
+    assert values["enabled"] is False
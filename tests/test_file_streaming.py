@@ -0,0 +1,66 @@
+import asyncio
+import base64
+import os
+
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+from repositories.uploaded_files import UploadedFileRepository, iter_base64_range
+from services.blob_store import FilesystemBlobStore
+from services.http_conditional import parse_range
+
+
+async def collect(chunks):
+    return b"".join([chunk async for chunk in chunks])
+
+
+def test_parse_range():
+    assert parse_range(None, 100) is None
+    assert parse_range("bytes=0-9", 100) == (0, 10)
+    assert parse_range("bytes=90-", 100) == (90, 100)
+    assert parse_range("bytes=-10", 100) == (90, 100)
+    assert parse_range("bytes=50-500", 100) == (50, 100)
+    assert parse_range("bytes=0-1,5-6", 100) is None
+    assert parse_range("bytes=abc", 100) is None
+    assert parse_range("items=0-1", 100) is None
+    with pytest.raises(ValueError):
+        parse_range("bytes=100-", 100)
+    with pytest.raises(ValueError):
+        parse_range("bytes=-0", 100)
+
+
+def test_base64_ranges_decode_only_covering_quads():
+    data = os.urandom(1000)
+    encoded = base64.b64encode(data).decode()
+
+    for start, end in [(0, None), (1, 2), (299, 701), (998, 1000), (500, 5000)]:
+        decoded = asyncio.run(collect(iter_base64_range(encoded, start, end, chunk_size=64)))
+        assert decoded == data[start:end]
+
+
+def test_blob_and_legacy_files_stream_the_same_bytes(tmp_path):
+    data = os.urandom(200 * 1024)
+    db = AsyncMongoMockClient()["files"]
+    repository = UploadedFileRepository(db, FilesystemBlobStore(str(tmp_path)))
+
+    async def scenario():
+        key = await repository.blob_store.put(data, "image/png")
+        blob_id = await repository.create("xray.png", "chest_xray", "image/png", len(data), key)
+        legacy = await db.uploaded_files.insert_one({
+            "filename": "old.png", "content_base64": "data:image/png;base64," + base64.b64encode(data).decode()
+        })
+
+        results = []
+        for file_id in [blob_id, str(legacy.inserted_id)]:
+            document = await repository.get(file_id)
+            results.append((
+                await repository.content_size(document),
+                await collect(await repository.open_content(document)),
+                await collect(await repository.open_content(document, 70000, 140001))
+            ))
+        return results
+
+    for size, full, part in asyncio.run(scenario()):
+        assert size == len(data)
+        assert full == data
+        assert part == data[70000:140001]
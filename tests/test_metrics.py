@@ -0,0 +1,76 @@
+import asyncio
+
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+
+from models.screening import DeepQuestions, ScreeningRequest, Symptoms, UserInfo
+from services.analysis import AnalysisService
+from services.metrics import (ANALYZE_STAGE_SECONDS, HTTP_REQUEST_SECONDS, MetricsMiddleware,
+                              MetricsRegistry, metrics)
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = MetricsRegistry()
+    histogram = registry.histogram("demo_seconds", "Demo latency", ["stage"], buckets=(0.1, 1.0))
+    counter = registry.counter("demo_bytes_total", "Demo bytes")
+    for value in (0.05, 0.5, 0.5, 3.0):
+        histogram.observe(value, "score")
+    counter.inc(2048)
+
+    lines = registry.render().splitlines()
+
+    assert "# TYPE demo_seconds histogram" in lines
+    assert 'demo_seconds_bucket{stage="score",le="0.1"} 1' in lines
+    assert 'demo_seconds_bucket{stage="score",le="1"} 3' in lines
+    assert 'demo_seconds_bucket{stage="score",le="+Inf"} 4' in lines
+    assert 'demo_seconds_sum{stage="score"} 4.05' in lines
+    assert 'demo_seconds_count{stage="score"} 4' in lines
+    assert "demo_bytes_total 2048" in lines
+
+
+def test_disabled_clock_records_nothing():
+    registry = MetricsRegistry(enabled=False)
+    histogram = registry.histogram("off_seconds", "Disabled", ["stage"])
+    clock = registry.clock(histogram)
+    clock.lap("score")
+    with registry.stage(histogram, "render"):
+        pass
+
+    assert histogram.snapshot("score") is None and histogram.snapshot("render") is None
+
+
+def test_analysis_records_each_stage():
+    before = (ANALYZE_STAGE_SECONDS.snapshot("score") or {"count": 0})["count"]
+    request = ScreeningRequest(
+        user=UserInfo(age=40),
+        symptoms=Symptoms(cough_gt_2_weeks=True, cough_with_blood=True),
+        deep_questions=DeepQuestions(exposure_contact="Family member with TB"),
+        local_score=5
+    )
+    asyncio.run(AnalysisService().analyze_screening(request))
+
+    assert ANALYZE_STAGE_SECONDS.snapshot("score")["count"] == before + 1
+    for stage in ("classify", "referrals", "explanation", "ai_analysis", "build_result"):
+        assert ANALYZE_STAGE_SECONDS.snapshot(stage)["count"] >= 1
+
+
+def test_middleware_labels_requests_by_route_template():
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware)
+
+    @app.get("/api/items/{item_id}")
+    async def get_item(item_id: str):
+        if item_id == "missing":
+            raise HTTPException(status_code=404)
+        return {"id": item_id}
+
+    client = TestClient(app)
+    client.get("/api/items/a")
+    client.get("/api/items/b")
+    client.get("/api/items/missing")
+    client.get("/nowhere")
+
+    assert HTTP_REQUEST_SECONDS.snapshot("GET", "/api/items/{item_id}", "200")["count"] == 2
+    assert HTTP_REQUEST_SECONDS.snapshot("GET", "/api/items/{item_id}", "404")["count"] == 1
+    assert HTTP_REQUEST_SECONDS.snapshot("GET", "unmatched", "404")["count"] >= 1
+    assert 'route="/api/items/{item_id}"' in metrics.render()
@@ -0,0 +1,40 @@
+import asyncio
+
+from models.screening import DeepQuestions, ScreeningRequest, Symptoms, UserInfo
+from services.analysis import AnalysisService
+from services.parallel_analysis import ParallelAnalyzer
+from services.referrals import ReferralService
+
+
+def make_requests(count):
+    return [
+        ScreeningRequest(
+            user=UserInfo(age=20 + i % 60),
+            symptoms=Symptoms(cough_gt_2_weeks=bool(i % 2), fever_evening=bool(i % 3), cough_with_blood=i % 7 == 0),
+            deep_questions=DeepQuestions(previous_conditions=["diabetes"] if i % 4 == 0 else []),
+            local_score=i % 10,
+            session_id=f"s{i}"
+        )
+        for i in range(count)
+    ]
+
+
+def test_shards_match_sequential_analysis_in_order():
+    requests = make_requests(150)
+    locations = [{"lat": 19.07 + i / 1000, "lng": 72.87} if i % 2 else None for i in range(len(requests))]
+    centers = ReferralService().referral_centers[:6]
+    analyzer = ParallelAnalyzer(workers=2, shard_size=32, referral_centers=centers)
+
+    async def scenario():
+        sequential = AnalysisService(referral_service=ReferralService(centers))
+        expected = [await sequential.analyze_screening(r, loc) for r, loc in zip(requests, locations)]
+        try:
+            return expected, await analyzer.analyze_batch(requests, locations)
+        finally:
+            analyzer.shutdown()
+
+    expected, results = asyncio.run(scenario())
+
+    assert analyzer.shard_length(len(requests)) == 32
+    assert analyzer.stats()["completed"] == 5
+    assert results == [result.model_dump() for result in expected]
@@ -0,0 +1,37 @@
+from services.pdf_cache import PDFReportCache
+
+
+def test_key_depends_on_analysis_result():
+    key = PDFReportCache.make_key("s1", {"likelihood": "High", "risk_score": 9})
+
+    assert key == PDFReportCache.make_key("s1", {"risk_score": 9, "likelihood": "High"})
+    assert key != PDFReportCache.make_key("s1", {"likelihood": "High", "risk_score": 10})
+    assert key.startswith("s1.")
+
+
+def test_memory_tier_evicts_least_recently_used_by_bytes():
+    cache = PDFReportCache(max_bytes=10)
+    cache.put("a.1", b"aaaa")
+    cache.put("b.1", b"bbbb")
+    cache.get("a.1")
+    cache.put("c.1", b"cccc")
+
+    assert cache.get("b.1") is None
+    assert cache.get("a.1") == b"aaaa"
+    assert cache.current_key("b") is None
+    assert cache.stats()["bytes"] == 8
+
+
+def test_disk_tier_survives_memory_eviction_and_invalidation_clears_both(tmp_path):
+    cache = PDFReportCache(max_bytes=4, disk_dir=str(tmp_path))
+    cache.put("a.1", b"aaaa")
+    cache.put("b.1", b"bbbb")
+
+    assert cache.get("a.1") == b"aaaa"
+    assert cache.stats()["disk_hits"] == 1
+
+    cache.invalidate("a")
+
+    assert cache.get("a.1") is None
+    assert cache.current_key("a") is None
+    assert len(list(tmp_path.glob("*.pdf"))) == 1
@@ -0,0 +1,66 @@
+import asyncio
+import time
+
+from mongomock_motor import AsyncMongoMockClient
+
+from models.screening import ScreeningRequest, UserInfo
+from repositories.referral_centers import ReferralCenterRepository
+from services.analysis import AnalysisService
+from services.referrals import ReferralService
+
+
+class _UnreachableCursor:
+    async def to_list(self, length=None):
+        await asyncio.sleep(30)  # e.g. waiting for server selection
+
+
+class _UnreachableDatabase:
+    def __getitem__(self, name):
+        return self
+
+    def aggregate(self, pipeline, **kwargs):
+        return _UnreachableCursor()
+
+
+def test_unreachable_mongo_falls_back_quickly(monkeypatch):
+    monkeypatch.setattr(ReferralCenterRepository, "QUERY_TIMEOUT_SECONDS", 0.05)
+    monkeypatch.setattr(ReferralCenterRepository, "_retry_after", 0.0)
+    service = ReferralService()
+    repository = ReferralCenterRepository(_UnreachableDatabase(), service)
+
+    started = time.perf_counter()
+    referrals = asyncio.run(repository.get_priority_centers_by_urgency("Immediate", 19.076, 72.8777))
+
+    assert time.perf_counter() - started < 1.0
+    assert [r.id for r in referrals] == [r.id for r in service.get_priority_centers_by_urgency("Immediate", 19.076, 72.8777)]
+    assert not repository._mongo_available()  # backs off before trying Mongo again
+
+
+def test_fallback_and_analysis_follow_the_collection():
+    db = AsyncMongoMockClient()["referrals"]
+    service = ReferralService()
+    repository = ReferralCenterRepository(db, service)
+    moved = service.referral_centers[0].copy(update={"name": "Relocated DOTS center", "lat": 19.1, "lng": 72.9})
+
+    async def scenario():
+        await repository.seed(service.referral_centers)
+        await repository.refresh_fallback()  # collection order differs from the built-in list
+        unchanged = await repository.refresh_fallback()
+        await repository.seed([moved])
+        changed = await repository.refresh_fallback()
+        return unchanged, changed
+
+    unchanged, changed = asyncio.run(scenario())
+
+    assert (unchanged, changed) == (False, True)
+    assert service.get_center_by_id(moved.id).name == "Relocated DOTS center"
+
+    class _Source:
+        async def get_priority_centers_by_urgency(self, urgency, user_lat=None, user_lng=None):
+            return [moved]
+
+    request = ScreeningRequest(user=UserInfo(age=40), symptoms={}, deep_questions={}, local_score=0)
+    result = asyncio.run(AnalysisService(referral_service=ReferralService()).analyze_screening(
+        request, {"lat": 19.076, "lng": 72.8777}, referral_source=_Source()
+    ))
+    assert [r.name for r in result.referrals] == ["Relocated DOTS center"]
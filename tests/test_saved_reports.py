@@ -0,0 +1,102 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from mongomock_motor import AsyncMongoMockClient
+
+import database
+import routes.screening as screening_routes
+from migrations.backfill_report_keys import backfill_report_keys
+
+from models.screening import AnalysisResult, SavedReport, UserInfo
+from repositories.saved_reports import InvalidCursorError, SavedReportRepository, user_key_for
+
+
+def report(i, user_key, saved_at):
+    return SavedReport(
+        session_id=f"s{i}",
+        user_key=user_key,
+        user_info=UserInfo(name="Asha", age=34, contact="+91 98200 00000"),
+        analysis_result=AnalysisResult(
+            likelihood="High", confidence_percent=80, reasons=["Persistent cough"], urgency="TestSoon",
+            recommended_tests=["Chest X-ray"], referrals=[], explanation_plain="...",
+            session_id=f"s{i}", risk_score=9
+        ),
+        saved_at=saved_at
+    )
+
+
+def test_pages_walk_history_newest_first_without_gaps():
+    db = AsyncMongoMockClient()["reports"]
+    repository = SavedReportRepository(db)
+    base = datetime(2026, 10, 1)
+
+    async def scenario():
+        await repository.ensure_indexes()
+        for i in range(12):
+            # Pairs share a timestamp, so _id breaks the ties
+            await repository.insert(report(i, "919820000000", base + timedelta(hours=i // 2)))
+        await repository.insert(report(99, "someone-else", base))
+
+        pages, cursor = [], None
+        while True:
+            page, cursor = await repository.list_for_user("919820000000", limit=5, cursor=cursor)
+            pages.append(page)
+            if cursor is None:
+                return pages
+
+    pages = asyncio.run(scenario())
+    reports = [entry for page in pages for entry in page]
+
+    assert [len(page) for page in pages] == [5, 5, 2]
+    assert sorted(entry["session_id"] for entry in reports) == sorted(f"s{i}" for i in range(12))
+    assert [entry["saved_at"] for entry in reports] == sorted((entry["saved_at"] for entry in reports), reverse=True)
+    assert set(reports[0]) == {"id", "session_id", "saved_at", "analysis_result"}
+    assert set(reports[0]["analysis_result"]) == {"likelihood", "urgency", "risk_score", "confidence_percent"}
+
+
+def test_user_key_and_cursor_validation(monkeypatch):
+    monkeypatch.delenv("REPORT_HISTORY_SECRET", raising=False)
+    user = UserInfo(age=30, contact="+91 98200-00000")
+    assert user_key_for(user) is None  # no secret: unlisted unless the client passes its own key
+
+    monkeypatch.setenv("REPORT_HISTORY_SECRET", "server-secret")
+    key = user_key_for(user)
+    assert key == user_key_for(UserInfo(age=41, contact="919820000000"))
+    assert "9820" not in key and len(key) == 64
+    assert user_key_for(user, secret="other-secret") != key
+    assert user_key_for(UserInfo(age=30)) is None
+
+    repository = SavedReportRepository(AsyncMongoMockClient()["reports"])
+    with pytest.raises(InvalidCursorError):
+        asyncio.run(repository.list_for_user("u", cursor="not-a-cursor"))
+
+
+def test_reports_saved_without_a_secret_are_unlisted_until_backfilled(monkeypatch):
+    monkeypatch.delenv("REPORT_HISTORY_SECRET", raising=False)
+    db = AsyncMongoMockClient()["reports"]
+    session = report(1, None, datetime(2026, 10, 1))
+    asyncio.run(db.screening_sessions.insert_one(
+        {"id": "s1", "user_info": session.user_info.dict(), "analysis_result": session.analysis_result.dict()}
+    ))
+    app = FastAPI()
+    app.include_router(screening_routes.router)
+    app.dependency_overrides[database.get_database] = lambda: db
+
+    response = TestClient(app).post("/api/reports", params={"session_id": "s1"})
+
+    assert response.status_code == 200
+    assert response.json()["user_key"] is None
+
+    async def backfill():
+        # Reports saved before histories were keyed have no user_key field at all
+        await db.saved_reports.insert_one({"session_id": "s2", "user_info": {"age": 30}})
+        counts = await backfill_report_keys(db, secret="server-secret")
+        page, _ = await SavedReportRepository(db).list_for_user(user_key_for(session.user_info, "server-secret"))
+        return counts, page
+
+    counts, page = asyncio.run(backfill())
+    assert counts == {"reports": 1, "skipped": 1}
+    assert [entry["session_id"] for entry in page] == ["s1"]
@@ -0,0 +1,87 @@
+import asyncio
+from datetime import datetime
+
+from mongomock_motor import AsyncMongoMockClient
+
+from repositories.screening_rollups import ScreeningRollupRepository, location_bucket
+from services.session_writer import SessionWriteBuffer
+
+
+def session(i, day, location, likelihood, urgency):
+    return {
+        "id": f"s{i}",
+        "user_info": {"age": 30, "location": location},
+        "analysis_result": {"likelihood": likelihood, "urgency": urgency},
+        "created_at": datetime.fromisoformat(f"{day}T10:00:00")
+    }
+
+
+SESSIONS = [
+    session(1, "2026-10-01", "Mumbai", "High", "TestSoon"),
+    session(2, "2026-10-01", " mumbai ", "High", "Immediate"),
+    session(3, "2026-10-01", "Pune", "Low", "Monitor"),
+    session(4, "2026-10-02", "Mumbai", "Confirmed", "Immediate"),
+    session(5, "2026-10-03", None, "Moderate", "TestSoon"),
+    session(6, "2026-10-03", "Navi   Mumbai", "High", None),
+    session(7, "2026-10-03", "navi mumbai", "High", "Immediate"),
+]
+
+
+def test_incremental_rollups_match_rebuild_and_answer_queries():
+    db = AsyncMongoMockClient()["rollups"]
+    repository = ScreeningRollupRepository(db)
+
+    async def scenario():
+        await repository.record(SESSIONS[:2])
+        await repository.record(SESSIONS[2:] + [{"id": "pending", "analysis_result": None}])
+        incremental = await db.screening_rollups.find({}, {"updated_at": 0}).sort("_id").to_list(None)
+
+        await db.screening_sessions.insert_many([dict(s) for s in SESSIONS])
+        await db.screening_rollups.insert_one({"_id": "2026-09-30|stale|Low", "count": 9})
+        counts = await repository.rebuild()
+        rebuilt = await db.screening_rollups.find({}, {"updated_at": 0}).sort("_id").to_list(None)
+        collections = await db.list_collection_names()
+
+        return (incremental, counts, rebuilt, collections,
+                await repository.summary("2026-10-01", "2026-10-02"),
+                await repository.timeseries(location="MUMBAI"))
+
+    incremental, counts, rebuilt, collections, summary, timeseries = asyncio.run(scenario())
+
+    assert incremental == rebuilt
+    assert counts == {"sessions": 7, "rollups": 5}
+    navi_mumbai = next(rollup for rollup in rebuilt if rollup["_id"] == "2026-10-03|navi mumbai|High")
+    assert navi_mumbai["count"] == 2 and navi_mumbai["urgency"] == {"Unknown": 1, "Immediate": 1}
+    assert ScreeningRollupRepository.STAGING_COLLECTION not in collections
+    assert rebuilt[0]["_id"] == "2026-10-01|mumbai|High"
+    assert rebuilt[0]["count"] == 2 and rebuilt[0]["urgency"] == {"TestSoon": 1, "Immediate": 1}
+
+    assert summary["total"] == 4
+    assert summary["likelihood"] == {"Low": 1, "Moderate": 0, "High": 2, "Confirmed": 1}
+    assert summary["urgency"] == {"Immediate": 2, "TestSoon": 1, "Monitor": 1}
+    assert list(summary["locations"]) == ["mumbai", "pune"]
+    assert summary["locations"]["mumbai"]["total"] == 3
+
+    assert [day["day"] for day in timeseries] == ["2026-10-01", "2026-10-02"]
+    assert [day["total"] for day in timeseries] == [2, 1]
+    assert location_bucket(None) == "unknown"
+
+
+def test_write_buffer_counts_only_newly_stored_sessions():
+    db = AsyncMongoMockClient()["rollups"]
+    repository = ScreeningRollupRepository(db)
+
+    async def scenario():
+        await db.screening_sessions.create_index("id", unique=True)
+        await db.screening_sessions.insert_one(dict(SESSIONS[0]))  # stored before a crash
+        buffer = SessionWriteBuffer(max_batch=10, flush_interval=60)
+        await buffer.start(db.screening_sessions, repository.record)
+        for document in SESSIONS[:3]:
+            await buffer.submit(dict(document))
+        await buffer.drain()
+        return await repository.summary()
+
+    summary = asyncio.run(scenario())
+
+    assert summary["total"] == 2
+    assert summary["urgency"]["Immediate"] == 1 and summary["urgency"]["TestSoon"] == 0
@@ -0,0 +1,69 @@
+import asyncio
+import io
+import json
+from datetime import datetime, timedelta
+
+import pandas as pd
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+from repositories.screening_sessions import ScreeningSessionRepository
+from services.session_export import COLUMN_NAMES, stream_columnar, stream_ndjson
+
+
+def make_sessions(count):
+    base = datetime(2026, 10, 1)
+    return [
+        {
+            "id": f"s{i}",
+            "user_info": {"name": "Private", "contact": "98200", "age": 20 + i, "location": "Mumbai"},
+            "symptoms": {"cough_gt_2_weeks": bool(i % 2), "fever_evening": True},
+            "deep_questions": {"exposure_contact": "Family member with TB", "previous_conditions": ["diabetes", "hiv"]},
+            "uploads": [{"type": "chest_xray", "file_id": "f1"}],
+            "local_score": i,
+            "analysis_result": {"likelihood": "High", "urgency": "TestSoon", "risk_score": 9, "confidence_percent": 80,
+                                "recommended_tests": ["Chest X-ray", "CBNAAT"], "reasons": ["Cough"],
+                                "referrals": [{"id": "r1"}, {"id": "r2"}]},
+            "created_at": base + timedelta(minutes=count - i),
+            "updated_at": base + timedelta(minutes=count - i)
+        }
+        for i in range(count)
+    ]
+
+
+async def collect(db, stream, *args):
+    cursor = ScreeningSessionRepository(db).find_for_export({}, 4)
+    return [chunk async for chunk in stream(cursor, *args)]
+
+
+def test_ndjson_rows_are_flat_and_oldest_first():
+    db = AsyncMongoMockClient()["export"]
+    asyncio.run(db.screening_sessions.insert_many(make_sessions(10)))
+
+    chunks = asyncio.run(collect(db, stream_ndjson, 4))
+    rows = [json.loads(line) for chunk in chunks for line in chunk.decode().splitlines()]
+
+    assert len(chunks) == 3  # one chunk per batch
+    assert [row["id"] for row in rows] == [f"s{i}" for i in range(9, -1, -1)]
+    assert list(rows[0]) == COLUMN_NAMES
+    assert rows[0]["previous_conditions"] == "diabetes;hiv"
+    assert rows[0]["referral_ids"] == "r1;r2"
+    assert rows[0]["symptom_night_sweats"] is False
+    assert not {"name", "contact", "uploads"} & set(rows[0])
+
+
+@pytest.mark.parametrize("file_format", ["parquet", "arrow"])
+def test_columnar_exports_load_into_pandas(file_format):
+    pa = pytest.importorskip("pyarrow")
+    db = AsyncMongoMockClient()["export"]
+    asyncio.run(db.screening_sessions.insert_many(make_sessions(10)))
+
+    chunks = asyncio.run(collect(db, stream_columnar, file_format, 4))
+    data = io.BytesIO(b"".join(chunks))
+    frame = pd.read_parquet(data) if file_format == "parquet" else pa.ipc.open_stream(data).read_pandas()
+
+    assert len(chunks) == 4  # a chunk per batch and the footer
+    assert list(frame.columns) == COLUMN_NAMES
+    assert len(frame) == 10
+    assert frame["created_at"].is_monotonic_increasing
+    assert frame["age"].tolist() == list(range(29, 19, -1))
@@ -0,0 +1,76 @@
+import asyncio
+
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+from repositories.screening_sessions import ScreeningSessionRepository
+
+
+def test_projection_validates_top_level_fields():
+    assert ScreeningSessionRepository.projection(None) == {"_id": 0}
+    assert ScreeningSessionRepository.projection(["analysis_result.likelihood"]) == {
+        "_id": 0, "id": 1, "analysis_result.likelihood": 1
+    }
+    assert ScreeningSessionRepository.parse_fields(" user_info, ,symptoms ") == ["user_info", "symptoms"]
+    with pytest.raises(ValueError):
+        ScreeningSessionRepository.projection(["uploads", "password"])
+
+
+def test_summary_read_leaves_uploads_and_answers_behind():
+    db = AsyncMongoMockClient()["sessions"]
+    document = {
+        "id": "s1", "user_info": {"age": 30}, "symptoms": {"cough_gt_2_weeks": True},
+        "deep_questions": {}, "local_score": 3, "analysis_result": None,
+        "uploads": [{"type": "chest_xray", "content_base64": "A" * 10000}]
+    }
+
+    async def scenario():
+        await db.screening_sessions.insert_one(document)
+        repository = ScreeningSessionRepository(db)
+        return await repository.get_summary("s1"), await repository.get("s1", ["uploads.type"])
+
+    summary, uploads = asyncio.run(scenario())
+
+    assert summary.id == "s1" and summary.user_info.age == 30
+    assert uploads == {"id": "s1", "uploads": [{"type": "chest_xray"}]}
+
+
+class PendingSessions:
+    def __init__(self, documents):
+        self.documents = {document["id"]: document for document in documents}
+
+    def get(self, session_id):
+        return self.documents.get(session_id)
+
+
+@pytest.mark.parametrize("fields", [
+    ["uploads.type"], ["uploads.type", "uploads.size"], ["user_info.age", "analysis_result.likelihood"],
+    ["analysis_result.referrals.name"], ["symptoms.missing"], ["local_score.value"],
+])
+def test_buffered_session_projection_matches_mongo(fields):
+    document = {
+        "id": "s1", "user_info": {"age": 30, "name": "Asha"}, "symptoms": {"cough_gt_2_weeks": True},
+        "local_score": 3, "uploads": [{"type": "chest_xray", "size": 10}, {"size": 20}],
+        "analysis_result": {"likelihood": "High", "referrals": [{"name": "PHC", "distance": "2 km"}]},
+    }
+    db = AsyncMongoMockClient()["buffered"]
+
+    async def scenario():
+        await db.screening_sessions.insert_one(dict(document))
+        stored = await ScreeningSessionRepository(db, PendingSessions([])).get("s1", fields)
+        buffered = await ScreeningSessionRepository(db, PendingSessions([document])).get("s1", fields)
+        return stored, buffered
+
+    stored, buffered = asyncio.run(scenario())
+
+    assert buffered == stored
+
+
+def test_overlapping_fields_are_rejected():
+    for fields in (["user_info", "user_info.age"], ["analysis_result.referrals.name", "analysis_result"],
+                   ["id.value"]):
+        with pytest.raises(ValueError, match="Overlapping"):
+            ScreeningSessionRepository.projection(fields)
+    assert ScreeningSessionRepository.projection(["user_info.age", "user_info.agent", "id"]) == {
+        "_id": 0, "id": 1, "user_info.age": 1, "user_info.agent": 1
+    }
@@ -0,0 +1,134 @@
+import asyncio
+
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+from services.session_writer import SessionWriteBuffer, WriteBufferFullError
+
+
+class SlowCollection:
+    """Collection stub whose inserts block until released"""
+
+    def __init__(self):
+        self.release = asyncio.Event()
+        self.inserted = []
+
+    async def insert_many(self, documents, ordered=True):
+        await self.release.wait()
+        self.inserted.extend(documents)
+
+
+def test_flushes_in_batches_and_drains_on_shutdown(tmp_path):
+    collection = AsyncMongoMockClient()["writer"]["screening_sessions"]
+
+    async def scenario():
+        buffer = SessionWriteBuffer(max_batch=3, flush_interval=60, spill_dir=str(tmp_path))
+        await buffer.start(collection)
+        for i in range(7):
+            await buffer.submit({"id": f"s{i}"})
+        await asyncio.sleep(0.05)
+        flushed_before_drain = await collection.count_documents({})
+        pending_read = buffer.get("s6")
+        await buffer.drain()
+        return buffer, flushed_before_drain, pending_read, await collection.count_documents({})
+
+    buffer, flushed_before_drain, pending_read, total = asyncio.run(scenario())
+
+    assert flushed_before_drain == 6  # two full batches without waiting for the interval
+    assert pending_read["id"] == "s6"
+    assert total == 7
+    assert buffer.stats()["pending"] == 0
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_backpressure_when_writes_fall_behind():
+    collection = SlowCollection()
+
+    async def scenario():
+        buffer = SessionWriteBuffer(max_batch=2, max_buffered=2, flush_interval=0.01, enqueue_timeout=0.05)
+        await buffer.start(collection)
+        await buffer.submit({"id": "a"})
+        await buffer.submit({"id": "b"})
+        with pytest.raises(WriteBufferFullError):
+            await buffer.submit({"id": "c"})
+
+        waiting = asyncio.ensure_future(buffer.submit({"id": "d"}))
+        await asyncio.sleep(0.01)
+        collection.release.set()
+        await asyncio.wait_for(waiting, 1)
+        await buffer.drain()
+        return buffer
+
+    buffer = asyncio.run(scenario())
+
+    assert [doc["id"] for doc in collection.inserted] == ["a", "b", "d"]
+    assert buffer.stats()["rejected"] == 1
+
+
+def test_replays_spilled_sessions_after_crash(tmp_path):
+    collection = AsyncMongoMockClient()["writer"]["screening_sessions"]
+
+    async def crash():
+        buffer = SessionWriteBuffer(spill_dir=str(tmp_path), flush_interval=60, max_batch=100,
+                                    spill_name="worker-1")
+        await buffer.start(SlowCollection())
+        await buffer.submit({"id": "lost-1"})
+        await buffer.submit({"id": "lost-2"})
+        buffer._task.cancel()  # process dies before the flush ...
+        buffer._lock.close()  # ... and the kernel drops its lock
+
+    async def restart():
+        await collection.create_index("id", unique=True)
+        await collection.insert_one({"id": "lost-1"})  # written just before the crash
+        buffer = SessionWriteBuffer(spill_dir=str(tmp_path), flush_interval=0.01)
+        await buffer.start(collection)
+        await buffer.drain()
+        return sorted([doc["id"] async for doc in collection.find({})])
+
+    asyncio.run(crash())
+    assert asyncio.run(restart()) == ["lost-1", "lost-2"]
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_resubmitted_session_releases_its_earlier_segment(tmp_path):
+    collection = SlowCollection()
+
+    async def scenario():
+        buffer = SessionWriteBuffer(max_batch=1, flush_interval=0.01, spill_dir=str(tmp_path))
+        await buffer.start(collection)
+        await buffer.submit({"id": "s1", "version": 1})
+        await asyncio.sleep(0.02)  # the flusher is inserting version 1 in a new segment
+        await buffer.submit({"id": "s1", "version": 2})
+        collection.release.set()
+        await buffer.drain()
+        return buffer
+
+    buffer = asyncio.run(scenario())
+
+    assert collection.inserted == [{"id": "s1", "version": 1}, {"id": "s1", "version": 2}]
+    assert buffer.stats()["pending"] == 0
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_leaves_spills_of_running_workers_alone(tmp_path):
+    collection = AsyncMongoMockClient()["writer"]["screening_sessions"]
+
+    async def scenario():
+        running = SessionWriteBuffer(spill_dir=str(tmp_path), flush_interval=60, max_batch=100,
+                                     spill_name="worker-1")
+        await running.start(SlowCollection())
+        await running.submit({"id": "in-flight"})
+
+        with pytest.raises(RuntimeError):
+            await SessionWriteBuffer(spill_dir=str(tmp_path), spill_name="worker-1").start(collection)
+
+        other = SessionWriteBuffer(spill_dir=str(tmp_path), flush_interval=0.01, spill_name="worker-2")
+        await other.start(collection)
+        await other.drain()
+        return running, await collection.count_documents({})
+
+    running, written = asyncio.run(scenario())
+
+    assert written == 0  # not replayed behind the running worker's back
+    assert running.get("in-flight") is not None
+    assert [path.name for path in tmp_path.iterdir()] == ["worker-1"]
@@ -0,0 +1,97 @@
+import random
+
+import pytest
+
+from services.spatial_index import GeoGridIndex, haversine_km
+from services.referrals import ReferralService
+
+
+@pytest.fixture(scope="module")
+def points():
+    rng = random.Random(11)
+    return [(rng.uniform(8.0, 35.0), rng.uniform(68.0, 97.0)) for _ in range(3000)]
+
+
+@pytest.fixture(scope="module")
+def index(points):
+    return GeoGridIndex(points)
+
+
+def _brute_force(points, lat, lng):
+    # Independent scalar oracle, not the index's vectorized distances
+    return sorted((haversine_km(lat, lng, p_lat, p_lng), i) for i, (p_lat, p_lng) in enumerate(points))
+
+
+def _assert_hits_match(actual, expected):
+    assert [i for _, i in actual] == [i for _, i in expected]
+    assert [d for d, _ in actual] == pytest.approx([d for d, _ in expected], rel=1e-9, abs=1e-9)
+
+
+def test_radius_query_matches_brute_force(points, index):
+    rng = random.Random(5)
+    for _ in range(100):
+        lat, lng = rng.uniform(5.0, 38.0), rng.uniform(65.0, 100.0)
+        radius = rng.choice([5.0, 25.0, 50.0, 200.0, 1500.0])
+        expected = [hit for hit in _brute_force(points, lat, lng) if hit[0] <= radius]
+
+        _assert_hits_match(index.query_radius(lat, lng, radius), expected)
+
+
+def test_nearest_query_matches_brute_force(points, index):
+    rng = random.Random(6)
+    for _ in range(100):
+        lat, lng = rng.uniform(5.0, 38.0), rng.uniform(65.0, 100.0)
+        k = rng.choice([1, 5, 10, 50])
+        max_distance = rng.choice([None, 20.0, 50.0, 300.0])
+        expected = [hit for hit in _brute_force(points, lat, lng)
+                    if max_distance is None or hit[0] <= max_distance][:k]
+
+        _assert_hits_match(index.query_nearest(lat, lng, k, max_distance), expected)
+
+
+def test_bulk_nearest_matches_single_queries(index):
+    rng = random.Random(8)
+    lats = [rng.uniform(5.0, 38.0) for _ in range(300)]
+    lngs = [rng.uniform(65.0, 100.0) for _ in range(300)]
+    limits = [rng.choice([20.0, 50.0, 300.0]) for _ in range(300)]
+
+    results = index.query_nearest_many(lats, lngs, 10, limits)
+
+    assert results == [index.query_nearest(lat, lng, 10, limit)
+                       for lat, lng, limit in zip(lats, lngs, limits)]
+
+
+def test_empty_index():
+    index = GeoGridIndex([])
+
+    assert index.query_radius(19.0, 72.8, 50.0) == []
+    assert index.query_nearest(19.0, 72.8, 5) == []
+    assert index.query_nearest_many([19.0], [72.8], 5) == [[]]
+
+
+def test_nearby_centers_sorted_within_radius():
+    service = ReferralService()
+    centers = service.get_nearby_centers(19.0760, 72.8777, radius_km=50.0, max_results=5)
+
+    assert [c.id for c in centers][0] == "1"
+    distances = [float(c.distance.split()[0]) for c in centers]
+    assert distances == sorted(distances)
+    assert all(d <= 50.0 for d in distances)
+    assert all(c.type != "Government Hospital" for c in centers)  # Delhi is out of range
+
+
+def test_bulk_referrals_match_single_lookups():
+    service = ReferralService()
+    queries = [(19.0760, 72.8777, None), (19.1136, 72.8697, "Immediate"),
+               (17.4239, 78.4738, "TestSoon"), (None, None, "Monitor"), (None, None, None)]
+
+    results = service.get_referrals_bulk(queries)
+
+    expected = [
+        service.get_nearby_centers(19.0760, 72.8777),
+        service.get_priority_centers_by_urgency("Immediate", 19.1136, 72.8697),
+        service.get_priority_centers_by_urgency("TestSoon", 17.4239, 78.4738),
+        service.get_priority_centers_by_urgency("Monitor"),
+        service.get_nearby_centers(),
+    ]
+    assert results == expected
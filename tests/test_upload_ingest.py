@@ -0,0 +1,103 @@
+import asyncio
+import base64
+import hashlib
+
+import pytest
+
+from services.blob_store import FilesystemBlobStore
+from services.upload_ingest import UploadIngestor, UploadRejectedError
+
+PNG = b"\x89PNG\r\n\x1a\n" + b"\x00" * 100
+
+
+async def ingest(store, chunks, max_bytes):
+    writer = await store.open_writer()
+    ingestor = UploadIngestor(writer, max_bytes)
+    try:
+        for chunk in chunks:
+            await ingestor.feed(chunk)
+        key = ingestor.finish()
+        await writer.commit(key, ingestor.content_type)
+    except BaseException:
+        await writer.abort()
+        raise
+    return key, ingestor
+
+
+def stored_files(root):
+    return [p for p in root.rglob("*") if p.is_file()]
+
+
+def test_chunks_are_hashed_sniffed_and_committed_under_content_key(tmp_path):
+    store = FilesystemBlobStore(str(tmp_path))
+    chunks = [PNG[:3], PNG[3:50], PNG[50:]]
+
+    key, ingestor = asyncio.run(ingest(store, chunks, max_bytes=1024))
+    asyncio.run(ingest(store, [PNG], max_bytes=1024))
+
+    assert key == hashlib.sha256(PNG).hexdigest()
+    assert ingestor.content_type == "image/png"
+    assert ingestor.size == len(PNG)
+    assert asyncio.run(store.get(key)) == PNG
+    assert len(stored_files(tmp_path)) == 1
+
+
+def test_rejects_once_limit_is_crossed_and_discards_staged_data(tmp_path):
+    store = FilesystemBlobStore(str(tmp_path))
+    fed = []
+
+    def chunks():
+        for _ in range(100):
+            fed.append(1)
+            yield PNG
+
+    with pytest.raises(UploadRejectedError) as excinfo:
+        asyncio.run(ingest(store, chunks(), max_bytes=300))
+
+    assert excinfo.value.status_code == 413
+    assert len(fed) == 3
+    assert stored_files(tmp_path) == []
+
+
+def test_rejects_unrecognized_content_from_first_chunk(tmp_path):
+    store = FilesystemBlobStore(str(tmp_path))
+
+    with pytest.raises(UploadRejectedError) as excinfo:
+        asyncio.run(ingest(store, [b"MZ\x90\x00 not an image", b"more"], max_bytes=1024))
+
+    assert excinfo.value.status_code == 400
+    assert stored_files(tmp_path) == []
+
+
+class FailingBlobStore(FilesystemBlobStore):
+    async def put(self, content, content_type=None):
+        raise OSError("blob store unavailable")
+
+
+def test_analysis_keeps_upload_metadata_when_blob_store_fails(tmp_path):
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from mongomock_motor import AsyncMongoMockClient
+
+    import database
+    import routes.screening as screening_routes
+
+    db = AsyncMongoMockClient()["uploads_down"]
+    app = FastAPI()
+    app.include_router(screening_routes.router)
+    app.dependency_overrides[database.get_database] = lambda: db
+    app.dependency_overrides[screening_routes.get_blob_store] = lambda: FailingBlobStore(str(tmp_path))
+    body = {
+        "user": {"age": 40},
+        "symptoms": {"cough_gt_2_weeks": True},
+        "deep_questions": {},
+        "uploads": [{"type": "xray", "filename": "chest.png", "content_base64": base64.b64encode(PNG).decode()}],
+        "local_score": 2
+    }
+
+    response = TestClient(app).post("/api/analyze", json={"screening_request": body})
+
+    assert response.status_code == 200
+    session = asyncio.run(db.screening_sessions.find_one({"id": response.json()["session_id"]}))
+    assert session["uploads"] == [{"type": "xray", "filename": "chest.png", "size": None, "file_id": None,
+                                   "blob_key": None, "content_type": None}]
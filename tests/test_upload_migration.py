@@ -0,0 +1,43 @@
+import asyncio
+import base64
+
+from mongomock_motor import AsyncMongoMockClient
+
+from migrations.externalize_uploads import migrate_sessions, migrate_uploaded_files
+from services.blob_store import FilesystemBlobStore, content_key
+
+PNG = b"\x89PNG\r\n\x1a\n" + b"\x01" * 64
+
+
+def test_moves_inline_uploads_out_of_sessions_and_files(tmp_path):
+    db = AsyncMongoMockClient()["migration"]
+    store = FilesystemBlobStore(str(tmp_path))
+    inline = {"type": "chest_xray", "filename": "x.png",
+              "content_base64": "data:image/png;base64," + base64.b64encode(PNG).decode()}
+
+    async def scenario():
+        await db.screening_sessions.insert_many([
+            {"id": "s1", "uploads": [inline, {"type": "report", "filename": "r.pdf", "file_id": "f"}]},
+            {"id": "s2", "uploads": []},
+        ])
+        await db.uploaded_files.insert_one({"filename": "x.png", "content_base64": base64.b64encode(PNG).decode()})
+
+        session_counts = await migrate_sessions(db, store, batch_size=1)
+        file_counts = await migrate_uploaded_files(db, store)
+        rerun = await migrate_sessions(db, store)
+        session = await db.screening_sessions.find_one({"id": "s1"})
+        legacy = await db.uploaded_files.find_one({"filename": "x.png", "content_base64": {"$exists": False},
+                                                   "file_type": {"$exists": False}})
+        return session_counts, file_counts, rerun, session, legacy
+
+    session_counts, file_counts, rerun, session, legacy = asyncio.run(scenario())
+
+    assert session_counts == {"sessions": 1, "uploads": 1, "failed": 0}
+    assert file_counts == {"files": 1, "failed": 0}
+    assert rerun["sessions"] == 0
+    assert "content_base64" not in session["uploads"][0]
+    assert session["uploads"][0]["blob_key"] == content_key(PNG)
+    assert session["uploads"][0]["content_type"] == "image/png"
+    assert session["uploads"][1]["file_id"] == "f"
+    assert legacy["blob_key"] == content_key(PNG)
+    assert asyncio.run(store.get(content_key(PNG))) == PNG